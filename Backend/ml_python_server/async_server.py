@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+asyncio (ASGI) front end for the fraud detection service.
+
+Connections are handled by the event loop, so thousands of concurrent
+keep-alive clients from the Node backend cost no threads. Each request is
+run through enhanced_server's Flask app (same routes, validation, hooks
+and responses) on a bounded thread pool. Requests beyond
+ASYNC_MAX_PENDING are rejected with 503 instead of queueing without limit.
+
+    python async_server.py --bind 0.0.0.0:5001 --threads 8
+"""
+import os
+import asyncio
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from quart import Quart, Response, request, jsonify
+from werkzeug.test import EnvironBuilder
+import enhanced_server
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Threads running Flask views (model inference releases the GIL inside NumPy)
+ASYNC_WORKER_THREADS = int(os.environ.get("ASYNC_WORKER_THREADS", 8))
+# Requests waiting for or running on the pool before new ones get 503
+ASYNC_MAX_PENDING = int(os.environ.get("ASYNC_MAX_PENDING", 1000))
+
+# Routes answered on the event loop itself, so they respond even when the pool is saturated
+LOOP_ROUTES = {'/health/live'}
+
+flask_app = enhanced_server.app
+
+app = Quart(__name__)
+app.config["WORKER_THREADS"] = ASYNC_WORKER_THREADS
+app.config["MAX_PENDING"] = ASYNC_MAX_PENDING
+app.config["PENDING"] = 0
+
+_executor = None
+
+
+def get_executor():
+    """Bounded pool the Flask views run on (created on first use)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=app.config["WORKER_THREADS"], thread_name_prefix="fraud-view")
+    return _executor
+
+
+def dispatch(method, path, query_string, headers, body):
+    """Run one request through the Flask app (routing, hooks, CORS, views) on a pool thread"""
+    builder = EnvironBuilder(path=path, method=method, query_string=query_string, headers=headers, data=body)
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    with flask_app.request_context(environ):
+        response = flask_app.full_dispatch_request()
+        return response.status_code, list(response.headers.items()), response.get_data()
+
+
+async def forward(**kwargs):
+    """Hand the current request to the Flask view on the thread pool"""
+    if app.config["PENDING"] >= app.config["MAX_PENDING"]:
+        logger.warning(f"Rejecting {request.method} {request.path}: {app.config['PENDING']} requests pending")
+        return jsonify({
+            "error": "Server busy",
+            "details": "Too many requests in progress, retry shortly"
+        }), 503, {"Retry-After": "1"}
+
+    body = await request.get_data()
+    app.config["PENDING"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        status, headers, data = await loop.run_in_executor(
+            get_executor(), dispatch, request.method, request.path, request.query_string,
+            list(request.headers.items()), body)
+    finally:
+        app.config["PENDING"] -= 1
+
+    response = Response(data, status=status)
+    response.headers.clear()
+    for name, value in headers:
+        response.headers.add(name, value)
+    return response
+
+
+@app.route('/health/live', methods=['GET'])
+async def liveness():
+    """Liveness probe answered on the event loop"""
+    return jsonify({"live": True, "pending": app.config["PENDING"]})
+
+
+def mirror_routes():
+    """Expose every route of the Flask app with the same paths and methods"""
+    for rule in flask_app.url_map.iter_rules():
+        if rule.endpoint == 'static' or rule.rule in LOOP_ROUTES:
+            continue
+        # OPTIONS is forwarded too, so flask-cors answers preflight requests
+        app.add_url_rule(rule.rule, endpoint=rule.endpoint, view_func=forward,
+                         methods=sorted(rule.methods - {'HEAD'}), provide_automatic_options=False)
+
+
+mirror_routes()
+
+
+@app.after_serving
+async def shutdown_executor():
+    # Let in-flight views finish before the process exits
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+
+
+def main():
+    from hypercorn.config import Config
+    from hypercorn.asyncio import serve
+
+    parser = argparse.ArgumentParser(description="Serve the fraud detection API with asyncio")
+    parser.add_argument("--bind", default=f"0.0.0.0:{os.environ.get('PORT', 5001)}")
+    parser.add_argument("--threads", type=int, default=ASYNC_WORKER_THREADS, help="view thread pool size")
+    parser.add_argument("--max-pending", type=int, default=ASYNC_MAX_PENDING)
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    app.config["WORKER_THREADS"] = args.threads
+    app.config["MAX_PENDING"] = args.max_pending
+
+    config = Config()
+    config.bind = [args.bind]
+    config.graceful_timeout = args.graceful_timeout
+    config.keep_alive_timeout = 75  # longer than Node's default agent keep-alive
+
+    logger.info(f"Starting async fraud detection server on {args.bind} "
+                f"({args.threads} view threads, {args.max_pending} max pending)")
+    asyncio.run(serve(app, config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Append-only audit log of prediction decisions in Arrow IPC or Parquet.
+
+Every decision is stored with its input features, model version, source,
+probabilities and indicators, for backtesting and offline analysis. The
+request thread only queues (booking, result, schema). A background thread
+turns the queued decisions into columnar record batches, with one float64
+column per feature of the schema the decision was scored with. It writes
+a batch every AUDIT_FLUSH_ROWS decisions or AUDIT_FLUSH_SECONDS seconds.
+
+Batches are appended to segment files, one directory per feature schema:
+
+    <AUDIT_LOG_DIR>/model-v1/20250322-101500-1234-0.arrow
+
+A segment is closed and a new one started once it reaches
+AUDIT_SEGMENT_BYTES or AUDIT_SEGMENT_SECONDS. Arrow segments use the IPC
+stream format, so the batches flushed so far can be read while a segment is
+still open. Parquet segments are written as `.parquet.open` and renamed
+when closed, because a Parquet file is only readable once its footer is
+written.
+
+    from audit_log import read_decisions
+    frame = read_decisions('audit', schema='model-v1', start=time.time() - 86400)
+
+Requires pyarrow 14 or later; logging is enabled by setting AUDIT_LOG_DIR.
+"""
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Defaults (override with environment variables)
+AUDIT_LOG_DIR = os.environ.get("AUDIT_LOG_DIR") or None
+AUDIT_LOG_FORMAT = os.environ.get("AUDIT_LOG_FORMAT", "arrow")
+AUDIT_FLUSH_ROWS = int(os.environ.get("AUDIT_FLUSH_ROWS", 1000))
+AUDIT_FLUSH_SECONDS = float(os.environ.get("AUDIT_FLUSH_SECONDS", 5))
+AUDIT_SEGMENT_BYTES = int(os.environ.get("AUDIT_SEGMENT_BYTES", 64 * 1024 * 1024))
+AUDIT_SEGMENT_SECONDS = float(os.environ.get("AUDIT_SEGMENT_SECONDS", 3600))
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", 10000))
+
+FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+# Marker queued by flush() to write out the pending decisions
+FLUSH = object()
+
+# Columns stored for every decision, before the feature columns
+DECISION_COLUMNS = ('decided_at', 'booking_id', 'user_id', 'model_version', 'source', 'fraud_probability',
+                    'ml_probability', 'rules_probability', 'is_fraud', 'risk_level', 'indicators')
+
+
+def _identifier(booking, fields):
+    for field in fields:
+        value = booking.get(field)
+        if value is not None:
+            return str(value)
+    return None
+
+
+def _probability(value):
+    return np.nan if value is None else float(value)
+
+
+def arrow_schema(feature_schema):
+    """Arrow schema of the segments holding decisions scored with `feature_schema`"""
+    fields = [
+        pa.field('decided_at', pa.timestamp('us', tz='UTC')),
+        pa.field('booking_id', pa.string()),
+        pa.field('user_id', pa.string()),
+        pa.field('model_version', pa.string()),
+        pa.field('source', pa.string()),
+        pa.field('fraud_probability', pa.float64()),
+        pa.field('ml_probability', pa.float64()),
+        pa.field('rules_probability', pa.float64()),
+        pa.field('is_fraud', pa.bool_()),
+        pa.field('risk_level', pa.string()),
+        pa.field('indicators', pa.list_(pa.string()))
+    ]
+    fields.extend(pa.field(name, pa.float64()) for name in feature_schema.names)
+    return pa.schema(fields, metadata={'feature_schema': feature_schema.key})
+
+
+def build_batch(feature_schema, decisions):
+    """Record batch of (decided_at, booking, result) decisions scored with `feature_schema`"""
+    features = np.full((len(decisions), feature_schema.width), np.nan)
+    for i, (_, booking, _) in enumerate(decisions):
+        try:
+            features[i] = feature_schema.read(booking)
+        except (TypeError, ValueError):
+            # Unreadable inputs are kept as NaN features rather than dropped
+            pass
+    bookings = [booking for _, booking, _ in decisions]
+    results = [result for _, _, result in decisions]
+    columns = [
+        pa.array([int(decided_at * 1e6) for decided_at, _, _ in decisions], pa.timestamp('us', tz='UTC')),
+        pa.array([_identifier(booking, ('bookingId', 'booking_id', 'Booking_ID')) for booking in bookings],
+                 pa.string()),
+        pa.array([_identifier(booking, ('userId', 'user_id')) for booking in bookings], pa.string()),
+        pa.array([result.get('modelVersion') for result in results], pa.string()),
+        pa.array([result.get('source') or ('rules' if result.get('rule_based') else 'ml') for result in results],
+                 pa.string()),
+        pa.array([float(result['fraud_probability']) for result in results], pa.float64()),
+        pa.array([_probability(result.get('ml_probability')) for result in results], pa.float64()),
+        pa.array([_probability(result.get('rules_probability')) for result in results], pa.float64()),
+        pa.array([bool(result.get('is_fraud')) for result in results], pa.bool_()),
+        pa.array([result.get('risk_level') for result in results], pa.string()),
+        pa.array([list(result.get('indicators') or []) for result in results], pa.list_(pa.string()))
+    ]
+    columns.extend(pa.array(features[:, i]) for i in range(feature_schema.width))
+    return pa.RecordBatch.from_arrays(columns, schema=arrow_schema(feature_schema))
+
+
+class Segment:
+    """One open segment file that record batches are appended to"""
+
+    def __init__(self, directory, feature_schema, fmt, sequence):
+        self.fmt = fmt
+        self.opened_at = time.time()
+        stamp = datetime.fromtimestamp(self.opened_at).strftime('%Y%m%d-%H%M%S')
+        self.path = os.path.join(directory, f"{stamp}-{os.getpid()}-{sequence:06d}{FORMATS[fmt]}")
+        schema = arrow_schema(feature_schema)
+        if fmt == 'arrow':
+            self._sink = pa.OSFile(self.path, 'wb')
+            self._writer = ipc.new_stream(self._sink, schema)
+            self._write_path = self.path
+        else:
+            self._write_path = f"{self.path}.open"
+            self._sink = None
+            self._writer = pq.ParquetWriter(self._write_path, schema)
+        self.rows = 0
+
+    def write(self, batch):
+        if self.fmt == 'arrow':
+            self._writer.write_batch(batch)
+            self._sink.flush()
+        else:
+            # One row group per flushed batch
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        self.rows += batch.num_rows
+
+    def size(self):
+        return os.path.getsize(self._write_path)
+
+    def close(self):
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        if self._write_path != self.path:
+            os.replace(self._write_path, self.path)
+
+
+class AuditLog:
+    """Queues decisions and writes them to rotating columnar segments from a background thread"""
+
+    def __init__(self, directory=AUDIT_LOG_DIR, fmt=AUDIT_LOG_FORMAT, flush_rows=AUDIT_FLUSH_ROWS,
+                 flush_seconds=AUDIT_FLUSH_SECONDS, segment_bytes=AUDIT_SEGMENT_BYTES,
+                 segment_seconds=AUDIT_SEGMENT_SECONDS, queue_size=AUDIT_QUEUE_SIZE):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown audit log format {fmt!r} (expected one of {', '.join(FORMATS)})")
+        self.directory = directory
+        self.fmt = fmt
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.enabled = directory is not None
+        if self.enabled and not PYARROW_AVAILABLE:
+            logger.error("AUDIT_LOG_DIR is set but pyarrow is not installed; decisions will not be audited")
+            self.enabled = False
+        self._queue = queue.Queue(maxsize=queue_size)
+        # _lock (counters, writer start-up) is only held briefly, so request threads never
+        # wait on file I/O; _segments_lock guards the open segments while they are written
+        self._lock = threading.Lock()
+        self._segments_lock = threading.Lock()
+        self._writer_pid = None
+        self._segments = {}
+        self._sequence = 0
+        self._stats = {'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0, 'segments': 0}
+
+    def record(self, booking, result, feature_schema):
+        """Queue one decision; never blocks the caller (drops when the queue is full)"""
+        if not self.enabled:
+            return False
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((time.time(), booking, result, feature_schema))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        return True
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _ensure_writer(self):
+        # Threads do not survive fork(), so each worker process starts its own
+        if self._writer_pid != os.getpid():
+            with self._lock:
+                if self._writer_pid != os.getpid():
+                    if self._writer_pid is not None:
+                        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                        self._segments = {}
+                    self._writer_pid = os.getpid()
+                    threading.Thread(target=self._write_loop, name="audit-log-writer", daemon=True).start()
+                    atexit.register(self.close)
+
+    def _write_loop(self):
+        pending = {}
+        count = 0
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+            if item is not None and item is not FLUSH:
+                decided_at, booking, result, feature_schema = item
+                pending.setdefault(feature_schema, []).append((decided_at, booking, result))
+                count += 1
+            if count >= self.flush_rows or item is FLUSH or time.monotonic() >= deadline:
+                if pending:
+                    self._flush(pending)
+                self._rotate()
+                # Items are only marked done once written, so flush() can wait on them
+                for _ in range(count + (item is FLUSH)):
+                    self._queue.task_done()
+                pending = {}
+                count = 0
+                deadline = time.monotonic() + self.flush_seconds
+
+    def _flush(self, pending):
+        with self._segments_lock:
+            for feature_schema, decisions in pending.items():
+                try:
+                    self._segment(feature_schema).write(build_batch(feature_schema, decisions))
+                    self._count('written', len(decisions))
+                    self._count('batches')
+                except Exception as e:
+                    self._count('failed', len(decisions))
+                    logger.error(f"Could not write {len(decisions)} decisions to the audit log: {str(e)}")
+
+    def _segment(self, feature_schema):
+        segment = self._segments.get(feature_schema.key)
+        if segment is None:
+            directory = os.path.join(self.directory, f"{feature_schema.name}-v{feature_schema.version}")
+            os.makedirs(directory, exist_ok=True)
+            segment = Segment(directory, feature_schema, self.fmt, self._sequence)
+            self._sequence += 1
+            self._count('segments')
+            self._segments[feature_schema.key] = segment
+        return segment
+
+    def _rotate(self):
+        """Close segments that reached the size or age limit; the next write opens a new one"""
+        now = time.time()
+        with self._segments_lock:
+            for key, segment in list(self._segments.items()):
+                try:
+                    if segment.size() >= self.segment_bytes or now - segment.opened_at >= self.segment_seconds:
+                        del self._segments[key]
+                        segment.close()
+                except OSError as e:
+                    logger.error(f"Could not rotate audit segment {segment.path}: {str(e)}")
+
+    def flush(self, timeout=10.0):
+        """Wait until every queued decision has been written (open segments stay open)"""
+        if not self.enabled or self._writer_pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(FLUSH, timeout=timeout)
+        except queue.Full:
+            return
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self, timeout=10.0):
+        """Write everything queued and close the open segments"""
+        self.flush(timeout)
+        with self._segments_lock:
+            for segment in self._segments.values():
+                try:
+                    segment.close()
+                except Exception as e:
+                    logger.error(f"Could not close audit segment {segment.path}: {str(e)}")
+            self._segments = {}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            "enabled": self.enabled,
+            "format": self.fmt,
+            "queued": self._queue.qsize(),
+            "openSegments": len(self._segments)
+        })
+        return stats
+
+
+# Reading
+
+def list_segments(directory, schema=None):
+    """Closed and open segment files, oldest first; `schema` limits them to one directory such as 'model-v1'"""
+    if not os.path.isdir(directory):
+        return []
+    paths = []
+    for name in [schema] if schema else os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            paths.extend(os.path.join(path, entry) for entry in os.listdir(path)
+                         if os.path.splitext(entry)[1] in FORMATS.values())
+    return sorted(paths, key=os.path.basename)
+
+
+def read_segment(path, columns=None):
+    """One segment as a pyarrow Table; an open Arrow segment yields the batches flushed so far"""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Reading the audit log requires pyarrow")
+    if path.endswith('.parquet'):
+        return pq.read_table(path, columns=columns)
+    batches = []
+    with pa.OSFile(path, 'rb') as source:
+        reader = ipc.open_stream(source)
+        schema = reader.schema
+        try:
+            for batch in reader:
+                batches.append(batch)
+        except (pa.ArrowInvalid, OSError):
+            # The writer is in the middle of appending a batch
+            pass
+    table = pa.Table.from_batches(batches, schema=schema)
+    return table.select(columns) if columns else table
+
+
+def _segment_opened_at(path):
+    stamp = '-'.join(os.path.basename(path).split('-')[:2])
+    return datetime.strptime(stamp, '%Y%m%d-%H%M%S').timestamp()
+
+
+def read_decisions(directory, schema=None, start=None, end=None, columns=None):
+    """
+    Decisions as a DataFrame, oldest segment first. `schema` limits them to
+    one schema directory, `start` and `end` (epoch seconds) to decided_at in
+    [start, end); segments opened after `end` are not read at all.
+    """
+    if columns is not None and 'decided_at' not in columns:
+        columns = ['decided_at'] + list(columns)
+    tables = []
+    for path in list_segments(directory, schema):
+        if end is not None and _segment_opened_at(path) >= end:
+            continue
+        table = read_segment(path, columns)
+        if table.num_rows:
+            tables.append(table)
+    if not tables:
+        return pd.DataFrame(columns=list(columns or DECISION_COLUMNS))
+    # Segments of different schemas have different feature columns
+    frame = pa.concat_tables(tables, promote_options='default').to_pandas()
+    if start is not None:
+        frame = frame[frame['decided_at'] >= pd.Timestamp(start, unit='s', tz='UTC')]
+    if end is not None:
+        frame = frame[frame['decided_at'] < pd.Timestamp(end, unit='s', tz='UTC')]
+    return frame.reset_index(drop=True)
+
+
+# Shared audit log used by the scoring servers
+AUDIT_LOG = AuditLog()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Per-user booking behavior, aggregated incrementally from booking and
+cancellation events.
+
+Each user's aggregates (booking gaps, lead time mean/variance, distinct
+boats, cancellation averages, same-day bookings) are updated in O(1) per
+event, so /analyze-multiple-bookings and /compare-boat-patterns can score
+a user from the userId alone. Same-day bookings are counted over the last
+BEHAVIOR_DAY_WINDOW booking days only, so a user's state stays small. With
+BEHAVIOR_DB_PATH set the aggregates are kept in SQLite, which every server
+worker reads and updates; otherwise they live in this process only, for at
+most BEHAVIOR_MAX_USERS users (least recently updated users are evicted
+first).
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Defaults (override with environment variables BEHAVIOR_DB_PATH, BEHAVIOR_DAY_WINDOW and BEHAVIOR_MAX_USERS)
+# SQLite file for the aggregates (unset: in-memory only)
+BEHAVIOR_DB_PATH = os.environ.get("BEHAVIOR_DB_PATH") or None
+# Days before a user's latest booking day whose booking counts are kept
+BEHAVIOR_DAY_WINDOW = int(os.environ.get("BEHAVIOR_DAY_WINDOW", 90))
+# Users kept by the in-memory store
+BEHAVIOR_MAX_USERS = int(os.environ.get("BEHAVIOR_MAX_USERS", 100000))
+
+DAY = 86400
+
+
+def parse_timestamp(value):
+    """ISO date string -> UTC epoch seconds (naive times are taken as UTC)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _booking_day(value):
+    """(epoch seconds, UTC day) of a client-sent booking date, or None if it cannot be read"""
+    if not value:
+        return None
+    try:
+        timestamp = parse_timestamp(value)
+        return timestamp, _day(timestamp)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+class UserBehavior:
+    """Running aggregates of one user's bookings and cancellations"""
+
+    __slots__ = (
+        'booking_count', 'dated_booking_count', 'first_booking_at', 'last_booking_at',
+        'lead_time_mean', 'lead_time_m2', 'boats', 'bookings_per_day',
+        'multiple_bookings', 'multiple_bookings_canceled',
+        'cancellation_count', 'time_before_departure_total', 'time_since_booking_total',
+        'adults_total', 'children_total'
+    )
+
+    def __init__(self):
+        self.booking_count = 0
+        self.dated_booking_count = 0
+        self.first_booking_at = None
+        self.last_booking_at = None
+        # Welford's online mean and sum of squared deviations
+        self.lead_time_mean = 0.0
+        self.lead_time_m2 = 0.0
+        self.boats = set()
+        self.bookings_per_day = {}
+        self.multiple_bookings = 0
+        self.multiple_bookings_canceled = 0
+        self.cancellation_count = 0
+        self.time_before_departure_total = 0.0
+        self.time_since_booking_total = 0.0
+        self.adults_total = 0.0
+        self.children_total = 0.0
+
+    def add_booking(self, event):
+        """Fold in a booking ({bookingDate, leadTime, boatId})"""
+        self.booking_count += 1
+
+        lead_time = float(event.get('leadTime', 0))
+        delta = lead_time - self.lead_time_mean
+        self.lead_time_mean += delta / self.booking_count
+        self.lead_time_m2 += delta * (lead_time - self.lead_time_mean)
+
+        self.boats.add(event.get('boatId'))
+
+        # Bookings without a readable date count as undated, on today's date
+        dated = _booking_day(event.get('bookingDate'))
+        if dated:
+            booked_at, day = dated
+            self.dated_booking_count += 1
+            if self.first_booking_at is None or booked_at < self.first_booking_at:
+                self.first_booking_at = booked_at
+            if self.last_booking_at is None or booked_at > self.last_booking_at:
+                self.last_booking_at = booked_at
+        else:
+            day = _day(time.time())
+
+        # A day's bookings count as multiple once there are two of them
+        same_day = self.bookings_per_day.get(day, 0) + 1
+        self.bookings_per_day[day] = same_day
+        if same_day == 1:
+            self._prune_days()
+        elif same_day == 2:
+            self.multiple_bookings += 2
+        else:
+            self.multiple_bookings += 1
+
+    def _prune_days(self):
+        # Only runs when a new day is added, and keeps at most window + 1 days
+        if len(self.bookings_per_day) <= BEHAVIOR_DAY_WINDOW + 1:
+            return
+        latest = datetime.strptime(max(self.bookings_per_day), '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        cutoff = _day(latest.timestamp() - BEHAVIOR_DAY_WINDOW * DAY)
+        self.bookings_per_day = {day: count for day, count in self.bookings_per_day.items() if day >= cutoff}
+
+    def add_cancellation(self, event):
+        """
+        Fold in a cancellation ({timeBeforeDeparture, timeSinceBooking,
+        bookingDate, originalBookingData: {adults, children}})
+        """
+        self.cancellation_count += 1
+        self.time_before_departure_total += float(event.get('timeBeforeDeparture', 0))
+        self.time_since_booking_total += float(event.get('timeSinceBooking', 0))
+        original = event.get('originalBookingData', {})
+        self.adults_total += float(original.get('adults', 0))
+        self.children_total += float(original.get('children', 0))
+
+        # The same-day check is skipped when the booking date cannot be read
+        dated = _booking_day(event.get('bookingDate'))
+        if dated and self.bookings_per_day.get(dated[1], 0) > 1:
+            self.multiple_bookings_canceled += 1
+
+    @classmethod
+    def from_bookings(cls, bookings=(), cancellations=()):
+        behavior = cls()
+        for booking in bookings:
+            behavior.add_booking(booking)
+        for cancellation in cancellations:
+            behavior.add_cancellation(cancellation)
+        return behavior
+
+    def summary(self):
+        """Derived metrics used by the pattern endpoints"""
+        # Mean gap between consecutive bookings of the sorted dates is
+        # (last - first) / (n - 1), so no dates need to be kept
+        avg_time_between = None
+        if self.dated_booking_count >= 2:
+            avg_time_between = (self.last_booking_at - self.first_booking_at) / 3600 / (self.dated_booking_count - 1)
+        cancellations = self.cancellation_count
+        return {
+            "bookingCount": self.booking_count,
+            "uniqueBoatCount": len(self.boats),
+            "avgTimeBetweenBookings": avg_time_between,
+            "leadTimeMean": self.lead_time_mean,
+            "leadTimeStd": (self.lead_time_m2 / self.booking_count) ** 0.5 if self.booking_count else 0.0,
+            "multipleBookings": self.multiple_bookings,
+            "multipleBookingsCanceled": self.multiple_bookings_canceled,
+            "cancellationCount": cancellations,
+            "cancellationRatio": cancellations / self.booking_count if self.booking_count else 0.0,
+            "avgTimeBeforeDeparture": self.time_before_departure_total / cancellations if cancellations else 0.0,
+            "avgTimeSinceBooking": self.time_since_booking_total / cancellations if cancellations else 0.0,
+            "avgAdults": self.adults_total / cancellations if cancellations else 0.0,
+            "avgChildren": self.children_total / cancellations if cancellations else 0.0
+        }
+
+    def to_state(self):
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state['boats'] = list(self.boats)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        behavior = cls()
+        for name in cls.__slots__:
+            if name in state:
+                setattr(behavior, name, state[name])
+        behavior.boats = set(state.get('boats', []))
+        return behavior
+
+
+class BehaviorStore:
+    """Thread-safe map of userId -> UserBehavior, optionally backed by SQLite"""
+
+    def __init__(self, db_path=BEHAVIOR_DB_PATH, max_users=BEHAVIOR_MAX_USERS):
+        self.db_path = db_path
+        self.max_users = max_users
+        self.events = 0
+        self.evictions = 0
+        # Least recently updated users first
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        if db_path:
+            self._connection()
+
+    def _connection(self):
+        # Connections must not cross fork(), so each worker opens its own
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_behavior (
+                    user_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _update(self, user_id, apply):
+        user_id = str(user_id)
+        with self._lock:
+            self.events += 1
+            if not self.db_path:
+                behavior = self._users.get(user_id)
+                if behavior is None:
+                    behavior = self._users[user_id] = UserBehavior()
+                    if len(self._users) > self.max_users:
+                        self._users.popitem(last=False)
+                        self.evictions += 1
+                else:
+                    self._users.move_to_end(user_id)
+                apply(behavior)
+                return behavior.summary()
+
+            # Read-modify-write in one transaction so concurrent workers
+            # sharing the database do not lose each other's events
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT state FROM user_behavior WHERE user_id = ?", (user_id,)).fetchone()
+                behavior = UserBehavior.from_state(json.loads(row[0])) if row else UserBehavior()
+                apply(behavior)
+                conn.execute(
+                    "INSERT INTO user_behavior (user_id, state, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                    (user_id, json.dumps(behavior.to_state()), time.time())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return behavior.summary()
+
+    def record_booking(self, user_id, event):
+        """Add a booking event; returns the user's updated summary"""
+        return self._update(user_id, lambda behavior: behavior.add_booking(event))
+
+    def record_cancellation(self, user_id, event):
+        """Add a cancellation event; returns the user's updated summary"""
+        return self._update(user_id, lambda behavior: behavior.add_cancellation(event))
+
+    def get(self, user_id):
+        """The user's UserBehavior, or None if no events were recorded"""
+        user_id = str(user_id)
+        with self._lock:
+            if not self.db_path:
+                behavior = self._users.get(user_id)
+                return UserBehavior.from_state(behavior.to_state()) if behavior is not None else None
+            row = self._connection().execute(
+                "SELECT state FROM user_behavior WHERE user_id = ?", (user_id,)).fetchone()
+        return UserBehavior.from_state(json.loads(row[0])) if row else None
+
+    def summary(self, user_id):
+        """The user's derived metrics, or None if no events were recorded"""
+        behavior = self.get(user_id)
+        return behavior.summary() if behavior is not None else None
+
+    def stats(self):
+        with self._lock:
+            if self.db_path:
+                users = self._connection().execute("SELECT COUNT(*) FROM user_behavior").fetchone()[0]
+            else:
+                users = len(self._users)
+        return {
+            "users": users,
+            "eventsRecorded": self.events,
+            "evictions": self.evictions,
+            "persistence": "sqlite" if self.db_path else "memory"
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
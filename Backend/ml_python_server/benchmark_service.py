@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmark for the fraud detection service.
+
+Measures in-process scoring (predict_fraud, FraudDetectionModel.predict and
+predict_batch) and drives one or more running servers' /predict endpoints
+at the given concurrency levels with synthetic bookings drawn from the
+training distributions. Results are written as JSON; pass an earlier
+result with --compare to see the change per metric.
+
+    python benchmark_service.py --url http://localhost:5001/predict --concurrency 1 8 32 \\
+        --duration 15 --output bench.json
+    python benchmark_service.py --skip-in-process --url ... --compare bench.json --fail-on-regression 10
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+import numpy as np
+from synthetic_bookings import generate_booking_payloads
+
+# Metrics where a higher value is better (everything else is a latency)
+HIGHER_IS_BETTER = {'throughputRps'}
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/mean/max in milliseconds"""
+    if not seconds:
+        return {'p50Ms': None, 'p95Ms': None, 'p99Ms': None, 'meanMs': None, 'maxMs': None}
+    ms = np.asarray(seconds) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'p50Ms': round(float(p50), 3),
+        'p95Ms': round(float(p95), 3),
+        'p99Ms': round(float(p99), 3),
+        'meanMs': round(float(ms.mean()), 3),
+        'maxMs': round(float(ms.max()), 3)
+    }
+
+
+def time_each(function, payloads, repeat):
+    """Call function once per payload, `repeat` times over the set; returns per-call seconds"""
+    timings = []
+    for _ in range(repeat):
+        for payload in payloads:
+            start = time.perf_counter()
+            function(payload)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def benchmark_in_process(payloads, repeat=3, batch_size=64):
+    """Per-call timings for the rule engine and the ML model"""
+    from predict_rules import predict_fraud
+    from ml_model import create_fraud_model
+
+    results = {}
+    timings = time_each(predict_fraud, payloads, repeat)
+    results['predict_fraud'] = dict(latency_summary(timings), calls=len(timings))
+
+    model = create_fraud_model()
+    if not model.is_loaded:
+        results['FraudDetectionModel.predict'] = {'skipped': 'model could not be loaded'}
+        return results
+
+    results['modelBackend'] = model.backend
+    timings = time_each(model.predict, payloads, repeat)
+    results['FraudDetectionModel.predict'] = dict(latency_summary(timings), calls=len(timings))
+
+    batches = [payloads[i:i + batch_size] for i in range(0, len(payloads), batch_size)]
+    timings = time_each(model.predict_batch, batches, repeat)
+    per_booking = [seconds / len(batch) for seconds, batch in zip(timings, batches * repeat)]
+    results['FraudDetectionModel.predict_batch'] = dict(
+        latency_summary(timings), batchSize=batch_size, calls=len(timings),
+        perBookingUs=round(float(np.mean(per_booking)) * 1e6, 3))
+    return results
+
+
+def benchmark_http(url, payloads, concurrency, duration, warmup=20, timeout=10.0):
+    """Drive url with `concurrency` keep-alive clients for `duration` seconds"""
+    import requests
+
+    # Warm up connections, caches and lazily started threads
+    with requests.Session() as session:
+        for payload in payloads[:warmup]:
+            session.post(url, json=payload, timeout=timeout)
+
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    stop_at = [0.0]
+
+    def client(offset):
+        local_latencies = []
+        local_errors = {}
+        with requests.Session() as session:
+            start_barrier.wait()
+            i = offset
+            while time.perf_counter() < stop_at[0]:
+                payload = payloads[i % len(payloads)]
+                i += concurrency
+                started = time.perf_counter()
+                try:
+                    response = session.post(url, json=payload, timeout=timeout)
+                    status = response.status_code
+                except requests.RequestException as e:
+                    status = type(e).__name__
+                if status == 200:
+                    local_latencies.append(time.perf_counter() - started)
+                else:
+                    local_errors[str(status)] = local_errors.get(str(status), 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_errors.items():
+                errors[status] = errors.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    stop_at[0] = time.perf_counter() + duration
+    began = time.perf_counter()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    return dict(
+        latency_summary(latencies),
+        url=url,
+        concurrency=concurrency,
+        durationSeconds=round(elapsed, 2),
+        requests=len(latencies),
+        errors=errors,
+        throughputRps=round(len(latencies) / elapsed, 1)
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(report):
+    """Map 'section/name/metric' -> value for the metrics compared between runs"""
+    metrics = {}
+    for name, values in report.get('inProcess', {}).items():
+        if isinstance(values, dict):
+            for metric in ('p50Ms', 'p95Ms', 'p99Ms'):
+                if values.get(metric) is not None:
+                    metrics[f"inProcess/{name}/{metric}"] = values[metric]
+    for run in report.get('http', []):
+        for metric in ('p50Ms', 'p95Ms', 'p99Ms', 'throughputRps'):
+            if run.get(metric) is not None:
+                metrics[f"http/{run['url']}@{run['concurrency']}/{metric}"] = run[metric]
+    return metrics
+
+
+def compare(baseline, current):
+    """Percent change per metric, positive meaning worse"""
+    before, after = flatten(baseline), flatten(current)
+    changes = {}
+    for key in sorted(before.keys() & after.keys()):
+        if not before[key]:
+            continue
+        change = (after[key] - before[key]) / before[key] * 100.0
+        if key.rsplit('/', 1)[1] in HIGHER_IS_BETTER:
+            change = -change
+        changes[key] = {'before': before[key], 'after': after[key], 'regressionPct': round(change, 1)}
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fraud detection service')
+    parser.add_argument('--url', action='append', default=[], help='/predict URL of a running server (repeatable)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per URL and concurrency level')
+    parser.add_argument('--bookings', type=int, default=1000, help='synthetic bookings to cycle through')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=3, help='passes over the bookings for in-process timings')
+    parser.add_argument('--skip-in-process', action='store_true')
+    parser.add_argument('--output', help='write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', help='earlier JSON report to compare against')
+    parser.add_argument('--fail-on-regression', type=float, default=None,
+                        help='exit with status 1 if any metric is this many percent worse than --compare')
+    args = parser.parse_args()
+
+    payloads = generate_booking_payloads(args.bookings, seed=args.seed)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'gitCommit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'cpuCount': os.cpu_count(),
+            'bookings': args.bookings,
+            'seed': args.seed
+        }
+    }
+    if not args.skip_in_process:
+        report['inProcess'] = benchmark_in_process(payloads, repeat=args.repeat)
+    report['http'] = [benchmark_http(url, payloads, concurrency, args.duration)
+                      for url in args.url for concurrency in args.concurrency]
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            report['comparison'] = {'baseline': args.compare, 'metrics': compare(json.load(f), report)}
+        if args.fail_on_regression is not None:
+            regressions = {key: value for key, value in report['comparison']['metrics'].items()
+                           if value['regressionPct'] > args.fail_on_regression}
+            report['comparison']['regressions'] = sorted(regressions)
+            exit_code = 1 if regressions else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
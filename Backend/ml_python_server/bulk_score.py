@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Offline bulk scoring of reservation files.
+
+Streams a CSV, Parquet or JSON-lines file in chunks, scores every chunk with
+the vectorized rule engine and/or the ML model, and appends the results to
+the output file as each chunk finishes. Only a bounded number of chunks is
+in memory at any time, so memory use does not grow with the file size.
+With --workers > 1 the chunks are scored in a process pool.
+
+Input rows use the /predict field names (the Hotel_Reservations.csv
+columns) or are booking documents exported from the Node backend
+(startDate, endDate, passengers, cancellationHistory, totalAmount, ...).
+
+    python bulk_score.py Hotel_Reservations.csv --output scores.csv
+    python bulk_score.py bookings.jsonl --engine both --workers 4 --output scores.parquet
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from predict_rules_vectorized import predict_fraud_columns, decode_indicators, RISK_LEVELS
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger("bulk_score")
+
+# Defaults (override with environment variables or command-line flags)
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 20000))
+BULK_WORKERS = int(os.environ.get("BULK_WORKERS", os.cpu_count() or 1))
+
+# Columns copied from the input to identify each output row
+ID_COLUMNS = ('Booking_ID', 'booking_id', 'bookingId', '_id', '_id.$oid', 'id')
+
+# Upper bounds of the ML risk levels, as in FraudDetectionModel._determine_risk_level
+ML_RISK_THRESHOLDS = (0.2, 0.4, 0.6, 0.8)
+
+ENGINES = ('rules', 'ml', 'both')
+
+# Model loaded once per worker process by _init_worker
+_model = None
+
+
+def file_format(path, explicit=None):
+    if explicit:
+        return explicit
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_chunks(path, chunk_size, fmt=None):
+    """Yield the input file as DataFrames of at most chunk_size rows"""
+    fmt = file_format(path, fmt)
+    if fmt == 'csv':
+        yield from pd.read_csv(sys.stdin if path == '-' else path, chunksize=chunk_size)
+    elif fmt == 'parquet':
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Reading Parquet files requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif fmt == 'jsonl':
+        with (sys.stdin if path == '-' else open(path, 'r')) as f:
+            lines = (line for line in f if line.strip())
+            while True:
+                batch = list(itertools.islice(lines, chunk_size))
+                if not batch:
+                    break
+                # Nested documents become dotted columns (passengers.adults, ...)
+                yield pd.json_normalize([json.loads(line) for line in batch])
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+
+
+def _column(frame, names, default):
+    for name in names:
+        if name in frame:
+            return frame[name]
+    return pd.Series(default, index=frame.index)
+
+
+def bookings_to_features(frame, now=None):
+    """
+    Map exported booking documents onto the /predict field names, column
+    by column (same mapping as fraud_api_client.booking_to_rule_features)
+    """
+    now = pd.Timestamp(now or pd.Timestamp.now()).tz_localize(None)
+
+    def dates(names):
+        values = pd.to_datetime(_column(frame, names, None), errors='coerce', utc=True)
+        return values.dt.tz_localize(None).dt.normalize()
+
+    start = dates(('startDate', 'startDate.$date'))
+    end = dates(('endDate', 'endDate.$date'))
+    lead_time = (start - now).dt.days.clip(lower=0).fillna(0)
+    nights = (end - start).dt.days.clip(lower=1)
+    # Without both dates a booking counts as one night
+    nights = nights.where(start.notna() & end.notna(), 1).fillna(1)
+
+    cancellations = pd.to_numeric(_column(frame, ('cancellationHistory.count',), 0), errors='coerce').fillna(0)
+    total_bookings = pd.to_numeric(_column(frame, ('cancellationHistory.totalBookings',), 0),
+                                   errors='coerce').fillna(0)
+    special_requests = _column(frame, ('specialRequests',), None)
+
+    return pd.DataFrame({
+        'lead_time': lead_time,
+        'no_of_adults': pd.to_numeric(_column(frame, ('passengers.adults',), 0), errors='coerce').fillna(0),
+        'no_of_children': pd.to_numeric(_column(frame, ('passengers.children',), 0), errors='coerce').fillna(0),
+        'no_of_week_nights': nights,
+        'avg_price_per_room': pd.to_numeric(_column(frame, ('totalAmount',), 0), errors='coerce').fillna(0) / nights,
+        'no_of_special_requests': special_requests.map(bool).astype(float).where(special_requests.notna(), 0.0),
+        'no_of_previous_cancellations': cancellations,
+        'no_of_previous_bookings_not_canceled': (total_bookings - cancellations).clip(lower=0),
+        'repeated_guest': np.where(total_bookings > 0, 'Yes', 'No')
+    }, index=frame.index)
+
+
+def prepare_chunk(frame, now=None):
+    """Bring a chunk into the /predict field names the scorers expect"""
+    if 'lead_time' not in frame and ('startDate' in frame or 'startDate.$date' in frame):
+        return bookings_to_features(frame, now)
+    if 'repeated_guest' in frame and pd.api.types.is_numeric_dtype(frame['repeated_guest']):
+        # Hotel_Reservations.csv encodes repeated guests as 0/1
+        frame = frame.assign(repeated_guest=np.where(frame['repeated_guest'] == 1, 'Yes', 'No'))
+    return frame
+
+
+def _identifiers(frame, id_column, offset):
+    names = (id_column,) if id_column else ID_COLUMNS
+    for name in names:
+        if name in frame:
+            return name, frame[name].to_numpy()
+    return 'row', np.arange(offset, offset + len(frame))
+
+
+def _indicator_names(masks):
+    # Few distinct masks per chunk, so decode each once
+    unique, inverse = np.unique(masks, return_inverse=True)
+    decoded = np.array(['|'.join(decode_indicators(mask)) for mask in unique], dtype=object)
+    return decoded[inverse]
+
+
+def score_chunk(frame, engine='rules', id_column=None, offset=0):
+    """Score one chunk; returns a DataFrame with one result row per input row"""
+    id_name, identifiers = _identifiers(frame, id_column, offset)
+    features = prepare_chunk(frame)
+    result = {id_name: identifiers}
+    risk_names = np.array(RISK_LEVELS, dtype=object)
+
+    if engine in ('rules', 'both'):
+        rules = predict_fraud_columns(features)
+        result['rules_probability'] = rules['fraud_probability']
+        result['rules_risk_level'] = risk_names[rules['risk_level']]
+        result['indicators'] = _indicator_names(rules['indicators'])
+        probability = rules['fraud_probability']
+
+    if engine in ('ml', 'both'):
+        ml_probability = _model.predict_frame(features)
+        result['ml_probability'] = ml_probability
+        result['ml_risk_level'] = risk_names[np.searchsorted(ML_RISK_THRESHOLDS, ml_probability, side='right')]
+        probability = ml_probability
+
+    # The ML score is the headline score when the model is used, as in /predict
+    result['fraud_probability'] = probability
+    result['is_fraud'] = probability > 0.5
+    return pd.DataFrame(result)
+
+
+def _init_worker(engine, backend):
+    global _model
+    if engine in ('ml', 'both'):
+        from ml_model import create_fraud_model
+        _model = create_fraud_model(backend)
+        if not _model.is_loaded:
+            raise RuntimeError("The ML model could not be loaded")
+
+
+def _score_task(args):
+    return score_chunk(*args)
+
+
+class ResultWriter:
+    """Appends result chunks to a CSV, JSON-lines or Parquet file (or stdout)"""
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.format = file_format(path, fmt) if path != '-' else (fmt or 'csv')
+        if self.format == 'parquet' and not PARQUET_AVAILABLE:
+            raise RuntimeError("Writing Parquet files requires pyarrow")
+        self.rows = 0
+        self._file = None
+        self._parquet = None
+
+    def write(self, frame):
+        if self.format == 'parquet':
+            table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            if self._file is None:
+                self._file = sys.stdout if self.path == '-' else open(self.path, 'w', newline='')
+            if self.format == 'jsonl':
+                # Older pandas versions leave out the newline after the last record
+                text = frame.to_json(orient='records', lines=True)
+                if text and not text.endswith('\n'):
+                    text += '\n'
+                self._file.write(text)
+            else:
+                frame.to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+
+
+def score_file(input_path, output_path, engine='rules', chunk_size=BULK_CHUNK_SIZE, workers=BULK_WORKERS,
+               input_format=None, output_format=None, id_column=None, backend=None):
+    """
+    Score input_path into output_path chunk by chunk, keeping input order.
+    Returns a summary dict.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}")
+    started = time.perf_counter()
+    writer = ResultWriter(output_path, output_format)
+    chunks = read_chunks(input_path, chunk_size, input_format)
+    rows = flagged = 0
+    offset = 0
+
+    def tasks():
+        nonlocal offset
+        for chunk in chunks:
+            yield chunk, engine, id_column, offset
+            offset += len(chunk)
+
+    try:
+        if workers <= 1:
+            _init_worker(engine, backend)
+            results = (_score_task(task) for task in tasks())
+            for result in results:
+                writer.write(result)
+                rows += len(result)
+                flagged += int(result['is_fraud'].sum())
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(engine, backend)) as pool:
+                # At most two chunks per worker are read ahead, so memory
+                # stays bounded however large the file is
+                pending = deque()
+                for task in tasks():
+                    pending.append(pool.submit(_score_task, task))
+                    if len(pending) >= 2 * workers:
+                        result = pending.popleft().result()
+                        writer.write(result)
+                        rows += len(result)
+                        flagged += int(result['is_fraud'].sum())
+                while pending:
+                    result = pending.popleft().result()
+                    writer.write(result)
+                    rows += len(result)
+                    flagged += int(result['is_fraud'].sum())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'flagged': flagged,
+        'engine': engine,
+        'workers': workers,
+        'seconds': round(elapsed, 2),
+        'rowsPerSecond': round(rows / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a reservations file in bulk')
+    parser.add_argument('input', help="CSV, Parquet or JSON-lines file ('-' for CSV on stdin)")
+    parser.add_argument('--output', '-o', default='-', help="output file (default: CSV on stdout)")
+    parser.add_argument('--engine', choices=ENGINES, default='rules')
+    parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE, help='rows per chunk')
+    parser.add_argument('--workers', type=int, default=BULK_WORKERS,
+                        help='scoring processes (1 scores in this process)')
+    parser.add_argument('--input-format', choices=('csv', 'parquet', 'jsonl'))
+    parser.add_argument('--output-format', choices=('csv', 'parquet', 'jsonl'))
+    parser.add_argument('--id-column', help='input column identifying each row (default: detected)')
+    parser.add_argument('--backend', default=None, help='ML backend (default: FRAUD_MODEL_BACKEND)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        summary = score_file(args.input, args.output, engine=args.engine, chunk_size=args.chunk_size,
+                             workers=args.workers, input_format=args.input_format,
+                             output_format=args.output_format, id_column=args.id_column, backend=args.backend)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(json.dumps({"error": "Bulk scoring failed", "details": str(e)}), file=sys.stderr)
+        return 1
+
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
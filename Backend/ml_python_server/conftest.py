@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+import os
+import pickle
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+from feature_schema import MODEL_SCHEMA
+from numpy_inference import NumpyDenseModel
+from ml_model import FraudDetectionModel
+
+
+def write_model_artifacts(directory, seed=0, broken=False):
+    """
+    Write a small random NumPy model, scaler and label encoders to
+    `directory` in the layout train_boat_fraud_model.py produces and return
+    their paths. A broken model scores NaN for every booking, so it fails
+    the canary check.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    width = MODEL_SCHEMA.width
+    layers = [(rng.normal(size=(width, 8)), rng.normal(size=8), 'relu'),
+              (rng.normal(size=(8, 1)), rng.normal(size=1), 'sigmoid')]
+    if broken:
+        layers[1] = (np.full((8, 1), np.nan), np.full(1, np.nan), 'sigmoid')
+    NumpyDenseModel(layers).save(os.path.join(directory, 'boat_fraud_detection_weights.npz'))
+    with open(os.path.join(directory, 'scaler.pkl'), 'wb') as f:
+        pickle.dump(StandardScaler().fit(rng.normal(size=(50, width))), f)
+    with open(os.path.join(directory, 'label_encoders.pkl'), 'wb') as f:
+        pickle.dump({}, f)
+    return {
+        "numpy_weights_path": os.path.join(directory, 'boat_fraud_detection_weights.npz'),
+        "scaler_path": os.path.join(directory, 'scaler.pkl'),
+        "label_encoders_path": os.path.join(directory, 'label_encoders.pkl'),
+        "feature_names_path": os.path.join(directory, 'feature_names.pkl')
+    }
+
+
+@pytest.fixture
+def write_model():
+    return write_model_artifacts
+
+
+@pytest.fixture
+def fraud_model(tmp_path):
+    """A loaded NumPy FraudDetectionModel built from random weights"""
+    model = FraudDetectionModel(backend='numpy', **write_model_artifacts(str(tmp_path / "model")))
+    assert model.is_loaded
+    return model
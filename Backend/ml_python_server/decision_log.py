@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Persistent log of scored fraud decisions, read by fraud_dashboard.py.
+
+The scoring servers call DECISION_LOG.record(booking, result) for every
+decision. Decisions are queued in memory and written to SQLite by a
+background thread in batches, so scoring never waits on the database. The
+same transaction updates per-day rollups (count, flagged, high risk, amount
+and a 20-bucket probability histogram), so the dashboard's totals and charts
+read a few rows per day instead of scanning every decision. The flagged
+table is served page by page from an index on (fraud_probability, decided_at),
+continuing after the last row of the previous page (keyset paging), so deep
+pages cost the same as the first.
+
+Logging is enabled by setting DECISION_LOG_PATH; otherwise record() does
+nothing.
+"""
+import os
+import time
+import queue
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Defaults (override with environment variables DECISION_LOG_PATH, DECISION_LOG_QUEUE_SIZE
+# and DECISION_LOG_BATCH_SIZE)
+DECISION_LOG_PATH = os.environ.get("DECISION_LOG_PATH") or None
+DECISION_LOG_QUEUE_SIZE = int(os.environ.get("DECISION_LOG_QUEUE_SIZE", 10000))
+DECISION_LOG_BATCH_SIZE = int(os.environ.get("DECISION_LOG_BATCH_SIZE", 500))
+
+# Probability histogram resolution of the daily rollups
+HISTOGRAM_BUCKETS = 20
+
+# Probability above which a decision counts as high risk on the dashboard
+HIGH_RISK_PROBABILITY = 0.7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    decided_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    booking_id TEXT,
+    user_id TEXT,
+    amount REAL NOT NULL,
+    fraud_probability REAL NOT NULL,
+    is_fraud INTEGER NOT NULL,
+    risk_level TEXT,
+    source TEXT,
+    model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS decisions_probability ON decisions (fraud_probability, decided_at);
+CREATE INDEX IF NOT EXISTS decisions_decided_at ON decisions (decided_at);
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    decisions INTEGER NOT NULL,
+    flagged INTEGER NOT NULL,
+    high_risk INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (day, bucket)
+);
+"""
+
+
+def booking_amount(booking):
+    """Booking value: totalAmount, or the room price times the number of nights"""
+    if booking.get('totalAmount') is not None:
+        return float(booking['totalAmount'])
+    nights = float(booking.get('no_of_week_nights') or 0) + float(booking.get('no_of_weekend_nights') or 0)
+    return float(booking.get('avg_price_per_room') or 0) * max(nights, 1)
+
+
+def probability_bucket(probability):
+    return min(max(int(probability * HISTOGRAM_BUCKETS), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def _first(booking, fields):
+    for field in fields:
+        value = booking.get(field)
+        if value is not None:
+            return str(value)
+    return None
+
+
+class DecisionLog:
+    """SQLite decision log with a background batch writer and daily rollups"""
+
+    def __init__(self, path=DECISION_LOG_PATH, queue_size=DECISION_LOG_QUEUE_SIZE,
+                 batch_size=DECISION_LOG_BATCH_SIZE, read_only=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.read_only = read_only
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_pid = None
+        self._reader = None
+        self._reader_pid = None
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _connect(self):
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+        return conn
+
+    # Writing
+
+    def record(self, booking, result, decided_at=None):
+        """Queue one decision for writing; never blocks (drops when the queue is full)"""
+        if self.path is None:
+            return False
+        decided_at = time.time() if decided_at is None else decided_at
+        try:
+            probability = float(result['fraud_probability'])
+            row = (
+                decided_at,
+                datetime.fromtimestamp(decided_at).strftime('%Y-%m-%d'),
+                _first(booking, ('bookingId', 'booking_id', 'Booking_ID')),
+                _first(booking, ('userId', 'user_id')),
+                booking_amount(booking),
+                probability,
+                int(bool(result.get('is_fraud', probability > 0.5))),
+                result.get('risk_level'),
+                result.get('source') or ('rules' if result.get('rule_based') else 'ml'),
+                result.get('modelVersion')
+            )
+        except (TypeError, ValueError) as e:
+            # A malformed amount must not fail the prediction that was already made
+            logger.warning(f"Decision not logged: {str(e)}")
+            return False
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _ensure_writer(self):
+        # Threads do not survive fork(), so each worker process starts its own
+        if self._writer_pid != os.getpid():
+            with self._lock:
+                if self._writer_pid != os.getpid():
+                    if self._writer_pid is not None:
+                        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                    self._writer = threading.Thread(target=self._write_loop, name="decision-log-writer",
+                                                    daemon=True)
+                    self._writer_pid = os.getpid()
+                    self._writer.start()
+                    atexit.register(self.flush, 5.0)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(conn, rows)
+                self.written += len(rows)
+            except sqlite3.Error as e:
+                logger.error(f"Could not write {len(rows)} decisions to {self.path}: {str(e)}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _write(self, conn, rows):
+        # Fold the batch into one rollup row per (day, bucket) first
+        rollup = {}
+        for row in rows:
+            day, amount, probability, is_fraud = row[1], row[4], row[5], row[6]
+            totals = rollup.setdefault((day, probability_bucket(probability)), [0, 0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += is_fraud
+            totals[2] += probability > HIGH_RISK_PROBABILITY
+            totals[3] += amount
+        with conn:
+            conn.executemany(
+                "INSERT INTO decisions (decided_at, day, booking_id, user_id, amount, fraud_probability, "
+                "is_fraud, risk_level, source, model_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT INTO daily_rollup (day, bucket, decisions, flagged, high_risk, amount) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(day, bucket) DO UPDATE SET "
+                "decisions = decisions + excluded.decisions, flagged = flagged + excluded.flagged, "
+                "high_risk = high_risk + excluded.high_risk, amount = amount + excluded.amount",
+                [(day, bucket, *totals) for (day, bucket), totals in rollup.items()])
+
+    def flush(self, timeout=None):
+        """Wait until every queued decision has been written"""
+        if self._writer_pid != os.getpid():
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return
+            time.sleep(0.01)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "written": self.written,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped
+        }
+
+    # Reading
+
+    def _read(self, sql, params=()):
+        # The dashboard runs each session's script in its own thread, and they share this connection
+        with self._lock:
+            if self._reader_pid != os.getpid():
+                self._reader = self._connect()
+                self._reader_pid = os.getpid()
+            return self._reader.execute(sql, params).fetchall()
+
+    def daily(self, since_day=None):
+        """Per-day totals from the rollups: [(day, decisions, flagged, high_risk, amount)]"""
+        return self._read(
+            "SELECT day, SUM(decisions), SUM(flagged), SUM(high_risk), SUM(amount) FROM daily_rollup "
+            "WHERE day >= ? GROUP BY day ORDER BY day", (since_day or '',))
+
+    def summary(self, since_day=None):
+        """Totals and the probability histogram since `since_day` (YYYY-MM-DD), from the rollups"""
+        histogram = [0] * HISTOGRAM_BUCKETS
+        totals = {"decisions": 0, "flagged": 0, "highRisk": 0, "amount": 0.0}
+        for bucket, decisions, flagged, high_risk, amount in self._read(
+                "SELECT bucket, SUM(decisions), SUM(flagged), SUM(high_risk), SUM(amount) FROM daily_rollup "
+                "WHERE day >= ? GROUP BY bucket", (since_day or '',)):
+            histogram[bucket] = decisions
+            totals["decisions"] += decisions
+            totals["flagged"] += flagged
+            totals["highRisk"] += high_risk
+            totals["amount"] += amount
+        totals["histogram"] = histogram
+        return totals
+
+    def count_at_least(self, min_probability, since=None):
+        """Decisions with fraud_probability >= min_probability decided at or after `since` (epoch seconds)"""
+        return self._read(
+            "SELECT COUNT(*) FROM decisions WHERE fraud_probability >= ? AND decided_at >= ?",
+            (min_probability, since or 0))[0][0]
+
+    def page_at_least(self, min_probability, since=None, limit=50, after=None):
+        """
+        One page of those decisions, riskiest first. Pass page_cursor() of the
+        last row of a page as `after` to get the page that follows it.
+        """
+        columns = ('id', 'booking_id', 'user_id', 'decided_at', 'amount', 'fraud_probability', 'is_fraud',
+                   'risk_level', 'source', 'model_version')
+        sql = f"SELECT {', '.join(columns)} FROM decisions WHERE fraud_probability >= ? AND decided_at >= ?"
+        params = [min_probability, since or 0]
+        if after is not None:
+            # Seeks the index to the cursor instead of stepping over every earlier row like OFFSET
+            sql += " AND (fraud_probability, decided_at, id) < (?, ?, ?)"
+            params.extend(after)
+        rows = self._read(sql + " ORDER BY fraud_probability DESC, decided_at DESC, id DESC LIMIT ?",
+                          params + [limit])
+        return [dict(zip(columns, row)) for row in rows]
+
+
+def page_cursor(row):
+    """Position of a row returned by page_at_least(), to continue paging after it"""
+    return (row['fraud_probability'], row['decided_at'], row['id'])
+
+
+# Shared log used by the scoring servers
+DECISION_LOG = DecisionLog()
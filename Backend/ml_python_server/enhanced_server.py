@@ -1,54 +1,139 @@
 #!/usr/bin/env python3
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
-import json
 import os
 import traceback
 import logging
 from datetime import datetime
 import random
 from predict_rules import predict_fraud
-from ml_model import FraudDetectionModel
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("fraud_detection_server.log"),
-        logging.StreamHandler()
-    ]
-)
+from model_manager import ModelManager, RULES_VERSION
+from ml_model import default_model_dir
+from request_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+from metrics import register_metrics, time_stage, count_prediction
+from logging_setup import configure_logging, request_logger, logging_stats
+from behavior_store import BehaviorStore, UserBehavior
+from velocity import VelocityCounter
+from decision_log import DECISION_LOG
+from audit_log import AUDIT_LOG
+from feature_schema import MODEL_SCHEMA, RULES_SCHEMA
+
+# Configure logging (written by a background thread; per-request lines are sampled)
+configure_logging("fraud_detection_server.log")
 logger = logging.getLogger("fraud_detection_server")
+request_log = request_logger("fraud_detection_server")
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+register_metrics(app)  # Request metrics and the /metrics endpoint
+
+# Load the ML model in the background; /predict serves rule-based
+# results until it is ready
+model_manager = ModelManager()
+model_manager.start()
+
+# Optionally reload automatically when new artifacts are written to the model directory
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+if MODEL_WATCH_INTERVAL > 0:
+    model_manager.start_watching(os.environ.get("MODEL_WATCH_DIR", default_model_dir()), MODEL_WATCH_INTERVAL)
+
+# Token required by the admin endpoints (admin endpoints are disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Artifact paths accepted by /admin/reload-model
+RELOAD_PATH_FIELDS = ['model_path', 'scaler_path', 'label_encoders_path', 'feature_names_path',
+                      'numpy_weights_path', 'model_dir', 'backend']
+
+# Upper bound on bookings accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 1000))
+
+# Coalesces concurrent /predict requests into one forward pass
+# (configured with BATCH_MAX_LATENCY_MS and BATCH_MAX_SIZE)
+batcher = MicroBatcher()
+
+# Repeat /predict calls with identical features are answered from this cache
+# (PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL); cleared whenever the model changes
+prediction_cache = PredictionCache()
+model_manager.add_swap_listener(prediction_cache.on_model_swap)
+
+# Per-user aggregates fed by /events/*, so the pattern endpoints can score a
+# userId without the caller sending its history (BEHAVIOR_DB_PATH persists them)
+behavior_store = BehaviorStore()
 
-# Initialize ML model
-ml_model = FraudDetectionModel()
+# Sliding-window booking/cancellation counts per user, boat and phone, also fed
+# by /events/*; /predict derives its velocity features from them
+velocity = VelocityCounter()
 
-# Check if model is successfully loaded
-USE_ML = ml_model.is_loaded
-if USE_ML:
-    logger.info("Machine learning model loaded successfully - using ML for fraud detection")
-else:
-    logger.warning("Machine learning model could not be loaded - using rule-based detection")
+@app.after_request
+def add_model_version_header(response):
+    """Report the model version that produced every response"""
+    response.headers['X-Model-Version'] = g.get('model_version', model_manager.version)
+    return response
 
 @app.route('/status', methods=['GET'])
 def get_status():
     """Get status of the fraud detection service"""
     now = datetime.now().isoformat()
+    use_ml = model_manager.is_ready
     return jsonify({
         "status": "active",
-        "modelLoaded": USE_ML,
+        "live": True,
+        "ready": model_manager.loading_finished,
+        "modelLoaded": use_ml,
         "featuresAvailable": True,
-        "version": "1.2.0" + (" (ML Model)" if USE_ML else " (Rule-Based)"),
+        "version": "1.2.0" + (" (ML Model)" if use_ml else " (Rule-Based)"),
         "boatSpecific": True,
         "timestamp": now,
-        "ml": USE_ML
+        "ml": use_ml,
+        "model": model_manager.status(),
+        "batching": batcher.stats(),
+        "predictionCache": prediction_cache.stats(),
+        "logging": logging_stats(),
+        "behaviorStore": behavior_store.stats(),
+        "velocity": velocity.stats(),
+        "decisionLog": DECISION_LOG.stats(),
+        "auditLog": AUDIT_LOG.stats()
     })
 
+@app.route('/health/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and answering requests"""
+    return jsonify({"live": True})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: model loading has finished (ML active or rule-based fallback)"""
+    ready = model_manager.loading_finished
+    return jsonify({
+        "ready": ready,
+        "modelLoaded": model_manager.is_ready,
+        "state": model_manager.state
+    }), 200 if ready else 503
+
+@app.route('/admin/reload-model', methods=['POST'])
+def reload_model():
+    """Load a new model set next to the active one and swap it in after a canary check"""
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.json if request.is_json else {}
+    if not isinstance(data, dict):
+        return jsonify({
+            "error": "Request body must be a JSON object"
+        }), 400
+    unknown_fields = [field for field in data if field not in RELOAD_PATH_FIELDS]
+    if unknown_fields:
+        return jsonify({
+            "error": "Unknown fields",
+            "details": f"Supported fields are: {', '.join(RELOAD_PATH_FIELDS)}"
+        }), 400
+
+    logger.info(f"Model reload requested with {data or 'default paths'}")
+    result = model_manager.reload(**data)
+    return jsonify(result), 200 if result["success"] else 422
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Predict fraud based on boat reservation data"""
@@ -62,39 +147,59 @@ def predict():
         
         # Get booking data from request
         booking_data = request.json
-        logger.info(f"Received prediction request: {json.dumps(booking_data)[:200]}...")
+        request_log.info("Received prediction request with %d fields", len(booking_data))
         
         # Validate required fields
-        required_fields = ['lead_time', 'no_of_adults']
-        missing_fields = [field for field in required_fields if field not in booking_data]
+        with time_stage('validate'):
+            required_fields = ['lead_time', 'no_of_adults']
+            missing_fields = [field for field in required_fields if field not in booking_data]
         
         if missing_fields:
-            logger.warning(f"Missing required fields: {missing_fields}")
+            logger.warning("Missing required fields: %s", missing_fields)
             return jsonify({
                 "error": "Missing required fields",
                 "details": f"The following fields are required: {', '.join(missing_fields)}"
             }), 400
         
+        # Fill in same-day bookings and recent cancellations from the counters
+        with time_stage('velocity'):
+            velocity.fill_features(booking_data)
+        
         # Try ML prediction first if model is loaded
         ml_result = None
-        if USE_ML:
-            ml_result = ml_model.predict(booking_data)
+        ml_model = model_manager.get_model()
+        if ml_model is not None:
+            cache_key = prediction_cache.key(ml_model, booking_data)
+            ml_result = prediction_cache.get(cache_key)
+            if ml_result is None:
+                ml_result = batcher.predict(ml_model, booking_data)
+                prediction_cache.put(cache_key, ml_result)
         
         # Use rule-based as fallback or if ML fails
         if ml_result is None:
-            result = predict_fraud(booking_data)
-            logger.info(f"Rule-based prediction: Fraud probability {result['fraud_probability']:.2f}, "
-                      f"Risk level: {result['risk_level']}")
+            with time_stage('rules'):
+                result = predict_fraud(booking_data)
+            count_prediction('rules')
+            request_log.info("Rule-based prediction: Fraud probability %.2f, Risk level: %s",
+                             result['fraud_probability'], result['risk_level'])
         else:
             result = ml_result
-            logger.info(f"ML prediction: Fraud probability {result['fraud_probability']:.2f}, "
-                      f"Risk level: {result['risk_level']}")
+            count_prediction('ml')
+            request_log.info("ML prediction: Fraud probability %.2f, Risk level: %s",
+                             result['fraud_probability'], result['risk_level'])
         
-        # Add timestamp for tracking
+        # Add timestamp and model version for tracking
         result["timestamp"] = datetime.now().isoformat()
+        result["modelVersion"] = ml_model.version if ml_result is not None else RULES_VERSION
+        g.model_version = result["modelVersion"]
+        DECISION_LOG.record(booking_data, result)
+        AUDIT_LOG.record(booking_data, result,
+                         getattr(ml_model, 'schema', MODEL_SCHEMA) if ml_result is not None else RULES_SCHEMA)
         
         # Return prediction result
-        return jsonify(result)
+        with time_stage('serialize'):
+            response = jsonify(result)
+        return response
     
     except Exception as e:
         logger.error(f"Error in prediction: {str(e)}\n{traceback.format_exc()}")
@@ -103,6 +208,153 @@ def predict():
             "details": str(e)
         }), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict fraud for many boat reservations in a single request"""
+    try:
+        if not request.is_json:
+            logger.warning("Request contains no JSON data")
+            return jsonify({
+                "error": "Request must contain JSON data"
+            }), 400
+
+        # Accept either a bare array or {"bookings": [...]}
+        data = request.json
+        bookings = data.get('bookings') if isinstance(data, dict) else data
+
+        if not isinstance(bookings, list):
+            return jsonify({
+                "error": "Request must contain an array of bookings"
+            }), 400
+
+        if len(bookings) > MAX_BATCH_SIZE:
+            return jsonify({
+                "error": "Batch too large",
+                "details": f"At most {MAX_BATCH_SIZE} bookings can be scored per request"
+            }), 413
+
+        request_log.info("Received batch prediction request with %d bookings", len(bookings))
+
+        results = [None] * len(bookings)
+
+        # Validate each booking, recording per-item errors
+        required_fields = ['lead_time', 'no_of_adults']
+        valid_positions = []
+        for index, booking_data in enumerate(bookings):
+            if not isinstance(booking_data, dict):
+                results[index] = {
+                    "index": index,
+                    "error": "Booking must be a JSON object"
+                }
+                continue
+
+            missing_fields = [field for field in required_fields if field not in booking_data]
+            if missing_fields:
+                results[index] = {
+                    "index": index,
+                    "error": "Missing required fields",
+                    "details": f"The following fields are required: {', '.join(missing_fields)}"
+                }
+                continue
+
+            velocity.fill_features(booking_data)
+            valid_positions.append(index)
+
+        # Score all valid bookings with a single ML forward pass
+        ml_results = [None] * len(valid_positions)
+        ml_model = model_manager.get_model()
+        if ml_model is not None and valid_positions:
+            ml_results = ml_model.predict_batch([bookings[index] for index in valid_positions])
+            g.model_version = ml_model.version
+
+        # Use rule-based detection for anything the model could not score
+        timestamp = datetime.now().isoformat()
+        ml_count = 0
+        rules_count = 0
+        for index, ml_result in zip(valid_positions, ml_results):
+            if ml_result is None:
+                try:
+                    result = predict_fraud(bookings[index])
+                except Exception as e:
+                    results[index] = {
+                        "index": index,
+                        "error": "Could not score booking",
+                        "details": str(e)
+                    }
+                    continue
+                rules_count += 1
+                result["modelVersion"] = RULES_VERSION
+            else:
+                result = ml_result
+                ml_count += 1
+                result["modelVersion"] = ml_model.version
+
+            result["index"] = index
+            result["timestamp"] = timestamp
+            results[index] = result
+            DECISION_LOG.record(bookings[index], result)
+            AUDIT_LOG.record(bookings[index], result,
+                             getattr(ml_model, 'schema', MODEL_SCHEMA) if ml_result is not None else RULES_SCHEMA)
+
+        count_prediction('ml', ml_count)
+        count_prediction('rules', rules_count)
+        error_count = sum(1 for result in results if "error" in result)
+        request_log.info("Batch prediction complete: %d ML, %d rule-based, %d errors",
+                         ml_count, rules_count, error_count)
+
+        return jsonify({
+            "results": results,
+            "count": len(results),
+            "errors": error_count,
+            "modelVersion": g.get('model_version', RULES_VERSION),
+            "timestamp": timestamp
+        })
+
+    except Exception as e:
+        logger.error(f"Error in batch prediction: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({
+            "error": "Server error during batch prediction",
+            "details": str(e)
+        }), 500
+
+def _record_event(record, kind):
+    """Add a booking or cancellation event to the behavior store and velocity counters"""
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+
+    event = request.json
+    user_id = event.get('userId')
+    if not user_id:
+        return jsonify({"error": "User ID is required"}), 400
+
+    try:
+        summary = record(user_id, event)
+        velocity.record(kind, event)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "error": f"Invalid {kind} event",
+            "details": str(e)
+        }), 400
+    return jsonify({"userId": user_id, "behavior": summary})
+
+@app.route('/events/booking', methods=['POST'])
+def booking_event():
+    """Record a booking ({userId, bookingDate, leadTime, boatId}) in the behavior store"""
+    return _record_event(behavior_store.record_booking, "booking")
+
+@app.route('/events/cancellation', methods=['POST'])
+def cancellation_event():
+    """Record a cancellation ({userId, timeBeforeDeparture, timeSinceBooking, bookingDate, originalBookingData})"""
+    return _record_event(behavior_store.record_cancellation, "cancellation")
+
+@app.route('/events/users/<user_id>', methods=['GET'])
+def user_behavior(user_id):
+    """The aggregates the behavior store holds for a user"""
+    summary = behavior_store.summary(user_id)
+    if summary is None:
+        return jsonify({"error": "Unknown user", "userId": user_id}), 404
+    return jsonify({"userId": user_id, "behavior": summary})
+
 @app.route('/compare-boat-patterns', methods=['POST'])
 def compare_patterns():
     """Compare booking patterns with typical boat rental patterns"""
@@ -116,14 +368,23 @@ def compare_patterns():
         if not user_id:
             return jsonify({"error": "User ID is required"}), 400
         
-        logger.info(f"Comparing patterns for user: {user_id}")
+        request_log.info("Comparing patterns for user: %s", user_id)
         
         # Get user data if provided
         user_profile = data.get('userProfile', {})
         cancellations = data.get('cancellations', [])
         
+        # Summarize the cancellations sent with the request, or else the
+        # user's aggregates in the behavior store
+        if cancellations:
+            behavior = UserBehavior.from_bookings(cancellations=cancellations).summary()
+            stored = {}
+        else:
+            behavior = behavior_store.summary(user_id) or {}
+            stored = behavior
+        
         # Analyze cancellation patterns
-        if len(cancellations) == 0:
+        if not behavior.get('cancellationCount'):
             return jsonify({
                 "similarityScore": 0,
                 "message": "No cancellation history found",
@@ -132,24 +393,19 @@ def compare_patterns():
             })
         
         # Extract useful metrics from cancellations
-        lead_times = [c.get('timeBeforeDeparture', 0) for c in cancellations]
-        avg_lead_time = sum(lead_times) / len(lead_times) if lead_times else 0
-        
-        booking_to_cancel_times = [c.get('timeSinceBooking', 0) for c in cancellations]
-        avg_booking_to_cancel = sum(booking_to_cancel_times) / len(booking_to_cancel_times) if booking_to_cancel_times else 0
+        avg_lead_time = behavior['avgTimeBeforeDeparture']
+        avg_booking_to_cancel = behavior['avgTimeSinceBooking']
         
         # Get cancellation ratio from profile or calculate
-        cancellation_ratio = user_profile.get('cancellationRatio', 0)
+        cancellation_ratio = user_profile.get('cancellationRatio', stored.get('cancellationRatio', 0))
         
         # Get multiple bookings data if available
-        multiple_bookings = user_profile.get('multipleBookingsCount', 0)
-        multiple_bookings_canceled = user_profile.get('multipleBookingsCanceled', 0)
+        multiple_bookings = user_profile.get('multipleBookingsCount', stored.get('multipleBookings', 0))
+        multiple_bookings_canceled = user_profile.get('multipleBookingsCanceled', stored.get('multipleBookingsCanceled', 0))
         
         # Extract passenger data
-        adults = [c.get('originalBookingData', {}).get('adults', 0) for c in cancellations]
-        children = [c.get('originalBookingData', {}).get('children', 0) for c in cancellations]
-        avg_adults = sum(adults) / len(adults) if adults else 0
-        avg_children = sum(children) / len(children) if children else 0
+        avg_adults = behavior['avgAdults']
+        avg_children = behavior['avgChildren']
         
         # Calculate ratios and patterns
         cancellation_speed_ratio = 0
@@ -219,7 +475,8 @@ def compare_patterns():
             "isSuspicious": is_suspicious,
             "message": message,
             "recommendation": recommendation,
-            "source": "ml" if USE_ML else "rule-based",
+            "source": "ml" if model_manager.is_ready else "rule-based",
+            "modelVersion": model_manager.version,
             "dataPoints": {
                 "user": {
                     "avgLeadTime": round(avg_lead_time, 1),
@@ -264,7 +521,17 @@ def analyze_multiple_bookings():
         if not user_id:
             return jsonify({"error": "User ID is required"}), 400
         
-        if not bookings or len(bookings) < 2:
+        # Aggregate the bookings sent with the request, or else use the
+        # user's aggregates in the behavior store
+        if bookings:
+            behavior = UserBehavior.from_bookings(bookings).summary()
+            stored = {}
+        else:
+            behavior = behavior_store.summary(user_id) or {"bookingCount": 0}
+            stored = behavior
+        booking_count = behavior['bookingCount']
+        
+        if booking_count < 2:
             return jsonify({
                 "riskLevel": "Low Risk",
                 "fraudProbability": 0.1,
@@ -272,24 +539,15 @@ def analyze_multiple_bookings():
                 "factors": []
             })
         
-        logger.info(f"Analyzing multiple bookings for user: {user_id}, Count: {len(bookings)}")
+        request_log.info("Analyzing multiple bookings for user: %s, Count: %d", user_id, booking_count)
         
         # Extract key features
-        booking_dates = [b.get('bookingDate') for b in bookings]
-        lead_times = [b.get('leadTime', 0) for b in bookings]
-        boat_ids = [b.get('boatId') for b in bookings]
-        unique_boat_ids = len(set(boat_ids))
+        unique_boat_ids = behavior['uniqueBoatCount']
         
         # Time between bookings
-        time_between_bookings = []
-        if len(booking_dates) >= 2:
-            dates = sorted([datetime.fromisoformat(d.replace('Z', '+00:00')) if d else datetime.now() 
-                           for d in booking_dates if d])
-            for i in range(1, len(dates)):
-                diff_hours = (dates[i] - dates[i-1]).total_seconds() / 3600
-                time_between_bookings.append(diff_hours)
-        
-        avg_time_between = sum(time_between_bookings) / len(time_between_bookings) if time_between_bookings else 24
+        avg_time_between = behavior['avgTimeBetweenBookings']
+        if avg_time_between is None:
+            avg_time_between = 24
         
         # Analyze risk factors
         risk_factors = []
@@ -304,9 +562,8 @@ def analyze_multiple_bookings():
             fraud_probability += 0.2
         
         # 2. Very similar lead times (potential automated booking)
-        if len(lead_times) >= 2:
-            lead_time_std = (sum((x - (sum(lead_times)/len(lead_times)))**2 for x in lead_times) / len(lead_times))**0.5
-            if lead_time_std < 1 and sum(lead_times)/len(lead_times) < 7:
+        if booking_count >= 2:
+            if behavior['leadTimeStd'] < 1 and behavior['leadTimeMean'] < 7:
                 risk_factors.append("Multiple bookings with nearly identical short lead times - potential automated fraud")
                 fraud_probability += 0.3
         
@@ -316,8 +573,8 @@ def analyze_multiple_bookings():
             fraud_probability += min(0.1 * unique_boat_ids, 0.4)
         
         # 4. Previous cancellation history
-        cancellation_ratio = data.get('cancellationRatio', 0)
-        if cancellation_ratio > 0.5 and len(bookings) > 2:
+        cancellation_ratio = data.get('cancellationRatio', stored.get('cancellationRatio', 0))
+        if cancellation_ratio > 0.5 and booking_count > 2:
             risk_factors.append(f"High cancellation ratio ({cancellation_ratio:.2f}) combined with multiple bookings")
             fraud_probability += 0.2
         
@@ -342,13 +599,14 @@ def analyze_multiple_bookings():
         return jsonify({
             "riskLevel": risk_level,
             "fraudProbability": round(fraud_probability, 2),
-            "message": f"Analysis of {len(bookings)} bookings shows {risk_level.lower()} of fraud",
+            "message": f"Analysis of {booking_count} bookings shows {risk_level.lower()} of fraud",
             "factors": risk_factors,
             "recommendation": recommendation,
+            "modelVersion": model_manager.version,
             "details": {
                 "uniqueBoatCount": unique_boat_ids,
                 "avgTimeBetweenBookings": round(avg_time_between, 1),
-                "bookingCount": len(bookings)
+                "bookingCount": booking_count
             }
         })
     
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Versioned feature schemas shared by the ML model, the training script and
+the rule engine.
+
+A FeatureSchema is the ordered list of feature names for one consumer plus
+how to read them from a /predict request body. schema.record(data) returns
+a FeatureRecord: a __slots__ object holding the values in one array of
+doubles, indexed by name like a dict. schema.matrix(records) stacks records
+into a contiguous float64 array for the scaler and model.
+
+    from feature_schema import MODEL_SCHEMA
+    record = MODEL_SCHEMA.record(booking)
+    record['cancellation_ratio']
+    rows = MODEL_SCHEMA.matrix([record])
+"""
+import hashlib
+from array import array
+from operator import itemgetter
+import numpy as np
+
+SCHEMAS = {}
+
+
+def yes_no(value):
+    return 1.0 if value == 'Yes' else 0.0
+
+
+def number_or_zero(value):
+    return float(value or 0)
+
+
+def _float_column(values, default):
+    column = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(column), 0.0 if default is None else float(default), column)
+
+
+def _yes_no_column(values, default):
+    return (np.asarray(values, dtype=object) == 'Yes') * 1.0
+
+
+# Column-at-a-time equivalents of the converters, used by frame_matrix()
+COLUMN_CONVERTERS = {
+    float: _float_column,
+    number_or_zero: _float_column,
+    yes_no: _yes_no_column
+}
+
+
+class FeatureRecord:
+    """The feature values of one booking, stored as an array of doubles"""
+
+    __slots__ = ('schema', 'values')
+
+    def __init__(self, schema, values):
+        self.schema = schema
+        self.values = values
+
+    def __getitem__(self, name):
+        return self.values[self.schema.index[name]]
+
+    def __setitem__(self, name, value):
+        self.values[self.schema.index[name]] = value
+
+    def __contains__(self, name):
+        return name in self.schema.index
+
+    def __len__(self):
+        return self.schema.width
+
+    def __iter__(self):
+        return iter(self.schema.names)
+
+    def get(self, name, default=None):
+        position = self.schema.index.get(name)
+        return default if position is None else self.values[position]
+
+    def keys(self):
+        return self.schema.names
+
+    def items(self):
+        return zip(self.schema.names, self.values)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def as_row(self):
+        """(1, width) float64 view of the values (no copy)"""
+        return np.frombuffer(self.values, dtype=np.float64).reshape(1, -1)
+
+    def digest(self):
+        """Hash of the schema and values; equal features give equal digests"""
+        hasher = hashlib.blake2b(self.schema.key.encode(), digest_size=16)
+        hasher.update(self.values.tobytes())
+        return hasher.hexdigest()
+
+    def __repr__(self):
+        return f"FeatureRecord({self.schema.key}, {self.to_dict()})"
+
+
+class FeatureSchema:
+    """
+    Ordered feature names of one version of a consumer's input. `inputs`
+    maps request fields to (default, converter), and `aliases` names a
+    fallback field read when a field is missing or null. The remaining names
+    are filled in by `derive`, which is written with arithmetic only so it
+    works on a FeatureRecord, a DataFrame or a dict of NumPy columns alike.
+    """
+
+    def __init__(self, name, version, names, inputs=None, derive=None, aliases=None):
+        self.name = name
+        self.version = version
+        self.key = f"{name}/v{version}"
+        self.names = tuple(names)
+        self.index = {feature: i for i, feature in enumerate(self.names)}
+        self.width = len(self.names)
+        inputs = inputs or {}
+        self.defaults = {field: default for field, (default, convert) in inputs.items()}
+        self.aliases = dict(aliases or {})
+        self._readers = tuple((field, default, convert, self.aliases.get(field))
+                              for field, (default, convert) in inputs.items())
+        self._derive = derive
+        self._ordered = itemgetter(*self.names) if self.width > 1 else (lambda features: (features[self.names[0]],))
+        self.read = self._compile_reader()
+
+    def _compile_reader(self):
+        """
+        Generate read(data), which returns the feature values of one request
+        body as a tuple in schema order. Like namedtuple and dataclasses, the
+        code is generated so every field is read straight into a local; a
+        generic loop over the fields costs about twice as much per request.
+        """
+        namespace = {'_derive': self._derive, '_ordered': self._ordered}
+        lines = ['def read(data):', '    get = data.get']
+        local = {}
+        for i, (field, default, convert, alias) in enumerate(self._readers):
+            namespace[f'_default{i}'] = default
+            namespace[f'_convert{i}'] = convert
+            lines.append(f'    v{i} = get({field!r}, _default{i})')
+            if alias is not None:
+                lines.append(f'    if v{i} is None:')
+                lines.append(f'        v{i} = get({alias!r}, _default{i})')
+            lines.append(f'    v{i} = _convert{i}(v{i})')
+            local[field] = f'v{i}'
+        values = [local.get(name, '0.0') for name in self.names]
+        if self._derive is None:
+            lines.append(f"    return ({', '.join(values)},)")
+        else:
+            # Derived features are computed on a dict, then put in order
+            items = ', '.join(f'{name!r}: {value}' for name, value in zip(self.names, values))
+            lines.append(f'    features = {{{items}}}')
+            lines.append('    _derive(features)')
+            lines.append('    return _ordered(features)')
+        exec('\n'.join(lines), namespace)
+        return namespace['read']
+
+    def record(self, data):
+        """Read the features of one request body into a FeatureRecord"""
+        return FeatureRecord(self, array('d', self.read(data)))
+
+    def derive(self, frame):
+        """Add the derived features to a DataFrame or dict of columns, in place"""
+        if self._derive is not None:
+            self._derive(frame)
+        return frame
+
+    def positions(self, names):
+        """Column indexes of `names`; raises KeyError for names not in the schema"""
+        return np.array([self.index[name] for name in names], dtype=np.intp)
+
+    def matrix(self, records, columns=None):
+        """
+        Stack records into a C-contiguous (n, width) float64 array. Pass
+        `columns` (from positions()) to select and reorder the columns.
+        """
+        # Appending the packed arrays is a memcpy per record
+        buffer = array('d')
+        for record in records:
+            buffer.extend(record.values)
+        rows = np.frombuffer(buffer, dtype=np.float64).reshape(len(records), self.width)
+        if columns is not None:
+            rows = np.ascontiguousarray(rows[:, columns])
+        return rows
+
+    def frame_matrix(self, frame, columns=None):
+        """
+        Column-wise equivalent of matrix([record(row) ...]) for a DataFrame
+        (such as a chunk of a CSV file). Missing columns and NaNs get the
+        field defaults.
+        """
+        count = len(frame)
+        features = {}
+        for field, default, convert, alias in self._readers:
+            to_column = COLUMN_CONVERTERS[convert]
+            if field in frame:
+                values = to_column(frame[field], default)
+                if alias is not None and alias in frame:
+                    missing = np.asarray(frame[field].isna())
+                    values = np.where(missing, to_column(frame[alias], default), values)
+            elif alias is not None and alias in frame:
+                values = to_column(frame[alias], default)
+            else:
+                values = np.full(count, convert(default))
+            features[field] = values
+        self.derive(features)
+
+        rows = np.zeros((count, self.width), dtype=np.float64)
+        for i, name in enumerate(self.names):
+            if name in features:
+                rows[:, i] = features[name]
+        if columns is not None:
+            rows = np.ascontiguousarray(rows[:, columns])
+        return rows
+
+    def __repr__(self):
+        return f"FeatureSchema({self.key}, {len(self.names)} features)"
+
+
+def register_schema(schema):
+    SCHEMAS[(schema.name, schema.version)] = schema
+    return schema
+
+
+def get_schema(name, version=None):
+    """A registered schema; the latest version when `version` is None"""
+    if version is None:
+        versions = [v for (schema_name, v) in SCHEMAS if schema_name == name]
+        if not versions:
+            raise KeyError(f"No feature schema named {name!r}")
+        version = max(versions)
+    return SCHEMAS[(name, version)]
+
+
+def _derive_model_v1(f):
+    cancellations = f['no_of_previous_cancellations']
+    history = cancellations + f['no_of_previous_bookings_not_canceled']
+    f['cancellation_ratio'] = (history > 0) * cancellations / (history + 0.1)
+    f['adult_child_ratio'] = f['no_of_adults'] / (f['no_of_children'] + 0.1)
+    f['very_short_lead'] = (f['lead_time'] < 2) * 1.0
+    price_per_person = f['avg_price_per_room'] / (f['no_of_adults'] + f['no_of_children'] + 0.1)
+    f['suspicious_price'] = (price_per_person < 25) * 1.0
+
+
+# Inputs of the boat fraud model (train_boat_fraud_model.py, ml_model.py)
+MODEL_SCHEMA = register_schema(FeatureSchema(
+    'model', 1,
+    names=[
+        'no_of_adults', 'no_of_children', 'lead_time',
+        'no_of_previous_cancellations', 'no_of_previous_bookings_not_canceled',
+        'repeated_guest', 'avg_price_per_room', 'no_of_special_requests',
+        'cancellation_ratio', 'adult_child_ratio', 'very_short_lead',
+        'suspicious_price', 'multiple_bookings_same_day'
+    ],
+    inputs={
+        'no_of_adults': (1, float),
+        'no_of_children': (0, float),
+        'lead_time': (0, float),
+        'no_of_previous_cancellations': (0, float),
+        'no_of_previous_bookings_not_canceled': (0, float),
+        'repeated_guest': ('No', yes_no),
+        'avg_price_per_room': (100, float),
+        'no_of_special_requests': (0, float),
+        'multiple_bookings_same_day': (0, float)
+    },
+    derive=_derive_model_v1
+))
+
+# Inputs of the rule engine (predict_rules.py, predict_rules_vectorized.py)
+RULES_SCHEMA = register_schema(FeatureSchema(
+    'rules', 1,
+    names=[
+        'lead_time', 'no_of_previous_cancellations', 'avg_price_per_room',
+        'no_of_adults', 'no_of_children', 'repeated_guest',
+        'no_of_weekend_nights', 'no_of_week_nights', 'required_car_parking_space',
+        'no_of_special_requests', 'no_of_booking_changes',
+        'no_of_previous_bookings_not_canceled', 'multiple_bookings_same_day',
+        'booking_to_departure_ratio'
+    ],
+    inputs={
+        'lead_time': (0, float),
+        'no_of_previous_cancellations': (0, float),
+        'avg_price_per_room': (0, float),
+        'no_of_adults': (0, float),
+        'no_of_children': (0, float),
+        'repeated_guest': ('No', yes_no),
+        'no_of_weekend_nights': (0, float),
+        'no_of_week_nights': (0, float),
+        'required_car_parking_space': (0, float),
+        'no_of_special_requests': (0, float),
+        'no_of_booking_changes': (0, float),
+        'no_of_previous_bookings_not_canceled': (0, float),
+        'multiple_bookings_same_day': (0, float),
+        'booking_to_departure_ratio': (1.0, float)
+    }
+))
+
+# Columns of the hotel reservation model served by fraud_detection_server.py.
+# Its rows are built from booking documents by booking_features.py.
+RESERVATION_SCHEMA = register_schema(FeatureSchema(
+    'reservation', 1,
+    names=[
+        'no_of_adults', 'no_of_children', 'no_of_weekend_nights', 'no_of_week_nights',
+        'type_of_meal_plan', 'required_car_parking_space', 'room_type_reserved',
+        'lead_time', 'arrival_year', 'arrival_month', 'arrival_date',
+        'market_segment_type', 'repeated_guest', 'no_of_previous_cancellations',
+        'no_of_previous_bookings_not_canceled', 'avg_price_per_room',
+        'no_of_special_requests'
+    ]
+))
+
+# Inputs of the TF.js model trained by Backend/scripts/trainFraudModel.js
+# (tfjs_model.py), in feature_stats.json order
+_TFJS_NAMES = (
+    'leadTime', 'cancellationRatio', 'timeSinceBooking', 'timeBeforeDeparture',
+    'adults', 'children', 'totalAmount', 'cancellationsLast24Hours',
+    'totalCancellations', 'totalBookings', 'averageTimeBetweenCancellations',
+    'distinctBoatsCancelled', 'averageLeadTime'
+)
+TFJS_SCHEMA = register_schema(FeatureSchema(
+    'tfjs', 1,
+    names=_TFJS_NAMES,
+    inputs={name: (None, number_or_zero) for name in _TFJS_NAMES},
+    # Booking fields accepted as fallbacks for the Node feature names
+    aliases={
+        'leadTime': 'lead_time',
+        'adults': 'no_of_adults',
+        'children': 'no_of_children',
+        'totalCancellations': 'no_of_previous_cancellations'
+    }
+))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Non-blocking logging for the fraud detection servers.
+
+configure_logging() routes every record through a bounded in-memory queue
+to a background QueueListener thread, which formats the record and writes
+it to the log file and stdout. Request threads only append to the queue.
+Per-request INFO lines go through request_logger(), which keeps a sample of
+them (LOG_SAMPLE_RATE). Warnings and errors are always kept.
+"""
+import os
+import json
+import queue
+import atexit
+import random
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Defaults (override with environment variables)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # "text" or "json"
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 0.1))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with extra={"fields": {...}} are included"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a random `rate` fraction of records below WARNING"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller. Records are passed to the
+    listener as they are, so the message is only formatted in the listener
+    thread; when the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener runs in this process, so nothing needs to be pickled
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(log_file=None, level=LOG_LEVEL, fmt=LOG_FORMAT, queue_size=LOG_QUEUE_SIZE):
+    """Replace the root handlers with a queue drained by a background listener"""
+    global _handler, _listener
+    if _listener is not None:
+        return _handler
+
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    _listener = QueueListener(_handler.queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+    _listener.start()
+    atexit.register(stop_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_in_child)
+    return _handler
+
+
+def _restart_in_child():
+    # The listener thread does not survive fork(), and the old queue's lock
+    # may have been held at the time, so a forked worker gets fresh ones
+    if _listener is None:
+        return
+    _handler.queue = _listener.queue = queue.Queue(_handler.queue.maxsize)
+    _listener._thread = None
+    _listener.start()
+
+
+def stop_logging():
+    """Flush the queued records and stop the listener thread"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def request_logger(name, rate=LOG_SAMPLE_RATE):
+    """Logger for per-request lines; keeps a `rate` sample of records below WARNING"""
+    logger = logging.getLogger(f"{name}.requests")
+    if not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        logger.addFilter(SamplingFilter(rate))
+    return logger
+
+
+def logging_stats():
+    return {
+        "queued": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0,
+        "sampleRate": LOG_SAMPLE_RATE
+    }
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for the fraud detection servers.
+
+register_metrics(app) adds per-route request counters and latency
+histograms plus a /metrics endpoint to a Flask app. time_stage() times
+the prediction stages (validate, preprocess, scale, infer, explain,
+rules, serialize). When PROMETHEUS_MULTIPROC_DIR is set (serve.py sets it for
+gunicorn), every worker writes its samples there and /metrics aggregates
+all workers. Without prometheus_client installed every call is a no-op.
+"""
+import os
+import time
+import logging
+from contextlib import nullcontext
+from flask import Response, g, request
+
+logger = logging.getLogger("fraud_detection_server")
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                                   Histogram, generate_latest, multiprocess)
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+# Stages timed on the prediction path ('rules' is the rule-based fallback,
+# 'velocity' fills in the sliding-window counts)
+STAGES = ('validate', 'velocity', 'preprocess', 'scale', 'infer', 'explain', 'rules', 'serialize')
+
+# Latency buckets in seconds, from 50us up to 5s
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+if PROMETHEUS_AVAILABLE:
+    REQUESTS = Counter('fraud_http_requests_total', 'HTTP requests by route, method and status',
+                       ['route', 'method', 'status'])
+    REQUEST_SECONDS = Histogram('fraud_http_request_duration_seconds', 'HTTP request latency by route',
+                                ['route'], buckets=REQUEST_BUCKETS)
+    STAGE_SECONDS = Histogram('fraud_prediction_stage_seconds', 'Time spent in each prediction stage',
+                              ['stage'], buckets=STAGE_BUCKETS)
+    PREDICTIONS = Counter('fraud_predictions_total', 'Predictions by the engine that produced them (ml or rules)',
+                          ['source'])
+    MODEL_LOAD_SECONDS = Gauge('fraud_model_load_seconds', 'Seconds taken to load the active model',
+                               multiprocess_mode='liveall')
+    MODEL_LOADED = Gauge('fraud_model_loaded', '1 while an ML model is active, 0 while serving rules only',
+                         multiprocess_mode='liveall')
+    MODEL_LOADS = Counter('fraud_model_loads_total', 'Model load and reload attempts', ['outcome'])
+
+
+def time_stage(stage):
+    """Context manager timing one prediction stage"""
+    if not PROMETHEUS_AVAILABLE:
+        return nullcontext()
+    return STAGE_SECONDS.labels(stage).time()
+
+
+def observe_stage(stage, seconds):
+    if PROMETHEUS_AVAILABLE:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def count_prediction(source, amount=1):
+    """Record predictions served by 'ml' or 'rules' (the fallback rate is rules / total)"""
+    if PROMETHEUS_AVAILABLE and amount:
+        PREDICTIONS.labels(source).inc(amount)
+
+
+def record_model_load(seconds=None, success=True):
+    if not PROMETHEUS_AVAILABLE:
+        return
+    MODEL_LOADS.labels('success' if success else 'failure').inc()
+    if success:
+        publish_model_state(True, seconds)
+
+
+def publish_model_state(loaded, seconds=None):
+    """Set the model gauges; forked workers call this since gauges are per process"""
+    if not PROMETHEUS_AVAILABLE:
+        return
+    MODEL_LOADED.set(1 if loaded else 0)
+    if seconds is not None:
+        MODEL_LOAD_SECONDS.set(seconds)
+
+
+def _metrics_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # Aggregate the samples every worker process wrote to the shared directory
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def register_metrics(app):
+    """Add request metrics and a /metrics endpoint to a Flask app"""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if PROMETHEUS_AVAILABLE and started is not None:
+            # Label by route pattern, not raw path, to keep cardinality bounded
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+            REQUEST_SECONDS.labels(route).observe(time.perf_counter() - started)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus metrics (aggregated across workers in multiprocess mode)"""
+        if not PROMETHEUS_AVAILABLE:
+            return Response("prometheus_client is not installed\n", status=501, mimetype='text/plain')
+        return Response(generate_latest(_metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+    return app
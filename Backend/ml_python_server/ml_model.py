@@ -3,9 +3,10 @@ import numpy as np
 import os
 import pickle
 import json
-import tensorflow as tf
-from tensorflow import keras
 import logging
+from numpy_inference import NumpyDenseModel
+from metrics import time_stage
+from feature_schema import MODEL_SCHEMA
 
 # Configure logging
 logging.basicConfig(
@@ -18,29 +19,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger("fraud_detection_ml")
 
+# Inference backend: "numpy" evaluates the exported Dense weights with NumPy,
+# "keras" runs the TensorFlow model directly and "tfjs" serves the TF.js model
+# trained by the Node backend (see tfjs_model.py)
+DEFAULT_BACKEND = os.environ.get("FRAUD_MODEL_BACKEND", "numpy")
+
+# Directory holding the artifacts written by train_boat_fraud_model.py
+MODEL_DIR = os.path.join(os.path.dirname(__file__), 'model')
+
 class FraudDetectionModel:
-    def __init__(self, model_path=None, scaler_path=None, label_encoders_path=None, feature_names_path=None):
+    # Feature schema the model's inputs are read with
+    schema = MODEL_SCHEMA
+    
+    def __init__(self, model_path=None, scaler_path=None, label_encoders_path=None, feature_names_path=None,
+                 numpy_weights_path=None, backend=None, model_dir=None):
         self.model = None
         self.scaler = None
         self.label_encoders = None
         self.feature_names = None
+        self.feature_columns = None
         self.is_loaded = False
+        self.backend = backend or DEFAULT_BACKEND
+        self.version = None
         
-        # Define paths or use defaults
-        self.model_path = model_path or os.path.join(os.path.dirname(__file__), 'model', 'boat_fraud_detection_model')
-        self.scaler_path = scaler_path or os.path.join(os.path.dirname(__file__), 'model', 'scaler.pkl')
-        self.label_encoders_path = label_encoders_path or os.path.join(os.path.dirname(__file__), 'model', 'label_encoders.pkl')
-        self.feature_names_path = feature_names_path or os.path.join(os.path.dirname(__file__), 'model', 'feature_names.pkl')
+        # Define paths or use the artifact names inside model_dir (MODEL_DIR by default)
+        model_dir = model_dir or MODEL_DIR
+        self.model_path = model_path or os.path.join(model_dir, 'boat_fraud_detection_model')
+        self.scaler_path = scaler_path or os.path.join(model_dir, 'scaler.pkl')
+        self.label_encoders_path = label_encoders_path or os.path.join(model_dir, 'label_encoders.pkl')
+        self.feature_names_path = feature_names_path or os.path.join(model_dir, 'feature_names.pkl')
+        self.numpy_weights_path = numpy_weights_path or os.path.join(model_dir, 'boat_fraud_detection_weights.npz')
         
         # Try to load the model and preprocessing components
         self.load_model()
     
     def load_model(self):
-        """Load the TensorFlow model and preprocessing components"""
+        """Load the model for the configured backend and preprocessing components"""
         try:
-            # Load TensorFlow model
-            logger.info(f"Loading model from {self.model_path}")
-            self.model = keras.models.load_model(self.model_path)
+            if self.backend == 'numpy':
+                self.model = self._load_numpy_model()
+            elif self.backend == 'keras':
+                self.model = self._load_keras_model()
+            else:
+                raise ValueError(f"Unknown model backend: {self.backend}")
             
             # Load scaler
             logger.info(f"Loading scaler from {self.scaler_path}")
@@ -59,16 +80,17 @@ class FraudDetectionModel:
                     self.feature_names = pickle.load(f)
             except (FileNotFoundError, IOError) as e:
                 logger.warning(f"Could not load feature names file: {str(e)}")
-                # Define default feature names based on the model
-                self.feature_names = [
-                    'no_of_adults', 'no_of_children', 'lead_time', 
-                    'no_of_previous_cancellations', 'no_of_previous_bookings_not_canceled',
-                    'repeated_guest', 'avg_price_per_room', 'no_of_special_requests',
-                    'cancellation_ratio', 'adult_child_ratio', 'very_short_lead', 
-                    'suspicious_price', 'multiple_bookings_same_day'
-                ]
+                # Default to the feature order of the current schema
+                self.feature_names = list(MODEL_SCHEMA.names)
                 logger.info(f"Using default feature names: {self.feature_names}")
             
+            # Columns of the schema in the order the model was trained on
+            # (None when it is the schema order); fails for unknown features
+            if tuple(self.feature_names) == self.schema.names:
+                self.feature_columns = None
+            else:
+                self.feature_columns = self.schema.positions(self.feature_names)
+            
             self.is_loaded = True
             logger.info("Model and preprocessing components loaded successfully")
             return True
@@ -77,46 +99,110 @@ class FraudDetectionModel:
             self.is_loaded = False
             return False
     
+    def artifact_paths(self):
+        """Files the loaded model was built from (used to derive its version)"""
+        if self.backend == 'numpy' and os.path.exists(self.numpy_weights_path):
+            model_files = [self.numpy_weights_path]
+        else:
+            model_files = [self.model_path]
+        return model_files + [self.scaler_path, self.label_encoders_path, self.feature_names_path]
+    
+    def _load_keras_model(self):
+        """Load the TensorFlow model (imports TensorFlow on first use)"""
+        from tensorflow import keras
+        
+        logger.info(f"Loading model from {self.model_path}")
+        return keras.models.load_model(self.model_path)
+    
+    def _load_numpy_model(self):
+        """
+        Load the NumPy inference model. If no exported weights exist yet, they
+        are exported once from the TensorFlow model and saved for next time.
+        """
+        if os.path.exists(self.numpy_weights_path):
+            logger.info(f"Loading NumPy model weights from {self.numpy_weights_path}")
+            return NumpyDenseModel.load(self.numpy_weights_path)
+        
+        logger.info(f"No exported weights at {self.numpy_weights_path}, exporting from TensorFlow model")
+        model = NumpyDenseModel.from_keras(self._load_keras_model())
+        try:
+            model.save(self.numpy_weights_path)
+        except (IOError, OSError) as e:
+            logger.warning(f"Could not save exported weights: {str(e)}")
+        return model
+    
+    def _extract_features(self, data):
+        """Build the raw (unscaled) feature record for a single booking"""
+        return self.schema.record(data)
+    
+    def feature_key(self, data):
+        """
+        Canonical hash of the processed features of a booking. Bookings that
+        differ only in fields the model ignores (or in key order) share a key.
+        """
+        return self._extract_features(data).digest()
+    
     def _preprocess_data(self, data):
         """Preprocess booking data for model input"""
-        # Create dictionary for processed data
-        processed_data = {}
-        
-        # Direct feature mapping
-        processed_data['no_of_adults'] = float(data.get('no_of_adults', 1))
-        processed_data['no_of_children'] = float(data.get('no_of_children', 0))
-        processed_data['lead_time'] = float(data.get('lead_time', 0))
-        processed_data['no_of_previous_cancellations'] = float(data.get('no_of_previous_cancellations', 0))
-        processed_data['no_of_previous_bookings_not_canceled'] = float(data.get('no_of_previous_bookings_not_canceled', 0))
-        processed_data['repeated_guest'] = 1.0 if data.get('repeated_guest', 'No') == 'Yes' else 0.0
-        processed_data['avg_price_per_room'] = float(data.get('avg_price_per_room', 100))
-        processed_data['no_of_special_requests'] = float(data.get('no_of_special_requests', 0))
-        
-        # Derived features - specifically for fraud detection
-        cancellation_ratio = 0.0
-        if (processed_data['no_of_previous_cancellations'] + processed_data['no_of_previous_bookings_not_canceled']) > 0:
-            cancellation_ratio = processed_data['no_of_previous_cancellations'] / (
-                processed_data['no_of_previous_cancellations'] + processed_data['no_of_previous_bookings_not_canceled'] + 0.1
-            )
-        processed_data['cancellation_ratio'] = cancellation_ratio
-        
-        processed_data['adult_child_ratio'] = processed_data['no_of_adults'] / (processed_data['no_of_children'] + 0.1)
-        processed_data['very_short_lead'] = 1.0 if processed_data['lead_time'] < 2 else 0.0
-        
-        price_per_person = processed_data['avg_price_per_room'] / (processed_data['no_of_adults'] + processed_data['no_of_children'] + 0.1)
-        processed_data['suspicious_price'] = 1.0 if price_per_person < 25 else 0.0
-        
-        # Multiple bookings feature - this is critical for boat fraud detection
-        processed_data['multiple_bookings_same_day'] = float(data.get('multiple_bookings_same_day', 0))
-        
-        # Convert to numpy array in the expected order
-        features_array = np.array([processed_data[feature] for feature in self.feature_names]).reshape(1, -1)
+        with time_stage('preprocess'):
+            processed_data = self._extract_features(data)
+            
+            # Convert to numpy array in the expected order
+            features_array = self.schema.matrix([processed_data], self.feature_columns)
         
         # Apply scaling
-        scaled_features = self.scaler.transform(features_array)
+        with time_stage('scale'):
+            scaled_features = self.scaler.transform(features_array)
         
         return scaled_features, processed_data
     
+    def _preprocess_batch(self, bookings):
+        """
+        Preprocess many bookings into a single scaled feature matrix.
+        Returns the matrix, the processed feature dictionaries and the input
+        positions of the rows; bookings whose features cannot be extracted are skipped.
+        """
+        processed_features = []
+        positions = []
+        
+        with time_stage('preprocess'):
+            for index, booking in enumerate(bookings):
+                try:
+                    processed_data = self._extract_features(booking)
+                except Exception as e:
+                    logger.warning(f"Could not extract features for booking {index}: {str(e)}")
+                    continue
+                processed_features.append(processed_data)
+                positions.append(index)
+            
+            if not processed_features:
+                return None, processed_features, positions
+            rows = self.schema.matrix(processed_features, self.feature_columns)
+        
+        # Scale the whole matrix in one call
+        with time_stage('scale'):
+            scaled_features = self.scaler.transform(rows)
+        
+        return scaled_features, processed_features, positions
+    
+    def _build_result(self, processed_features, fraud_probability):
+        """Build the prediction result dictionary for one booking"""
+        # Include reasoning for ML prediction
+        indicators = self._explain_prediction(processed_features, fraud_probability)
+        
+        # Determine risk level
+        risk_level = self._determine_risk_level(fraud_probability)
+        
+        return {
+            "fraud_probability": fraud_probability,
+            "is_fraud": fraud_probability > 0.5,
+            "risk_level": risk_level,
+            "indicators": indicators,
+            "ml_probability": fraud_probability,
+            "rules_probability": None,  # No rule-based detection used
+            "rule_based": False
+        }
+    
     def predict(self, booking_data):
         """
         Predict fraud probability for a booking using the ML model
@@ -132,31 +218,62 @@ class FraudDetectionModel:
             preprocessed_data, processed_features = self._preprocess_data(booking_data)
             
             # Make prediction
-            raw_prediction = self.model.predict(preprocessed_data)[0][0]
+            with time_stage('infer'):
+                raw_prediction = self.model.predict(preprocessed_data)[0][0]
             fraud_probability = float(raw_prediction)
             
-            # Include reasoning for ML prediction
-            indicators = self._explain_prediction(processed_features, fraud_probability)
-            
-            # Determine risk level
-            risk_level = self._determine_risk_level(fraud_probability)
-            
-            # Build result dictionary
-            result = {
-                "fraud_probability": fraud_probability,
-                "is_fraud": fraud_probability > 0.5,
-                "risk_level": risk_level,
-                "indicators": indicators,
-                "ml_probability": fraud_probability,
-                "rules_probability": None,  # No rule-based detection used
-                "rule_based": False
-            }
-            
-            return result
+            with time_stage('explain'):
+                return self._build_result(processed_features, fraud_probability)
         except Exception as e:
             logger.error(f"Error during ML prediction: {str(e)}")
             return None
     
+    def predict_batch(self, bookings):
+        """
+        Predict fraud probability for many bookings with one forward pass.
+        Returns a list aligned with the input; entries the model could not
+        score are None so callers can fall back to rule-based detection.
+        """
+        results = [None] * len(bookings)
+        
+        if not self.is_loaded or self.model is None:
+            logger.warning("Model not loaded, using rule-based detection")
+            return results
+        
+        try:
+            preprocessed_data, processed_features, positions = self._preprocess_batch(bookings)
+            if preprocessed_data is None:
+                return results
+            
+            # Make predictions for the whole matrix at once
+            with time_stage('infer'):
+                raw_predictions = self.model.predict(preprocessed_data)
+        except Exception as e:
+            logger.error(f"Error during batch ML prediction: {str(e)}")
+            return results
+        
+        with time_stage('explain'):
+            for position, features, raw_prediction in zip(positions, processed_features, raw_predictions):
+                results[position] = self._build_result(features, float(raw_prediction[0]))
+        
+        return results
+    
+    def predict_frame(self, frame):
+        """
+        Fraud probabilities for every row of a DataFrame of booking fields,
+        with one scaler call and one forward pass. Returns None when no model
+        is loaded; errors are raised to the caller.
+        """
+        if not self.is_loaded or self.model is None:
+            return None
+        
+        with time_stage('preprocess'):
+            rows = self.schema.frame_matrix(frame, self.feature_columns)
+        with time_stage('scale'):
+            scaled_features = self.scaler.transform(rows)
+        with time_stage('infer'):
+            return np.asarray(self.model.predict(scaled_features), dtype=np.float64).reshape(-1)
+    
     def _determine_risk_level(self, probability):
         """Convert probability to risk level"""
         if probability < 0.2:
@@ -211,4 +328,19 @@ class FraudDetectionModel:
             features['multiple_bookings_same_day'] > 0):
             indicators.append("High-risk pattern: Multiple previous cancellations, very short lead time, and multiple bookings")
         
-        return indicators 
\ No newline at end of file
+        return indicators 
+
+def create_fraud_model(backend=None, **paths):
+    """Create the fraud detection model for the configured backend"""
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'tfjs':
+        from tfjs_model import TfjsFraudModel
+        return TfjsFraudModel(**paths)
+    return FraudDetectionModel(backend=backend, **paths)
+
+def default_model_dir(backend=None):
+    """Directory holding the artifacts for the configured backend"""
+    if (backend or DEFAULT_BACKEND) == 'tfjs':
+        from tfjs_model import DEFAULT_TFJS_MODEL_DIR
+        return DEFAULT_TFJS_MODEL_DIR
+    return MODEL_DIR
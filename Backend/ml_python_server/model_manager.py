@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+import os
+import math
+import hashlib
+import threading
+import time
+import logging
+from ml_model import create_fraud_model
+from metrics import record_model_load, publish_model_state
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Loading states reported by ModelManager.status()
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+# Version reported for responses produced without an ML model
+RULES_VERSION = "rule-based"
+
+# Bookings every new model must score sensibly before it is swapped in
+CANARY_BOOKINGS = [
+    {"lead_time": 30, "no_of_adults": 2, "no_of_children": 1, "avg_price_per_room": 150,
+     "no_of_special_requests": 1, "repeated_guest": "Yes", "no_of_previous_bookings_not_canceled": 3},
+    {"lead_time": 1, "no_of_adults": 2, "no_of_children": 4, "avg_price_per_room": 40,
+     "no_of_previous_cancellations": 3, "multiple_bookings_same_day": 3},
+    {"lead_time": 400, "no_of_adults": 1, "no_of_children": 0, "avg_price_per_room": 90},
+    {"lead_time": 7, "no_of_adults": 0, "no_of_children": 2, "avg_price_per_room": 10,
+     "no_of_previous_cancellations": 1, "no_of_previous_bookings_not_canceled": 1},
+    {"leadTime": 2, "cancellationRatio": 0.6, "cancellationsLast24Hours": 2, "timeSinceBooking": 30,
+     "adults": 2, "children": 0, "totalAmount": 5000}
+]
+
+
+class CanaryCheckError(Exception):
+    """Raised when a freshly loaded model fails the canary batch"""
+
+
+def model_version(model):
+    """Derive a version id from the backend and the content of the model artifacts"""
+    digest = hashlib.sha1()
+    for path in sorted(model.artifact_paths()):
+        files = [path]
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        for file_path in files:
+            if os.path.isfile(file_path):
+                digest.update(os.path.basename(file_path).encode())
+                with open(file_path, 'rb') as f:
+                    digest.update(f.read())
+    return f"{model.backend}-{digest.hexdigest()[:12]}"
+
+
+def check_canary(model, bookings=None):
+    """Score the canary batch; raises CanaryCheckError if any result is unusable"""
+    bookings = bookings or CANARY_BOOKINGS
+    results = model.predict_batch(bookings)
+    if len(results) != len(bookings):
+        raise CanaryCheckError(f"Expected {len(bookings)} canary results, got {len(results)}")
+
+    probabilities = []
+    for index, result in enumerate(results):
+        if result is None:
+            raise CanaryCheckError(f"Model could not score canary booking {index}")
+        probability = result["fraud_probability"]
+        if not math.isfinite(probability) or not 0.0 <= probability <= 1.0:
+            raise CanaryCheckError(f"Canary booking {index} scored an invalid probability: {probability}")
+        probabilities.append(probability)
+    return probabilities
+
+
+def directory_signature(directory):
+    """Cheap fingerprint of a directory tree (names, sizes and mtimes)"""
+    signature = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            signature.append((os.path.relpath(os.path.join(root, name), directory), stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(signature))
+
+
+class ModelManager:
+    """
+    Owns the active fraud detection model. The first load runs in a
+    background thread; until it finishes get_model() returns None so
+    callers keep serving rule-based results. New model versions are loaded
+    next to the active one, checked against a canary batch and then
+    published with a single reference assignment, so in-flight requests
+    finish on the model they already hold.
+    """
+
+    def __init__(self, factory=None):
+        self._factory = factory or create_fraud_model
+        self._model = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._thread = None
+        self._watcher = None
+        self._watch_args = None
+        self._stop_watching = threading.Event()
+        self._done = threading.Event()
+        self._swap_listeners = []
+        self.state = STATE_PENDING
+        self.error = None
+        self.load_seconds = None
+        self.reload_count = 0
+        self.last_reload = None
+        self.started_at = time.time()
+
+    def start(self):
+        """Start loading the model in a daemon thread (no-op if already started)"""
+        with self._lock:
+            if self._thread is not None or self._done.is_set():
+                return
+            self._thread = threading.Thread(target=self.load, name="model-loader", daemon=True)
+            self._thread.start()
+
+    def _build(self, **paths):
+        """Load and canary-check a model without touching the active one"""
+        start = time.perf_counter()
+        model = self._factory(**paths)
+        if not model.is_loaded:
+            raise RuntimeError("Model files could not be loaded")
+        check_canary(model)
+        model.version = model_version(model)
+        return model, time.perf_counter() - start
+
+    def _activate(self, model):
+        """Publish a new model and notify listeners"""
+        previous = self._model
+        self._model = model
+        for listener in self._swap_listeners:
+            try:
+                listener(previous, model)
+            except Exception as e:
+                logger.error(f"Error in model swap listener: {str(e)}")
+
+    def load(self):
+        """Load the initial model synchronously; returns True if the ML model is active"""
+        self.state = STATE_LOADING
+        with self._reload_lock:
+            try:
+                model, self.load_seconds = self._build()
+                self._activate(model)
+                self.state = STATE_READY
+                self.error = None
+                record_model_load(self.load_seconds)
+                logger.info(f"Machine learning model {model.version} loaded in {self.load_seconds:.2f}s "
+                            f"- using ML for fraud detection")
+            except Exception as e:
+                self.state = STATE_FAILED
+                self.error = str(e)
+                record_model_load(success=False)
+                logger.warning(f"Machine learning model could not be loaded ({str(e)}) - using rule-based detection")
+
+        self._done.set()
+        return self._model is not None
+
+    def reload(self, **paths):
+        """
+        Load a new model from the given artifact paths (defaults when empty),
+        check it against the canary batch and swap it in. The active model
+        stays in place if anything fails.
+        """
+        with self._reload_lock:
+            previous_version = self.version
+            try:
+                model, seconds = self._build(**paths)
+            except Exception as e:
+                record_model_load(success=False)
+                logger.error(f"Model reload failed, keeping version {previous_version}: {str(e)}")
+                self.last_reload = {
+                    "success": False,
+                    "error": str(e),
+                    "activeVersion": previous_version,
+                    "timestamp": time.time()
+                }
+                return self.last_reload
+
+            self._activate(model)
+            self.state = STATE_READY
+            self.error = None
+            self.load_seconds = seconds
+            self.reload_count += 1
+            record_model_load(seconds)
+            self._done.set()
+            logger.info(f"Swapped model {previous_version} -> {model.version} (loaded in {seconds:.2f}s)")
+
+            self.last_reload = {
+                "success": True,
+                "activeVersion": model.version,
+                "previousVersion": previous_version,
+                "loadSeconds": round(seconds, 3),
+                "timestamp": time.time()
+            }
+            return self.last_reload
+
+    def add_swap_listener(self, listener):
+        """Register listener(previous_model, new_model), called after each swap"""
+        self._swap_listeners.append(listener)
+
+    def start_watching(self, directory, interval=10.0):
+        """Reload automatically when the files in directory change"""
+        if self._watcher is not None:
+            return
+        self._watch_args = (directory, interval)
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(directory, interval),
+                                         name="model-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {directory} for new model artifacts every {interval}s")
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def after_fork(self):
+        """
+        Restart background threads in a forked worker process. Threads do not
+        survive fork(), so a watcher started before forking is started again.
+        """
+        self._watcher = None
+        publish_model_state(self.state == STATE_READY, self.load_seconds)
+        if self._watch_args is not None:
+            self.start_watching(*self._watch_args)
+
+    def _watch(self, directory, interval):
+        loaded_signature = directory_signature(directory)
+        pending_signature = None
+        while not self._stop_watching.wait(interval):
+            signature = directory_signature(directory)
+            if signature == loaded_signature:
+                pending_signature = None
+                continue
+            # Wait for the files to stop changing before reloading, so a
+            # half-written training run is never picked up
+            if signature != pending_signature:
+                pending_signature = signature
+                continue
+            logger.info(f"Detected new model artifacts in {directory}, reloading")
+            self.reload(model_dir=directory)
+            loaded_signature = signature
+            pending_signature = None
+
+    def wait(self, timeout=None):
+        """Block until the initial load has finished; returns True if it finished in time"""
+        return self._done.wait(timeout)
+
+    def get_model(self):
+        """Return the active model, or None while loading or after a failed load"""
+        return self._model
+
+    @property
+    def version(self):
+        model = self._model
+        return model.version if model is not None else RULES_VERSION
+
+    @property
+    def is_ready(self):
+        return self._model is not None
+
+    @property
+    def loading_finished(self):
+        return self._done.is_set()
+
+    def status(self):
+        """Loading details for the /status endpoint"""
+        model = self._model
+        return {
+            "state": self.state,
+            "backend": getattr(model, 'backend', None),
+            "version": self.version,
+            "loadSeconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.error,
+            "reloads": self.reload_count,
+            "lastReload": self.last_reload,
+            "watching": self._watcher is not None,
+            "uptimeSeconds": round(time.time() - self.started_at, 1)
+        }
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import numpy as np
+import logging
+
+logger = logging.getLogger("fraud_detection_ml")
+
+
+def _relu(x):
+    return np.maximum(x, 0)
+
+
+def _sigmoid(x):
+    # Numerically stable logistic function: 1 / (1 + exp(-x))
+    return np.exp(-np.logaddexp(0, -x))
+
+
+def _tanh(x):
+    return np.tanh(x)
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'tanh': _tanh,
+    'linear': _linear
+}
+
+# Layers that only matter during training and are skipped at inference time
+PASSTHROUGH_LAYERS = {'Dropout', 'InputLayer', 'GaussianNoise', 'GaussianDropout'}
+
+
+class NumpyDenseModel:
+    """
+    Inference-only evaluator for a stack of Dense layers using plain NumPy.
+    Mirrors the keras predict() interface so it can stand in for the
+    TensorFlow model behind FraudDetectionModel.
+    """
+
+    def __init__(self, layers):
+        # layers: list of (kernel, bias, activation name)
+        self.layers = []
+        for kernel, bias, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+            self.layers.append((
+                np.ascontiguousarray(kernel, dtype=np.float32),
+                np.ascontiguousarray(bias, dtype=np.float32),
+                activation
+            ))
+
+    @property
+    def input_dim(self):
+        return self.layers[0][0].shape[0]
+
+    def predict(self, x, **kwargs):
+        """Run a forward pass; returns an (n, units) array like keras Model.predict"""
+        output = np.asarray(x, dtype=np.float32)
+        if output.ndim == 1:
+            output = output.reshape(1, -1)
+        for kernel, bias, activation in self.layers:
+            output = ACTIVATIONS[activation](output @ kernel + bias)
+        return output
+
+    @classmethod
+    def from_keras(cls, model):
+        """Export the weights of a Sequential keras model made of Dense layers"""
+        layers = []
+        for layer in model.layers:
+            layer_type = layer.__class__.__name__
+            if layer_type in PASSTHROUGH_LAYERS:
+                continue
+            if layer_type != 'Dense':
+                raise ValueError(f"Unsupported layer type for NumPy inference: {layer_type}")
+            config = layer.get_config()
+            weights = layer.get_weights()
+            kernel = weights[0]
+            bias = weights[1] if config.get('use_bias', True) else np.zeros(kernel.shape[1])
+            layers.append((kernel, bias, config.get('activation', 'linear')))
+        return cls(layers)
+
+    def save(self, path):
+        """Save the exported weights to an .npz file"""
+        arrays = {}
+        for i, (kernel, bias, activation) in enumerate(self.layers):
+            arrays[f"kernel_{i}"] = kernel
+            arrays[f"bias_{i}"] = bias
+        arrays["activations"] = np.array([activation for _, _, activation in self.layers])
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+        logger.info(f"Saved NumPy model weights to {path}")
+
+    @classmethod
+    def load(cls, path):
+        """Load weights previously written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            activations = [str(a) for a in data["activations"]]
+            layers = [(data[f"kernel_{i}"], data[f"bias_{i}"], activation)
+                      for i, activation in enumerate(activations)]
+        return cls(layers)
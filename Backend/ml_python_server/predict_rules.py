@@ -2,33 +2,19 @@
 import sys
 import json
 import argparse
+from feature_schema import RULES_SCHEMA
 
 def predict_fraud(input_data):
     """
     Rule-based fraud detection for boat reservations.
     Returns fraud probability and indicators of suspicious activity.
     """
-    # Extract the features
-    lead_time = float(input_data.get('lead_time', 0))
-    cancellations = float(input_data.get('no_of_previous_cancellations', 0))
-    price = float(input_data.get('avg_price_per_room', 0))
-    adults = float(input_data.get('no_of_adults', 0))
-    children = float(input_data.get('no_of_children', 0))
-    repeated_guest = input_data.get('repeated_guest', 'No')
-    repeated_guest_numeric = 1 if repeated_guest == 'Yes' else 0
-    
-    # Extract additional features if available
-    weekend_nights = float(input_data.get('no_of_weekend_nights', 0))
-    week_nights = float(input_data.get('no_of_week_nights', 0))
+    # Extract the features (in RULES_SCHEMA order)
+    (lead_time, cancellations, price, adults, children, repeated_guest_numeric,
+     weekend_nights, week_nights, required_car_parking, special_requests,
+     booking_changes, previous_bookings, multiple_bookings_same_day,
+     booking_to_departure_ratio) = RULES_SCHEMA.read(input_data)
     total_stay = weekend_nights + week_nights
-    required_car_parking = float(input_data.get('required_car_parking_space', 0))
-    special_requests = float(input_data.get('no_of_special_requests', 0))
-    booking_changes = float(input_data.get('no_of_booking_changes', 0))
-    previous_bookings = float(input_data.get('no_of_previous_bookings_not_canceled', 0))
-    
-    # Special boat-specific features
-    multiple_bookings_same_day = float(input_data.get('multiple_bookings_same_day', 0))
-    booking_to_departure_ratio = float(input_data.get('booking_to_departure_ratio', 1.0))
     
     # Rule-based fraud score calculation
     fraud_score = 0
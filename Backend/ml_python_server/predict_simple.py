@@ -1,15 +1,128 @@
 #!/usr/bin/env python3
+"""
+Rule-based prediction from the command line.
+
+    python predict_simple.py '{"lead_time": 30, "no_of_adults": 2}'
+
+Long-lived worker modes read newline-delimited JSON bookings and write one
+JSON result per line, in request order, so callers keep a warm process
+instead of starting Python for every booking:
+
+    python predict_simple.py --serve                      # stdin -> stdout
+    python predict_simple.py --socket /tmp/fraud.sock     # Unix socket server
+
+A request may carry a "requestId", which is echoed back in its result.
+"""
 import sys
 import json
 import os
+import signal
+import socketserver
 from predict_rules import predict_fraud
 
+REQUIRED_FIELDS = ['lead_time', 'no_of_adults']
+
+
+def score_booking(input_data):
+    """Validate and score one booking; returns the result or an error dictionary"""
+    if not isinstance(input_data, dict):
+        return {
+            "error": "Invalid JSON input",
+            "details": "Expected a JSON object"
+        }
+
+    # Validate required fields
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in input_data]
+    if missing_fields:
+        return {
+            "error": "Missing required fields",
+            "details": f"The following fields are required: {', '.join(missing_fields)}"
+        }
+
+    # Process with rule-based model
+    return predict_fraud(input_data)
+
+
+def score_line(line):
+    """Score one newline-delimited JSON request; returns the result line"""
+    try:
+        input_data = json.loads(line)
+    except json.JSONDecodeError as e:
+        result = {
+            "error": "Invalid JSON input",
+            "details": str(e)
+        }
+    else:
+        try:
+            result = score_booking(input_data)
+        except Exception as e:
+            result = {
+                "error": "Unexpected error during prediction",
+                "details": str(e)
+            }
+        if isinstance(input_data, dict) and "requestId" in input_data:
+            result["requestId"] = input_data["requestId"]
+    return json.dumps(result) + "\n"
+
+
+def serve_stream(lines, output):
+    """Answer every non-empty line of `lines` on `output`, flushing after each"""
+    for line in lines:
+        if not line.strip():
+            continue
+        output.write(score_line(line))
+        output.flush()
+
+
+class PredictionHandler(socketserver.StreamRequestHandler):
+    """One connection: newline-delimited requests in, results out"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(score_line(line).encode())
+            self.wfile.flush()
+
+
+class PredictionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_socket(path):
+    """Serve predictions on a Unix socket until SIGTERM or SIGINT"""
+    if os.path.exists(path):
+        # Left behind by a worker that did not shut down cleanly
+        os.unlink(path)
+    server = PredictionServer(path, PredictionHandler)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
 def main():
     """
     Main entry point for prediction requests.
     Takes JSON input data, processes it with the rule-based model,
     and returns the prediction results.
     """
+    if len(sys.argv) == 2 and sys.argv[1] == '--serve':
+        serve_stream(sys.stdin, sys.stdout)
+        return
+    if len(sys.argv) == 3 and sys.argv[1] == '--socket':
+        serve_socket(sys.argv[2])
+        return
+
     try:
         # Get input data from command line argument
         if len(sys.argv) != 2:
@@ -18,7 +131,7 @@ def main():
                 "details": "Expected exactly one argument with JSON data"
             }))
             sys.exit(1)
-        
+
         # Parse JSON input
         try:
             input_data = json.loads(sys.argv[1])
@@ -28,24 +141,14 @@ def main():
                 "details": str(e)
             }))
             sys.exit(1)
-        
-        # Validate required fields
-        required_fields = ['lead_time', 'no_of_adults']
-        missing_fields = [field for field in required_fields if field not in input_data]
-        
-        if missing_fields:
-            print(json.dumps({
-                "error": "Missing required fields",
-                "details": f"The following fields are required: {', '.join(missing_fields)}"
-            }))
-            sys.exit(1)
-        
-        # Process with rule-based model
-        result = predict_fraud(input_data)
-        
+
+        result = score_booking(input_data)
+
         # Return JSON result
         print(json.dumps(result))
-        
+        if "error" in result:
+            sys.exit(1)
+
     except Exception as e:
         import traceback
         print(json.dumps({
@@ -56,4 +159,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
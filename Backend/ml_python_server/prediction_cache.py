@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import os
+import copy
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Maximum cached predictions (0 disables the cache)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+# Seconds a cached prediction stays valid
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 300))
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of ML prediction results with a per-entry TTL. Entries
+    are keyed by model version plus FraudDetectionModel.feature_key, so a
+    booking re-sent with the same features (on cancellation, or on retry
+    from the Node service) is answered without another forward pass.
+    """
+
+    def __init__(self, max_size=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def key(self, model, booking_data):
+        """Cache key for a booking, or None if its features cannot be extracted"""
+        if not self.enabled:
+            return None
+        try:
+            return f"{model.version}:{model.feature_key(booking_data)}"
+        except Exception as e:
+            logger.debug(f"Not caching prediction: {str(e)}")
+            return None
+
+    def get(self, key):
+        """Return a copy of the cached result, or None on a miss"""
+        if key is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, result = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        # Callers add per-request fields, so never hand out the cached dict itself
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        if key is None or result is None:
+            return
+        entry = (time.monotonic() + self.ttl, copy.deepcopy(result))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def on_model_swap(self, previous_model, new_model):
+        """ModelManager swap listener: drop results produced by the previous model"""
+        self.clear()
+        logger.info("Prediction cache cleared after model swap")
+
+    def stats(self):
+        """Hit/miss counters for the /status endpoint"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "enabled": self.enabled,
+            "maxSize": self.max_size,
+            "ttlSeconds": self.ttl,
+            "hitRate": round(stats["hits"] / lookups, 4) if lookups else 0.0
+        })
+        return stats
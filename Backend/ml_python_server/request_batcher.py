@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Longest a request waits for others to join its batch (0 disables batching)
+BATCH_MAX_LATENCY_MS = float(os.environ.get("BATCH_MAX_LATENCY_MS", 2))
+# Largest batch sent through the model in one forward pass
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 32))
+
+# Upper bounds of the batch-size histogram buckets
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class _PendingRequest:
+    __slots__ = ("model", "booking", "enqueued_at", "result", "done")
+
+    def __init__(self, model, booking):
+        self.model = model
+        self.booking = booking
+        self.enqueued_at = time.perf_counter()
+        self.result = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-booking predictions into batches. The first
+    request of a batch waits at most max_latency_ms for others to arrive (or
+    until max_batch_size are queued), then the whole batch goes through one
+    model.predict_batch call and each caller gets its own result back.
+    Requests are grouped by the model object they were submitted with, so a
+    hot-swapped model never scores bookings meant for the previous one.
+    """
+
+    def __init__(self, max_latency_ms=BATCH_MAX_LATENCY_MS, max_batch_size=BATCH_MAX_SIZE):
+        self.max_latency = max_latency_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._histogram = {bound: 0 for bound in HISTOGRAM_BUCKETS}
+        self._overflow = 0
+        self._batches = 0
+        self._requests = 0
+        self._queue_wait_seconds = 0.0
+        self._max_queue_wait_seconds = 0.0
+
+    @property
+    def enabled(self):
+        return self.max_latency > 0 and self.max_batch_size > 1
+
+    def _ensure_started(self):
+        # Started lazily so forked server workers each get their own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+            self._thread.start()
+
+    def predict(self, model, booking_data, timeout=10.0):
+        """
+        Score one booking through the batcher; returns the same result as
+        model.predict(booking_data), or None if the model could not score it.
+        """
+        if not self.enabled:
+            self._record([None])
+            return model.predict(booking_data)
+
+        request = _PendingRequest(model, booking_data)
+        with self._condition:
+            self._ensure_started()
+            self._pending.append(request)
+            self._condition.notify()
+
+        if not request.done.wait(timeout):
+            logger.error(f"Batched prediction timed out after {timeout}s")
+            return None
+        return request.result
+
+    def _next_batch(self):
+        """Wait for the first request, then for the batch to fill or its deadline to pass"""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = self._pending[0].enqueued_at + self.max_latency
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+
+            # Group by model so each group is one forward pass
+            groups = {}
+            for request in batch:
+                groups.setdefault(id(request.model), []).append(request)
+
+            for requests in groups.values():
+                try:
+                    results = requests[0].model.predict_batch([request.booking for request in requests])
+                except Exception as e:
+                    logger.error(f"Error in batched prediction: {str(e)}")
+                    results = [None] * len(requests)
+                for request, result in zip(requests, results):
+                    request.result = result
+                    request.done.set()
+
+            self._record(batch, started)
+
+    def _record(self, batch, started=None):
+        size = len(batch)
+        waits = [started - request.enqueued_at for request in batch] if started is not None else [0.0]
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += size
+            self._queue_wait_seconds += sum(waits)
+            self._max_queue_wait_seconds = max(self._max_queue_wait_seconds, max(waits))
+            for bound in HISTOGRAM_BUCKETS:
+                if size <= bound:
+                    self._histogram[bound] += 1
+                    break
+            else:
+                self._overflow += 1
+
+    def stats(self):
+        """Batch-size histogram and queueing delay for the /status endpoint"""
+        with self._stats_lock:
+            histogram = {f"le_{bound}": count for bound, count in self._histogram.items()}
+            histogram[f"gt_{HISTOGRAM_BUCKETS[-1]}"] = self._overflow
+            return {
+                "enabled": self.enabled,
+                "maxLatencyMs": self.max_latency * 1000.0,
+                "maxBatchSize": self.max_batch_size,
+                "batches": self._batches,
+                "requests": self._requests,
+                "avgBatchSize": round(self._requests / self._batches, 2) if self._batches else 0.0,
+                "avgQueueWaitMs": round(self._queue_wait_seconds / self._requests * 1000.0, 3) if self._requests else 0.0,
+                "maxQueueWaitMs": round(self._max_queue_wait_seconds * 1000.0, 3),
+                "batchSizeHistogram": histogram
+            }
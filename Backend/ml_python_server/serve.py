@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Production entry point: serves a Flask app from this directory with
+gunicorn instead of Flask's single-process development server.
+
+With preloading (the default) the app is imported and the ML model loaded
+once in the gunicorn master, then the workers are forked from it and share
+the model memory copy-on-write. Background threads (model watcher, request
+batcher) are started again inside each worker. Prometheus metrics run in
+multiprocess mode so /metrics on any worker reports the whole server.
+
+    python serve.py --workers 4 --threads 8
+    python serve.py --app simple_server:app --no-preload
+"""
+import os
+import gc
+import shutil
+import argparse
+import tempfile
+import importlib
+import logging
+from gunicorn.app.base import BaseApplication
+
+logger = logging.getLogger("fraud_detection_server")
+
+# Defaults (override with environment variables or command-line flags)
+SERVE_APP = os.environ.get("SERVE_APP", "enhanced_server:app")
+SERVE_BIND = os.environ.get("SERVE_BIND", f"0.0.0.0:{os.environ.get('PORT', 5001)}")
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", os.cpu_count() or 1))
+SERVE_THREADS = int(os.environ.get("SERVE_THREADS", 4))
+SERVE_TIMEOUT = int(os.environ.get("SERVE_TIMEOUT", 30))
+SERVE_GRACEFUL_TIMEOUT = int(os.environ.get("SERVE_GRACEFUL_TIMEOUT", 30))
+SERVE_PRELOAD = os.environ.get("SERVE_PRELOAD", "1") not in ("0", "false", "no")
+# Longest the master waits for the model before forking (falls back to rules after that)
+SERVE_MODEL_LOAD_TIMEOUT = float(os.environ.get("SERVE_MODEL_LOAD_TIMEOUT", 120))
+
+
+def import_app(spec):
+    """Import 'module:attribute' and return (module, app)"""
+    module_name, _, attribute = spec.partition(":")
+    module = importlib.import_module(module_name)
+    return module, getattr(module, attribute or "app")
+
+
+def preload_model(module, timeout=SERVE_MODEL_LOAD_TIMEOUT):
+    """
+    Finish loading the model in the master so forked workers inherit it.
+    Watcher threads are stopped here and restarted in each worker.
+    """
+    model_manager = getattr(module, "model_manager", None)
+    if model_manager is None:
+        return
+    if not model_manager.wait(timeout):
+        logger.warning(f"Model still loading after {timeout}s; workers will start with rule-based detection")
+    model_manager.stop_watching()
+    logger.info(f"Preloaded model {model_manager.version} in the master process")
+
+
+def post_fork(server, worker):
+    module = server.app.module
+    model_manager = getattr(module, "model_manager", None) if module is not None else None
+    if model_manager is not None:
+        model_manager.after_fork()
+
+
+def prepare_metrics_dir():
+    """Point prometheus_client at an empty directory shared by all workers"""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        # Samples left over from an earlier run would be added to this one's
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+    else:
+        path = tempfile.mkdtemp(prefix="fraud-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    return path
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    # Drop the dead worker's live gauges from the aggregate
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    module = server.app.module
+    model_manager = getattr(module, "model_manager", None) if module is not None else None
+    if model_manager is not None:
+        model_manager.stop_watching()
+
+
+class FraudDetectionApplication(BaseApplication):
+    """gunicorn application serving one of the Flask apps in this directory"""
+
+    def __init__(self, app_spec=SERVE_APP, options=None):
+        self.app_spec = app_spec
+        self.options = options or {}
+        self.module = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+        self.cfg.set("post_fork", post_fork)
+        self.cfg.set("worker_exit", worker_exit)
+        self.cfg.set("child_exit", child_exit)
+
+    def load(self):
+        self.module, app = import_app(self.app_spec)
+        if self.cfg.preload_app:
+            preload_model(self.module)
+            # Keep everything allocated so far out of the garbage collector so
+            # collections in the workers do not touch (and copy) shared pages
+            gc.freeze()
+        return app
+
+
+def build_options(args):
+    return {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread" if args.threads > 1 else "sync",
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "preload_app": args.preload,
+        "accesslog": args.access_log
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fraud detection API with gunicorn")
+    parser.add_argument("--app", default=SERVE_APP, help="module:app to serve (default: %(default)s)")
+    parser.add_argument("--bind", default=SERVE_BIND)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS, help="threads per worker")
+    parser.add_argument("--timeout", type=int, default=SERVE_TIMEOUT)
+    parser.add_argument("--graceful-timeout", type=int, default=SERVE_GRACEFUL_TIMEOUT,
+                        help="seconds workers get to finish in-flight requests on SIGTERM")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=SERVE_PRELOAD,
+                        help="load the app (and model) separately in every worker")
+    parser.add_argument("--access-log", default=None, help="access log file ('-' for stdout)")
+    args = parser.parse_args()
+
+    # Must be set before the app (and prometheus_client) is imported
+    metrics_dir = prepare_metrics_dir()
+    logger.info(f"Collecting metrics from all workers in {metrics_dir}")
+    logger.info(f"Serving {args.app} on {args.bind} with {args.workers} workers x {args.threads} threads "
+                f"(preload {'on' if args.preload else 'off'})")
+    FraudDetectionApplication(args.app, build_options(args)).run()
+
+
+if __name__ == "__main__":
+    main()
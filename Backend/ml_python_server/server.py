@@ -1,27 +1,23 @@
 #!/usr/bin/env python3
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import json
+from metrics import register_metrics
 import os
 import logging
 from datetime import datetime
 import traceback
 from predict_rules import predict_fraud
+from logging_setup import configure_logging, request_logger
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('fraud_detection_server.log')
-    ]
-)
+# Configure logging (written by a background thread; per-request lines are sampled)
+configure_logging('fraud_detection_server.log')
 logger = logging.getLogger('fraud_detection')
+request_log = request_logger('fraud_detection')
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
+register_metrics(app)  # Request metrics and the /metrics endpoint
 
 @app.route('/status', methods=['GET'])
 def status():
@@ -47,14 +43,14 @@ def predict():
         
         # Get booking data from request
         booking_data = request.json
-        logger.info(f"Received prediction request: {json.dumps(booking_data)[:200]}...")
+        request_log.info("Received prediction request with %d fields", len(booking_data))
         
         # Validate required fields
         required_fields = ['lead_time', 'no_of_adults']
         missing_fields = [field for field in required_fields if field not in booking_data]
         
         if missing_fields:
-            logger.warning(f"Missing required fields: {missing_fields}")
+            logger.warning("Missing required fields: %s", missing_fields)
             return jsonify({
                 "error": "Missing required fields",
                 "details": f"The following fields are required: {', '.join(missing_fields)}"
@@ -62,8 +58,8 @@ def predict():
         
         # Process with rule-based model
         result = predict_fraud(booking_data)
-        logger.info(f"Prediction result: Fraud probability {result['fraud_probability']:.2f}, "
-                   f"Risk level: {result['risk_level']}")
+        request_log.info("Prediction result: Fraud probability %.2f, Risk level: %s",
+                         result['fraud_probability'], result['risk_level'])
         
         # Return prediction result
         return jsonify(result)
@@ -85,7 +81,7 @@ def compare_patterns():
         if request.is_json:
             user_id = request.json.get('userId', 'unknown')
         
-        logger.info(f"Received pattern comparison request for user: {user_id}")
+        request_log.info("Received pattern comparison request for user: %s", user_id)
         
         # Create a mock response
         response = {
@@ -109,7 +105,7 @@ def compare_patterns():
             }
         }
         
-        logger.info(f"Returning pattern comparison with similarity score: {response['similarityScore']}")
+        request_log.info("Returning pattern comparison with similarity score: %s", response['similarityScore'])
         return jsonify(response)
         
     except Exception as e:
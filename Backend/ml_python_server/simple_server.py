@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from metrics import register_metrics
 import json
 import os
 from datetime import datetime
@@ -8,6 +9,7 @@ import random
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}}) # Enable CORS for all routes
+register_metrics(app)  # Request metrics and the /metrics endpoint
 
 # Simple rule-based detection (same as the Node.js implementation)
 def rule_based_detection(features):
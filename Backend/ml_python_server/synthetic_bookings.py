@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+
+# Columns sent to /predict (the training frame also has booking_id and booking_status)
+PAYLOAD_COLUMNS = [
+    'no_of_adults', 'no_of_children', 'no_of_weekend_nights', 'no_of_week_nights',
+    'type_of_meal_plan', 'required_car_parking_space', 'room_type_reserved', 'lead_time',
+    'market_segment_type', 'repeated_guest', 'no_of_previous_cancellations',
+    'no_of_previous_bookings_not_canceled', 'avg_price_per_room', 'no_of_special_requests',
+    'multiple_bookings_same_day'
+]
+
+
+def generate_synthetic_bookings(n_samples=1000, seed=42):
+    """
+    Synthetic data that mimics the hotel reservations dataset, used for
+    training when Hotel_Reservations.csv is unavailable and for benchmarks.
+    The same seed always produces the same frame.
+    """
+    rng = np.random.RandomState(seed)
+
+    df = pd.DataFrame({
+        'booking_id': range(1, n_samples + 1),
+        'no_of_adults': rng.randint(1, 5, n_samples),
+        'no_of_children': rng.randint(0, 4, n_samples),
+        'no_of_weekend_nights': rng.randint(0, 3, n_samples),
+        'no_of_week_nights': rng.randint(0, 5, n_samples),
+        'type_of_meal_plan': rng.choice(['Meal Plan 1', 'Meal Plan 2', 'Meal Plan 3'], n_samples),
+        'required_car_parking_space': rng.choice([0, 1], n_samples, p=[0.8, 0.2]),
+        'room_type_reserved': rng.choice(['Room_Type 1', 'Room_Type 2', 'Room_Type 3', 'Room_Type 4'], n_samples),
+        'lead_time': rng.gamma(5, 5, n_samples).astype(int) + 1,  # Skewed toward shorter lead times
+        'market_segment_type': rng.choice(['Online', 'Offline', 'Corporate', 'Complementary', 'Aviation'], n_samples),
+        'repeated_guest': rng.choice(['No', 'Yes'], n_samples, p=[0.9, 0.1]),
+        'no_of_previous_cancellations': rng.choice([0, 1, 2, 3, 4], n_samples, p=[0.8, 0.1, 0.05, 0.03, 0.02]),
+        'no_of_previous_bookings_not_canceled': rng.choice([0, 1, 2, 3, 4, 5], n_samples, p=[0.7, 0.1, 0.1, 0.05, 0.03, 0.02]),
+        'avg_price_per_room': rng.normal(120, 30, n_samples).clip(min=50),
+        'no_of_special_requests': rng.choice([0, 1, 2, 3, 4], n_samples, p=[0.4, 0.3, 0.2, 0.05, 0.05]),
+        'booking_status': rng.choice(['Canceled', 'Not_Canceled'], n_samples, p=[0.3, 0.7])
+    })
+
+    # Add multiple bookings feature (simulate a user booking multiple boats)
+    df['multiple_bookings_same_day'] = rng.choice([0, 1, 2, 3], n_samples, p=[0.8, 0.1, 0.07, 0.03])
+
+    return df
+
+
+def generate_booking_payloads(n_samples=1000, seed=42):
+    """Synthetic bookings as JSON-ready /predict request bodies"""
+    df = generate_synthetic_bookings(n_samples, seed)[PAYLOAD_COLUMNS]
+    # tolist() converts NumPy scalars to plain Python values for json
+    return [dict(zip(PAYLOAD_COLUMNS, row)) for row in df.astype(object).values.tolist()]
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import asyncio
+import pytest
+
+pytest.importorskip("quart")
+import async_server
+from enhanced_server import app as flask_app
+
+BOOKING = {"lead_time": 1, "no_of_adults": 2, "no_of_children": 4, "avg_price_per_room": 40}
+
+
+async def post(path, payload, headers=None):
+    response = await async_server.app.test_client().post(path, json=payload, headers=headers)
+    return response.status_code, await response.get_json(), response.headers
+
+
+def test_routes_match_flask_app():
+    flask_routes = {rule.rule for rule in flask_app.url_map.iter_rules() if rule.endpoint != 'static'}
+    async_routes = {rule.rule for rule in async_server.app.url_map.iter_rules() if rule.endpoint != 'static'}
+    assert flask_routes <= async_routes
+
+
+def test_predict_matches_flask_view():
+    status, body, headers = asyncio.run(post('/predict', BOOKING))
+    expected = flask_app.test_client().post('/predict', json=BOOKING).get_json()
+
+    assert status == 200
+    assert body["fraud_probability"] == expected["fraud_probability"]
+    assert body["indicators"] == expected["indicators"]
+    assert headers["X-Model-Version"] == body["modelVersion"]
+
+    status, body, _ = asyncio.run(post('/predict', {"no_of_adults": 2}))
+    assert status == 400
+    assert body["error"] == "Missing required fields"
+
+
+def test_rejects_when_too_many_pending(monkeypatch):
+    monkeypatch.setitem(async_server.app.config, "MAX_PENDING", 0)
+    status, body, headers = asyncio.run(post('/predict', BOOKING))
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+
+
+def test_concurrent_requests_use_bounded_pool(monkeypatch):
+    monkeypatch.setitem(async_server.app.config, "WORKER_THREADS", 2)
+    monkeypatch.setattr(async_server, "_executor", None)
+
+    async def burst():
+        return await asyncio.gather(*(post('/predict', dict(BOOKING, lead_time=i)) for i in range(50)))
+
+    results = asyncio.run(burst())
+    assert all(status == 200 for status, _, _ in results)
+    assert async_server.get_executor()._max_workers == 2
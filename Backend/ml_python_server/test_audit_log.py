@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import os
+import time
+import threading
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from audit_log import AuditLog, list_segments, read_decisions
+from feature_schema import MODEL_SCHEMA, RULES_SCHEMA
+
+
+def booking(booking_id, lead_time=30):
+    return {"bookingId": booking_id, "userId": "u1", "lead_time": lead_time, "no_of_adults": 2,
+            "avg_price_per_room": 150}
+
+
+def result(probability, source):
+    return {"fraud_probability": probability, "is_fraud": probability > 0.5, "risk_level": "x", "source": source,
+            "modelVersion": "v1", "indicators": ["Short lead time"] if probability > 0.5 else []}
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_decisions_are_written_per_schema_and_read_back(tmp_path, fmt):
+    log = AuditLog(str(tmp_path), fmt=fmt, flush_rows=2, flush_seconds=60)
+    for i in range(5):
+        log.record(booking(f"m{i}", lead_time=i), result(0.9 if i % 2 else 0.1, "ml"), MODEL_SCHEMA)
+    log.record(booking("r0"), result(0.2, "rules"), RULES_SCHEMA)
+    log.close()
+    assert log.stats()["written"] == 6
+
+    assert {os.path.basename(os.path.dirname(path)) for path in list_segments(str(tmp_path))} == \
+        {f"{MODEL_SCHEMA.name}-v{MODEL_SCHEMA.version}", f"{RULES_SCHEMA.name}-v{RULES_SCHEMA.version}"}
+
+    model = read_decisions(str(tmp_path), schema=f"{MODEL_SCHEMA.name}-v{MODEL_SCHEMA.version}")
+    assert list(model["booking_id"]) == [f"m{i}" for i in range(5)]
+    assert list(model["lead_time"]) == [0, 1, 2, 3, 4]
+    assert list(model["indicators"][1]) == ["Short lead time"]
+    assert model["is_fraud"].sum() == 2
+
+    everything = read_decisions(str(tmp_path), columns=["booking_id", "source"])
+    assert sorted(everything["booking_id"]) == ["m0", "m1", "m2", "m3", "m4", "r0"]
+    assert read_decisions(str(tmp_path), end=time.time() - 3600).empty
+
+
+def test_segments_rotate_and_open_arrow_segments_are_readable(tmp_path):
+    log = AuditLog(str(tmp_path), fmt="arrow", flush_rows=1, flush_seconds=60, segment_bytes=1)
+    log.record(booking("b0"), result(0.1, "ml"), MODEL_SCHEMA)
+    log.flush()
+    log.record(booking("b1"), result(0.1, "ml"), MODEL_SCHEMA)
+    log.flush()
+    assert len(list_segments(str(tmp_path))) == 2
+
+    log.segment_bytes = 1 << 30
+    log.record(booking("b2"), result(0.1, "ml"), MODEL_SCHEMA)
+    log.flush()
+    # The third segment is still open but its flushed batches can be read
+    assert log.stats()["openSegments"] == 1
+    assert list(read_decisions(str(tmp_path))["booking_id"]) == ["b0", "b1", "b2"]
+    log.close()
+
+
+def test_disabled_without_a_directory():
+    log = AuditLog(None)
+    assert log.record(booking("b1"), result(0.9, "ml"), MODEL_SCHEMA) is False
+    assert log.stats()["enabled"] is False
+
+
+def test_every_decision_is_written_or_counted_as_dropped(tmp_path):
+    log = AuditLog(str(tmp_path), flush_rows=50, flush_seconds=60, queue_size=20)
+    barrier = threading.Barrier(8)
+
+    def burst():
+        barrier.wait()
+        for i in range(250):
+            log.record(booking(f"b{i}"), result(0.1, "ml"), MODEL_SCHEMA)
+
+    threads = [threading.Thread(target=burst) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+
+    stats = log.stats()
+    assert stats["dropped"] > 0
+    assert stats["written"] + stats["dropped"] == 8 * 250
+    assert len(read_decisions(str(tmp_path))) == stats["written"]
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import pytest
+import behavior_store
+from behavior_store import BehaviorStore, UserBehavior
+
+BOOKINGS = [
+    {"bookingDate": "2024-03-01T10:00:00Z", "leadTime": 2, "boatId": "a"},
+    {"bookingDate": "2024-03-01T10:30:00Z", "leadTime": 2, "boatId": "b"},
+    {"bookingDate": "2024-03-01T12:00:00Z", "leadTime": 3, "boatId": "c"},
+    {"bookingDate": "2024-03-03T09:00:00Z", "leadTime": 5, "boatId": "a"}
+]
+CANCELLATION = {"timeBeforeDeparture": 4, "timeSinceBooking": 1, "bookingDate": "2024-03-01T10:30:00Z",
+                "originalBookingData": {"adults": 2, "children": 1}}
+
+
+def test_aggregates_match_a_full_recomputation():
+    summary = UserBehavior.from_bookings(BOOKINGS, [CANCELLATION]).summary()
+
+    lead_times = [b["leadTime"] for b in BOOKINGS]
+    mean = sum(lead_times) / len(lead_times)
+    assert summary["bookingCount"] == 4
+    assert summary["uniqueBoatCount"] == 3
+    assert summary["avgTimeBetweenBookings"] == pytest.approx((0.5 + 1.5 + 45) / 3)
+    assert summary["leadTimeMean"] == pytest.approx(mean)
+    assert summary["leadTimeStd"] == pytest.approx((sum((x - mean) ** 2 for x in lead_times) / 4) ** 0.5)
+    assert summary["multipleBookings"] == 3
+    assert summary["multipleBookingsCanceled"] == 1
+    assert summary["cancellationRatio"] == 0.25
+    assert summary["avgAdults"] == 2 and summary["avgChildren"] == 1
+
+
+@pytest.mark.parametrize("persisted", [False, True])
+def test_store_accumulates_events_per_user(tmp_path, persisted):
+    db_path = str(tmp_path / "behavior.db") if persisted else None
+    store = BehaviorStore(db_path)
+    for booking in BOOKINGS:
+        store.record_booking("u1", booking)
+    store.record_cancellation("u1", CANCELLATION)
+    store.record_booking("u2", BOOKINGS[0])
+
+    assert store.summary("u1") == UserBehavior.from_bookings(BOOKINGS, [CANCELLATION]).summary()
+    assert store.summary("u2")["bookingCount"] == 1
+    assert store.summary("nobody") is None
+    assert store.stats()["users"] == 2
+    store.close()
+
+    if persisted:
+        # A second process (or a restart) sees the same aggregates
+        reopened = BehaviorStore(db_path)
+        assert reopened.summary("u1")["cancellationCount"] == 1
+        reopened.close()
+
+
+def test_state_keeps_only_recent_booking_days(monkeypatch):
+    monkeypatch.setattr(behavior_store, "BEHAVIOR_DAY_WINDOW", 7)
+    behavior = UserBehavior()
+    for day in range(1, 31):
+        behavior.add_booking({"bookingDate": f"2024-03-{day:02d}T10:00:00Z", "leadTime": 1, "boatId": "a"})
+    behavior.add_booking({"bookingDate": "2024-03-30T11:00:00Z", "leadTime": 1, "boatId": "a"})
+
+    assert len(behavior.bookings_per_day) <= 8
+    assert min(behavior.bookings_per_day) == "2024-03-23"
+    summary = behavior.summary()
+    assert summary["bookingCount"] == 31 and summary["multipleBookings"] == 2
+    assert summary["avgTimeBetweenBookings"] == pytest.approx((29 * 24 + 1) / 30)
+
+
+def test_memory_store_evicts_least_recently_updated_users():
+    store = BehaviorStore(max_users=2)
+    store.record_booking("u1", BOOKINGS[0])
+    store.record_booking("u2", BOOKINGS[0])
+    store.record_booking("u1", BOOKINGS[1])
+    store.record_booking("u3", BOOKINGS[0])
+
+    assert store.summary("u2") is None
+    assert store.summary("u1")["bookingCount"] == 2
+    assert store.stats()["users"] == 2 and store.stats()["evictions"] == 1
+
+
+def test_unreadable_booking_dates_are_treated_as_undated():
+    behavior = UserBehavior.from_bookings(
+        bookings=[{"bookingDate": "2024-03-01T10:00:00Z", "leadTime": 1, "boatId": "a"},
+                  {"bookingDate": "03/01/2024", "leadTime": 3, "boatId": "b"}],
+        cancellations=[{"bookingDate": "last tuesday", "timeBeforeDeparture": 5, "timeSinceBooking": 2}])
+
+    summary = behavior.summary()
+    assert summary["bookingCount"] == 2 and summary["cancellationCount"] == 1
+    assert summary["avgTimeBetweenBookings"] is None and summary["multipleBookingsCanceled"] == 0
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import json
+from benchmark_service import latency_summary, compare
+from synthetic_bookings import generate_booking_payloads, generate_synthetic_bookings
+
+
+def test_payloads_are_deterministic_and_json_ready():
+    payloads = generate_booking_payloads(50, seed=3)
+    assert payloads == generate_booking_payloads(50, seed=3)
+    assert json.loads(json.dumps(payloads)) == payloads
+    assert all(payload['lead_time'] >= 1 and payload['no_of_adults'] >= 1 for payload in payloads)
+    assert len(generate_synthetic_bookings(50, seed=3)) == 50
+
+
+def test_latency_summary_percentiles():
+    summary = latency_summary([i / 1000.0 for i in range(1, 101)])
+    assert summary['p50Ms'] == 50.5
+    assert summary['maxMs'] == 100.0
+
+
+def test_compare_reports_regressions_as_positive():
+    url = 'http://localhost:5001/predict'
+    baseline = {'http': [{'url': url, 'concurrency': 8, 'p50Ms': 10.0, 'p95Ms': 20.0, 'p99Ms': 30.0, 'throughputRps': 400.0}]}
+    current = {'http': [{'url': url, 'concurrency': 8, 'p50Ms': 12.0, 'p95Ms': 20.0, 'p99Ms': 27.0, 'throughputRps': 300.0}]}
+    changes = compare(baseline, current)
+
+    assert changes[f"http/{url}@8/p50Ms"]['regressionPct'] == 20.0
+    assert changes[f"http/{url}@8/p99Ms"]['regressionPct'] == -10.0
+    assert changes[f"http/{url}@8/throughputRps"]['regressionPct'] == 25.0
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import json
+import pandas as pd
+from bulk_score import bookings_to_features, score_file
+from predict_rules import predict_fraud
+from synthetic_bookings import generate_booking_payloads
+
+
+def write_hotel_csv(path, rows=300):
+    frame = pd.DataFrame(generate_booking_payloads(rows, seed=11))
+    frame.insert(0, 'Booking_ID', [f"INN{i:05d}" for i in range(rows)])
+    # Hotel_Reservations.csv stores repeated_guest as 0/1
+    frame['repeated_guest'] = (frame['repeated_guest'] == 'Yes').astype(int)
+    frame.to_csv(path, index=False)
+    return frame
+
+
+def test_rules_scores_match_predict_fraud_in_chunks(tmp_path):
+    frame = write_hotel_csv(tmp_path / 'hotel.csv')
+    summary = score_file(str(tmp_path / 'hotel.csv'), str(tmp_path / 'scores.csv'), chunk_size=64, workers=1)
+    scores = pd.read_csv(tmp_path / 'scores.csv')
+
+    assert summary['rows'] == len(frame) == len(scores)
+    assert scores['Booking_ID'].tolist() == frame['Booking_ID'].tolist()
+    for booking, score in zip(frame.to_dict('records'), scores.to_dict('records')):
+        booking['repeated_guest'] = 'Yes' if booking['repeated_guest'] == 1 else 'No'
+        expected = predict_fraud(booking)
+        assert abs(score['rules_probability'] - expected['fraud_probability']) < 1e-12
+        assert score['rules_risk_level'] == expected['risk_level']
+        assert bool(score['is_fraud']) == expected['is_fraud']
+
+
+def test_process_pool_keeps_input_order(tmp_path):
+    write_hotel_csv(tmp_path / 'hotel.csv', rows=500)
+    score_file(str(tmp_path / 'hotel.csv'), str(tmp_path / 'one.jsonl'), chunk_size=50, workers=1)
+    score_file(str(tmp_path / 'hotel.csv'), str(tmp_path / 'two.jsonl'), chunk_size=50, workers=2)
+    assert (tmp_path / 'one.jsonl').read_text() == (tmp_path / 'two.jsonl').read_text()
+
+
+def test_jsonl_output_has_one_record_per_line(tmp_path):
+    frame = write_hotel_csv(tmp_path / 'hotel.csv', rows=120)
+    score_file(str(tmp_path / 'hotel.csv'), str(tmp_path / 'scores.jsonl'), chunk_size=50, workers=1)
+
+    text = (tmp_path / 'scores.jsonl').read_text()
+    assert text.endswith('}\n')
+    records = [json.loads(line) for line in text.split('\n')[:-1]]
+    assert [record['Booking_ID'] for record in records] == frame['Booking_ID'].tolist()
+
+
+def test_exported_booking_documents(tmp_path):
+    bookings = [
+        {'_id': 'a', 'startDate': '2026-01-11T00:00:00.000Z', 'endDate': '2026-01-13T00:00:00.000Z',
+         'passengers': {'adults': 2, 'children': 1}, 'totalAmount': 300, 'specialRequests': 'cake',
+         'cancellationHistory': {'count': 1, 'totalBookings': 4}},
+        {'_id': 'b', 'startDate': '2026-01-10T00:00:00.000Z', 'passengers': {'adults': 1}}
+    ]
+    features = bookings_to_features(pd.json_normalize(bookings), now=pd.Timestamp('2026-01-01'))
+    assert features['lead_time'].tolist() == [10, 9]
+    assert features['no_of_week_nights'].tolist() == [2, 1]
+    assert features['avg_price_per_room'].tolist() == [150.0, 0.0]
+    assert features['no_of_special_requests'].tolist() == [1.0, 0.0]
+    assert features['no_of_previous_bookings_not_canceled'].tolist() == [3, 0]
+    assert features['repeated_guest'].tolist() == ['Yes', 'No']
+
+    path = tmp_path / 'bookings.jsonl'
+    path.write_text('\n'.join(json.dumps(booking) for booking in bookings) + '\n')
+    score_file(str(path), str(tmp_path / 'scores.csv'), workers=1)
+    assert pd.read_csv(tmp_path / 'scores.csv')['_id'].tolist() == ['a', 'b']
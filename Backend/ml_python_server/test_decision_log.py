@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import time
+import threading
+from decision_log import DecisionLog, page_cursor, probability_bucket
+
+DAY = 86400
+
+
+def result(probability):
+    return {"fraud_probability": probability, "is_fraud": probability > 0.5, "risk_level": "x", "rule_based": True}
+
+
+def test_rollups_and_pages_match_the_logged_decisions(tmp_path):
+    path = str(tmp_path / "decisions.db")
+    log = DecisionLog(path, batch_size=3)
+    now = time.time()
+    probabilities = [0.05, 0.55, 0.75, 0.95, 0.35, 0.8]
+    for i, probability in enumerate(probabilities):
+        log.record({"bookingId": f"b{i}", "userId": "u1", "totalAmount": 100}, result(probability),
+                   decided_at=now - i * DAY)
+    log.record({"bookingId": "old", "avg_price_per_room": 50, "no_of_week_nights": 2}, result(0.9),
+               decided_at=now - 40 * DAY)
+    log.flush(timeout=10)
+    assert log.stats()["written"] == 7
+
+    reader = DecisionLog(path, read_only=True)
+    since = now - 10 * DAY
+    since_day = time.strftime('%Y-%m-%d', time.localtime(since))
+
+    summary = reader.summary(since_day)
+    assert summary["decisions"] == 6
+    assert summary["flagged"] == 4
+    assert summary["highRisk"] == 3
+    assert summary["amount"] == 600
+    assert summary["histogram"][probability_bucket(0.95)] == 1
+    assert reader.summary()["amount"] == 700
+    assert sum(row[1] for row in reader.daily(since_day)) == 6
+
+    assert reader.count_at_least(0.5, since) == 4
+    first = reader.page_at_least(0.5, since, limit=3)
+    second = reader.page_at_least(0.5, since, limit=3, after=page_cursor(first[-1]))
+    assert [row["booking_id"] for row in first + second] == ["b3", "b5", "b2", "b1"]
+    assert first[0]["source"] == "rules"
+    assert reader.page_at_least(0.5, since, limit=3, after=page_cursor(second[-1])) == []
+
+
+def test_pages_do_not_skip_or_repeat_ties(tmp_path):
+    log = DecisionLog(str(tmp_path / "decisions.db"))
+    now = time.time()
+    # Equal probabilities and timestamps are ordered by id
+    for i in range(10):
+        log.record({"bookingId": f"b{i}"}, result(0.9 if i % 3 else 0.6), decided_at=now - (i // 4))
+    log.flush(timeout=10)
+
+    seen, after = [], None
+    while True:
+        page = log.page_at_least(0.5, limit=3, after=after)
+        if not page:
+            break
+        seen.extend(row["booking_id"] for row in page)
+        after = page_cursor(page[-1])
+    expected = log.page_at_least(0.5, limit=100)
+    assert seen == [row["booking_id"] for row in expected]
+    assert sorted(seen) == sorted(f"b{i}" for i in range(10))
+
+
+def test_concurrent_reads_share_one_connection(tmp_path):
+    path = str(tmp_path / "decisions.db")
+    log = DecisionLog(path)
+    for i in range(50):
+        log.record({"bookingId": f"b{i}"}, result(0.9))
+    log.flush(timeout=10)
+
+    reader = DecisionLog(path, read_only=True)
+    opened = []
+    connect = reader._connect
+
+    def slow_connect():
+        opened.append(1)
+        time.sleep(0.05)
+        return connect()
+
+    reader._connect = slow_connect
+    barrier = threading.Barrier(8)
+    counts = []
+
+    def read():
+        barrier.wait()
+        counts.append(reader.count_at_least(0.5))
+        counts.append(len(reader.page_at_least(0.5, limit=10)))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 1
+    assert sorted(set(counts)) == [10, 50]
+
+
+def test_disabled_without_a_path():
+    log = DecisionLog(None)
+    assert log.record({"bookingId": "b1"}, result(0.9)) is False
+    assert log.stats()["enabled"] is False
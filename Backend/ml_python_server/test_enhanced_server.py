@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import threading
+import pytest
+import enhanced_server
+from ml_model import FraudDetectionModel
+from model_manager import ModelManager, RULES_VERSION
+from predict_rules import predict_fraud
+
+
+def booking(lead_time, **fields):
+    data = {"userId": "u1", "lead_time": lead_time, "no_of_adults": 2, "avg_price_per_room": 120}
+    data.update(fields)
+    return data
+
+
+class PartialModel:
+    """Scores like `model` but leaves bookings without a userId to the rule engine"""
+
+    version = "partial-v1"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_batch(self, bookings):
+        results = self.model.predict_batch(bookings)
+        return [result if data.get('userId') else None for data, result in zip(bookings, results)]
+
+
+@pytest.fixture
+def client():
+    return enhanced_server.app.test_client()
+
+
+def test_batch_keeps_input_order_and_isolates_errors(client, monkeypatch, fraud_model):
+    monkeypatch.setattr(enhanced_server.model_manager, "get_model", lambda: PartialModel(fraud_model))
+    bookings = [booking(1), "not a booking", {"no_of_adults": 2}, booking(5, userId=None), booking(300)]
+
+    response = client.post('/predict/batch', json={"bookings": bookings})
+    assert response.status_code == 200
+    body = response.get_json()
+    results = body["results"]
+
+    assert body["count"] == 5 and body["errors"] == 2
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert results[1]["error"] == "Booking must be a JSON object"
+    assert results[2]["error"] == "Missing required fields"
+
+    for index in (0, 4):
+        expected = fraud_model.predict(bookings[index])
+        assert results[index]["modelVersion"] == "partial-v1"
+        assert results[index]["fraud_probability"] == pytest.approx(expected["fraud_probability"])
+
+    # The model could not score this one, so the rule engine did
+    assert results[3]["modelVersion"] == RULES_VERSION
+    assert results[3]["rule_based"] is True
+    assert results[3]["fraud_probability"] == predict_fraud(bookings[3])["fraud_probability"]
+
+
+def test_batch_rejects_non_list_payloads(client):
+    response = client.post('/predict/batch', json={"bookings": {"lead_time": 1}})
+    assert response.status_code == 400
+
+
+def test_ready_only_after_the_model_loads(client, monkeypatch, tmp_path, write_model):
+    paths = write_model(str(tmp_path / "model"))
+    release = threading.Event()
+
+    def slow_factory(**overrides):
+        release.wait(10)
+        return FraudDetectionModel(backend='numpy', **paths)
+
+    manager = ModelManager(factory=slow_factory)
+    monkeypatch.setattr(enhanced_server, "model_manager", manager)
+    manager.start()
+    try:
+        response = client.get('/health/ready')
+        assert response.status_code == 503
+        assert response.get_json()["state"] == "loading"
+
+        # Requests are answered by the rule engine until the model is ready
+        response = client.post('/predict', json=booking(1, userId="u-ready"))
+        assert response.status_code == 200
+        assert response.get_json()["modelVersion"] == RULES_VERSION
+        assert response.get_json()["rule_based"] is True
+    finally:
+        release.set()
+
+    assert manager.wait(10)
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    assert response.get_json()["modelLoaded"] is True
+    assert client.get('/health/live').status_code == 200
+
+    response = client.post('/predict', json=booking(1, userId="u-ready"))
+    assert response.get_json()["modelVersion"] == manager.version != RULES_VERSION
+
+
+def test_failed_load_is_ready_with_rule_fallback(client, monkeypatch):
+    def missing_factory(**overrides):
+        raise FileNotFoundError("no model files")
+
+    manager = ModelManager(factory=missing_factory)
+    monkeypatch.setattr(enhanced_server, "model_manager", manager)
+    manager.load()
+
+    body = client.get('/health/ready').get_json()
+    assert body["ready"] is True and body["modelLoaded"] is False and body["state"] == "failed"
+    assert client.post('/predict', json=booking(1)).get_json()["modelVersion"] == RULES_VERSION
+
+
+@pytest.mark.parametrize("body", ['null', '["model_dir"]', '"model"'])
+def test_reload_rejects_bodies_that_are_not_objects(client, monkeypatch, body):
+    monkeypatch.setattr(enhanced_server, "ADMIN_TOKEN", "secret")
+    response = client.post('/admin/reload-model', data=body, content_type='application/json',
+                           headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Request body must be a JSON object"
+
+
+def test_compare_patterns_tolerates_unreadable_cancellation_dates(client):
+    response = client.post("/compare-boat-patterns", json={
+        "userId": "u1",
+        "cancellations": [{"bookingDate": "12/03/2024", "timeBeforeDeparture": 24, "timeSinceBooking": 2,
+                           "originalBookingData": {"adults": 2, "children": 0}}]
+    })
+    assert response.status_code == 200
+    assert response.get_json()["dataPoints"]["user"]["avgLeadTime"] == 24
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+from feature_schema import MODEL_SCHEMA, RULES_SCHEMA, TFJS_SCHEMA, FeatureRecord, get_schema
+from synthetic_bookings import generate_synthetic_bookings, generate_booking_payloads
+
+
+def test_record_reads_defaults_converters_and_derived_features():
+    record = MODEL_SCHEMA.record({'lead_time': 1, 'repeated_guest': 'Yes', 'no_of_previous_cancellations': 3})
+
+    assert isinstance(record, FeatureRecord) and not hasattr(record, '__dict__')
+    assert record['no_of_adults'] == 1.0  # default
+    assert record['avg_price_per_room'] == 100.0
+    assert record['repeated_guest'] == 1.0
+    assert record['very_short_lead'] == 1.0
+    assert record['cancellation_ratio'] == 3 / 3.1
+    assert list(record.keys()) == list(MODEL_SCHEMA.names)
+    assert MODEL_SCHEMA.record({})['cancellation_ratio'] == 0.0
+
+
+def test_derive_on_frames_matches_records():
+    frame = generate_synthetic_bookings(200, seed=3)
+    MODEL_SCHEMA.derive(frame)
+    frame['repeated_guest'] = (frame['repeated_guest'] == 'Yes') * 1.0
+    records = [MODEL_SCHEMA.record(booking) for booking in generate_booking_payloads(200, seed=3)]
+
+    np.testing.assert_array_equal(MODEL_SCHEMA.matrix(records), frame[list(MODEL_SCHEMA.names)].to_numpy(float))
+
+
+def test_frame_matrix_matches_records_with_missing_values():
+    payloads = generate_booking_payloads(100, seed=4)
+    for payload in payloads[::3]:
+        del payload['avg_price_per_room']
+    frame = pd.DataFrame(payloads)
+
+    expected = MODEL_SCHEMA.matrix([MODEL_SCHEMA.record(payload) for payload in payloads])
+    np.testing.assert_array_equal(MODEL_SCHEMA.frame_matrix(frame), expected)
+
+
+def test_matrix_reorders_into_contiguous_rows():
+    records = [RULES_SCHEMA.record({'lead_time': i, 'no_of_adults': 2}) for i in range(3)]
+    columns = RULES_SCHEMA.positions(['no_of_adults', 'lead_time'])
+    rows = RULES_SCHEMA.matrix(records, columns)
+
+    assert rows.flags['C_CONTIGUOUS'] and rows.dtype == np.float64
+    assert rows.tolist() == [[2.0, 0.0], [2.0, 1.0], [2.0, 2.0]]
+    assert RULES_SCHEMA.read({})[-1] == 1.0  # booking_to_departure_ratio default
+
+
+def test_aliases_digest_and_registry():
+    assert TFJS_SCHEMA.record({'lead_time': 5, 'leadTime': None})['leadTime'] == 5.0
+    assert TFJS_SCHEMA.record({'leadTime': 0, 'lead_time': 5})['leadTime'] == 0.0
+
+    first = MODEL_SCHEMA.record({'lead_time': 10, 'no_of_adults': 2, 'ignored': 'x'})
+    second = MODEL_SCHEMA.record({'no_of_adults': 2.0, 'lead_time': 10})
+    assert first.digest() == second.digest()
+    assert first.digest() != MODEL_SCHEMA.record({'lead_time': 11, 'no_of_adults': 2}).digest()
+
+    assert get_schema('model') is MODEL_SCHEMA
+    assert get_schema('rules', 1) is RULES_SCHEMA
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import json
+import queue
+import logging
+from logging_setup import JsonFormatter, NonBlockingQueueHandler, SamplingFilter
+
+
+def make_record(level=logging.INFO, msg="Prediction %.2f", args=(0.5,)):
+    return logging.LogRecord("fraud_detection_server.requests", level, __file__, 1, msg, args, None)
+
+
+def test_sampling_keeps_warnings_and_a_fraction_of_info():
+    never = SamplingFilter(0.0)
+    assert not never.filter(make_record())
+    assert never.filter(make_record(level=logging.WARNING))
+    assert SamplingFilter(1.0).filter(make_record())
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    record = make_record()
+    handler.handle(record)
+    handler.handle(make_record())
+
+    queued = handler.queue.get_nowait()
+    assert queued is record and queued.msg == "Prediction %.2f"
+    assert handler.dropped == 1
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record()
+    record.fields = {"bookingId": "b-1"}
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Prediction 0.50"
+    assert entry["bookingId"] == "b-1"
+    assert entry["level"] == "INFO"
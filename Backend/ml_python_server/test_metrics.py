@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import os
+import subprocess
+import sys
+import textwrap
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from flask import Flask
+from metrics import register_metrics, time_stage, count_prediction
+
+
+def make_app():
+    app = Flask(__name__)
+    register_metrics(app)
+
+    @app.route('/score/<booking_id>', methods=['POST'])
+    def score(booking_id):
+        with time_stage('validate'):
+            pass
+        count_prediction('rules')
+        return {'bookingId': booking_id}
+
+    return app
+
+
+def test_metrics_endpoint_reports_routes_stages_and_sources():
+    client = make_app().test_client()
+    for booking_id in ('a', 'b'):
+        assert client.post(f'/score/{booking_id}').status_code == 200
+
+    body = client.get('/metrics').get_data(as_text=True)
+
+    # Labelled by route pattern, not by the raw path
+    assert 'fraud_http_requests_total{method="POST",route="/score/<booking_id>",status="200"}' in body
+    assert '/score/a' not in body
+    assert 'fraud_http_request_duration_seconds_bucket' in body
+    assert 'fraud_prediction_stage_seconds_count{stage="validate"}' in body
+    assert 'fraud_predictions_total{source="rules"}' in body
+
+
+def test_multiprocess_dir_aggregates_workers(tmp_path):
+    # Each "worker" is a separate process writing to the shared directory
+    worker = textwrap.dedent("""
+        from metrics import count_prediction
+        count_prediction('ml', 3)
+    """)
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    here = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', worker], cwd=here, env=env, check=True)
+
+    reader = textwrap.dedent("""
+        from flask import Flask
+        from metrics import register_metrics
+        print(register_metrics(Flask('reader')).test_client().get('/metrics').get_data(as_text=True))
+    """)
+    output = subprocess.run([sys.executable, '-c', reader], cwd=here, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    assert 'fraud_predictions_total{source="ml"} 6.0' in output
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+import pytest
+
+BOOKINGS = [
+    {"lead_time": 30, "no_of_adults": 2, "no_of_children": 1, "avg_price_per_room": 150, "repeated_guest": "Yes"},
+    {"lead_time": 1, "no_of_adults": 2, "no_of_children": 4, "avg_price_per_room": 40,
+     "no_of_previous_cancellations": 3, "multiple_bookings_same_day": 3},
+    {"lead_time": "soon", "no_of_adults": 2},
+    {"lead_time": 400, "no_of_adults": 1, "avg_price_per_room": 90}
+]
+
+
+def test_predict_batch_matches_predict(fraud_model):
+    results = fraud_model.predict_batch(BOOKINGS)
+
+    assert len(results) == len(BOOKINGS)
+    # Bookings whose features cannot be read are left for the rule engine
+    assert results[2] is None and fraud_model.predict(BOOKINGS[2]) is None
+    for booking, result in zip(BOOKINGS, results):
+        if result is None:
+            continue
+        expected = fraud_model.predict(booking)
+        assert result["fraud_probability"] == pytest.approx(expected["fraud_probability"], abs=1e-12)
+        assert result["risk_level"] == expected["risk_level"]
+        assert result["indicators"] == expected["indicators"]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import time
+import numpy as np
+import pytest
+from ml_model import FraudDetectionModel
+from model_manager import ModelManager, CanaryCheckError, check_canary
+
+
+def numpy_factory(**paths):
+    return FraudDetectionModel(backend='numpy', **paths)
+
+
+def loaded_manager(paths):
+    manager = ModelManager(factory=lambda **overrides: numpy_factory(**(overrides or paths)))
+    assert manager.load()
+    return manager
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_canary_rejects_unusable_probabilities(tmp_path, write_model):
+    broken = numpy_factory(**write_model(str(tmp_path / "broken"), broken=True))
+    with pytest.raises(CanaryCheckError):
+        check_canary(broken)
+    assert all(0.0 <= p <= 1.0 for p in check_canary(numpy_factory(**write_model(str(tmp_path / "ok")))))
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_failed_canary_keeps_the_active_model(tmp_path, write_model):
+    manager = loaded_manager(write_model(str(tmp_path / "v1")))
+    active = manager.get_model()
+
+    result = manager.reload(**write_model(str(tmp_path / "broken"), broken=True))
+    assert result["success"] is False
+    assert result["error"].startswith("Canary booking")
+    assert manager.get_model() is active
+    assert manager.version == result["activeVersion"] == active.version
+    assert manager.reload_count == 0
+
+
+def test_successful_reload_swaps_and_bumps_the_version(tmp_path, write_model):
+    manager = loaded_manager(write_model(str(tmp_path / "v1"), seed=1))
+    previous_version = manager.version
+    swaps = []
+    manager.add_swap_listener(lambda previous, model: swaps.append((previous.version, model.version)))
+
+    result = manager.reload(**write_model(str(tmp_path / "v2"), seed=2))
+    assert result["success"] is True
+    assert result["previousVersion"] == previous_version
+    assert manager.version == result["activeVersion"] != previous_version
+    assert manager.reload_count == 1
+    assert swaps == [(previous_version, manager.version)]
+
+
+def test_watcher_reloads_from_the_watched_directory(tmp_path, write_model):
+    manager = loaded_manager(write_model(str(tmp_path / "default"), seed=1))
+    watched = str(tmp_path / "watched")
+    write_model(watched, seed=2)
+    previous_version = manager.version
+
+    manager.start_watching(watched, interval=0.05)
+    try:
+        time.sleep(0.1)
+        write_model(watched, seed=3)
+        deadline = time.monotonic() + 10
+        while manager.version == previous_version and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        manager.stop_watching()
+
+    model = manager.get_model()
+    assert manager.version != previous_version
+    assert model.numpy_weights_path.startswith(watched)
+    expected = numpy_factory(model_dir=watched)
+    booking = {"lead_time": 3, "no_of_adults": 2, "avg_price_per_room": 80}
+    assert np.isclose(model.predict(booking)["fraud_probability"], expected.predict(booking)["fraud_probability"])
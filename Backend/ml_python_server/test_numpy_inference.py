@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import numpy as np
+import pytest
+from numpy_inference import NumpyDenseModel
+
+
+def random_layers(rng, sizes, activations):
+    return [(rng.normal(size=(n_in, n_out)), rng.normal(size=n_out), activation)
+            for (n_in, n_out), activation in zip(zip(sizes, sizes[1:]), activations)]
+
+
+def test_forward_pass_matches_reference():
+    rng = np.random.default_rng(0)
+    layers = random_layers(rng, [13, 8, 1], ['relu', 'sigmoid'])
+    model = NumpyDenseModel(layers)
+    x = rng.normal(size=(5, 13))
+
+    (k1, b1, _), (k2, b2, _) = layers
+    expected = 1 / (1 + np.exp(-(np.maximum(x @ k1 + b1, 0) @ k2 + b2)))
+
+    output = model.predict(x)
+    assert output.shape == (5, 1)
+    np.testing.assert_allclose(output, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    rng = np.random.default_rng(1)
+    model = NumpyDenseModel(random_layers(rng, [13, 16, 4, 1], ['relu', 'relu', 'sigmoid']))
+    path = tmp_path / "weights.npz"
+    model.save(str(path))
+
+    loaded = NumpyDenseModel.load(str(path))
+    x = rng.normal(size=(20, 13))
+    np.testing.assert_array_equal(loaded.predict(x), model.predict(x))
+
+
+def test_matches_keras_probabilities():
+    tf = pytest.importorskip("tensorflow")
+    keras = tf.keras
+
+    # Same architecture as train_boat_fraud_model.py
+    tf.random.set_seed(3)
+    model = keras.Sequential([
+        keras.layers.Input(shape=(13,)),
+        keras.layers.Dense(64, activation='relu'),
+        keras.layers.Dropout(0.3),
+        keras.layers.Dense(32, activation='relu'),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(16, activation='relu'),
+        keras.layers.Dense(1, activation='sigmoid')
+    ])
+    x = np.random.default_rng(2).normal(size=(256, 13)).astype(np.float32)
+
+    expected = model.predict(x, verbose=0)
+    output = NumpyDenseModel.from_keras(model).predict(x)
+    np.testing.assert_allclose(output, expected, atol=1e-5)
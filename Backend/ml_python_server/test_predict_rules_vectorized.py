@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import random
+import pytest
+import numpy as np
+from predict_rules import predict_fraud
+from predict_rules_vectorized import predict_fraud_columns, decode_indicators, RISK_LEVELS
+
+# Message prefixes emitted by predict_fraud for each indicator flag
+INDICATOR_PREFIXES = {
+    "high_previous_cancellations": "High number of previous cancellations",
+    "very_short_lead_time": "Very short lead time",
+    "very_long_lead_time": "Unusually long lead time",
+    "low_price_per_person": "Unusually low price per person",
+    "high_children_to_adults": "Unusually high number of children",
+    "one_night_special_requests": "One-night stay",
+    "no_booking_changes": "No booking changes",
+    "multiple_bookings_same_day": "User has made",
+    "multiple_bookings_with_cancellations": "Pattern of multiple bookings",
+    "high_risk_pattern": "High-risk pattern",
+    "zero_adults": "Booking with zero adults",
+    "quick_cancellations": "Pattern of very quick cancellations"
+}
+
+
+def generate_bookings(n, seed=7):
+    """Random bookings that exercise every rule boundary"""
+    rng = random.Random(seed)
+    bookings = []
+    for _ in range(n):
+        bookings.append({
+            'lead_time': rng.choice([0, 1, 2, 3, 7, 14, 15, 30, 31, 120, 121, 365, 366, rng.randint(0, 500)]),
+            'no_of_adults': rng.choice([0, 1, 2, 3, 4, 5]),
+            'no_of_children': rng.choice([0, 1, 2, 3, 5, 9]),
+            'no_of_weekend_nights': rng.choice([0, 1, 2]),
+            'no_of_week_nights': rng.choice([0, 1, 3]),
+            'required_car_parking_space': rng.choice([0, 1]),
+            'repeated_guest': rng.choice(['Yes', 'No']),
+            'no_of_previous_cancellations': rng.choice([0, 1, 2, 3, 4, 7]),
+            'no_of_previous_bookings_not_canceled': rng.choice([0, 1, 2, 5]),
+            'avg_price_per_room': rng.choice([0, 19.99, 40, 79.5, 80, 150, rng.uniform(0, 300)]),
+            'no_of_special_requests': rng.choice([0, 1, 2, 3, 4]),
+            'no_of_booking_changes': rng.choice([0, 1, 2]),
+            'multiple_bookings_same_day': rng.choice([0, 1, 2, 3, 4, 6]),
+            'booking_to_departure_ratio': rng.choice([0.02, 0.09, 0.1, 0.5, 1.0])
+        })
+    return bookings
+
+
+def to_columns(bookings):
+    return {name: [b[name] for b in bookings] for name in bookings[0]}
+
+
+def assert_parity(bookings, columns):
+    result = predict_fraud_columns(columns)
+
+    for i, booking in enumerate(bookings):
+        expected = predict_fraud(booking)
+        assert result['fraud_probability'][i] == expected['fraud_probability'], booking
+        assert bool(result['is_fraud'][i]) == expected['is_fraud'], booking
+        assert RISK_LEVELS[result['risk_level'][i]] == expected['risk_level'], booking
+
+        flags = decode_indicators(result['indicators'][i])
+        assert len(flags) == len(expected['indicators']), booking
+        for flag, message in zip(flags, expected['indicators']):
+            assert message.startswith(INDICATOR_PREFIXES[flag]), (flag, message)
+
+
+def test_vectorized_rules_match_scalar():
+    bookings = generate_bookings(5000)
+    assert_parity(bookings, {name: np.array(values) for name, values in to_columns(bookings).items()})
+
+
+def test_vectorized_rules_missing_columns_use_defaults():
+    bookings = [{'lead_time': lt, 'no_of_adults': a} for lt, a in [(0, 0), (10, 2), (400, 1), (45, 3)]]
+    assert_parity(bookings, to_columns(bookings))
+
+
+def test_vectorized_rules_accept_dataframe():
+    pd = pytest.importorskip("pandas")
+
+    bookings = generate_bookings(500, seed=11)
+    assert_parity(bookings, pd.DataFrame(bookings))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import socket
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BOOKING = {"lead_time": 1, "no_of_adults": 2, "no_of_previous_cancellations": 3}
+
+
+def test_serve_mode_answers_each_line_in_order():
+    requests = "\n".join([
+        json.dumps(dict(BOOKING, requestId=1)),
+        "{not json",
+        json.dumps({"no_of_adults": 2, "requestId": 3}),
+        ""
+    ]) + "\n"
+    output = subprocess.run([sys.executable, "predict_simple.py", "--serve"], cwd=HERE, input=requests,
+                            capture_output=True, text=True, timeout=30, check=True).stdout
+    results = [json.loads(line) for line in output.splitlines()]
+
+    assert len(results) == 3
+    assert results[0]["requestId"] == 1 and results[0]["rule_based"] is True
+    assert results[1]["error"] == "Invalid JSON input"
+    assert results[2] == {"error": "Missing required fields",
+                          "details": "The following fields are required: lead_time", "requestId": 3}
+
+
+def test_socket_mode_serves_several_requests_per_connection(tmp_path):
+    path = str(tmp_path / "predict.sock")
+    worker = subprocess.Popen([sys.executable, "predict_simple.py", "--socket", path], cwd=HERE)
+    try:
+        deadline = time.time() + 20
+        while not os.path.exists(path) and time.time() < deadline:
+            time.sleep(0.05)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+            client.sendall((json.dumps(dict(BOOKING, requestId="a")) + "\n" +
+                            json.dumps(dict(BOOKING, requestId="b")) + "\n").encode())
+            reader = client.makefile("r")
+            first, second = json.loads(reader.readline()), json.loads(reader.readline())
+
+        assert (first["requestId"], second["requestId"]) == ("a", "b")
+        assert first["fraud_probability"] == second["fraud_probability"]
+    finally:
+        worker.terminate()
+        worker.wait(timeout=10)
+    assert not os.path.exists(path)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import time
+from prediction_cache import PredictionCache
+
+
+class KeyedModel:
+    def __init__(self, version):
+        self.version = version
+
+    def feature_key(self, booking):
+        return f"{booking['lead_time']}-{booking['no_of_adults']}"
+
+
+def test_hit_returns_independent_copy():
+    cache = PredictionCache(max_size=10, ttl=60)
+    model = KeyedModel("v1")
+    key = cache.key(model, {"lead_time": 5, "no_of_adults": 2, "ignored": "x"})
+    assert cache.get(key) is None
+
+    cache.put(key, {"fraud_probability": 0.3, "indicators": []})
+    result = cache.get(cache.key(model, {"no_of_adults": 2, "lead_time": 5}))
+    result["timestamp"] = "now"
+    result["indicators"].append("changed")
+
+    assert cache.get(key) == {"fraud_probability": 0.3, "indicators": []}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_version_is_part_of_key():
+    cache = PredictionCache(max_size=10, ttl=60)
+    booking = {"lead_time": 5, "no_of_adults": 2}
+    cache.put(cache.key(KeyedModel("v1"), booking), {"fraud_probability": 0.3})
+    assert cache.get(cache.key(KeyedModel("v2"), booking)) is None
+
+
+def test_lru_eviction_ttl_and_swap_invalidation():
+    cache = PredictionCache(max_size=2, ttl=60)
+    for key in ("a", "b"):
+        cache.put(key, {"key": key})
+    cache.get("a")
+    cache.put("c", {"key": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"key": "a"}
+
+    cache.on_model_swap(None, None)
+    assert cache.stats()["size"] == 0
+
+    short = PredictionCache(max_size=2, ttl=0.01)
+    short.put("a", {"key": "a"})
+    time.sleep(0.02)
+    assert short.get("a") is None
+    assert short.stats()["expirations"] == 1
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import threading
+from request_batcher import MicroBatcher
+
+
+class RecordingModel:
+    def __init__(self, name):
+        self.name = name
+        self.batch_sizes = []
+
+    def predict(self, booking):
+        return {"model": self.name, "id": booking["id"]}
+
+    def predict_batch(self, bookings):
+        self.batch_sizes.append(len(bookings))
+        return [self.predict(booking) for booking in bookings]
+
+
+def run_concurrently(batcher, calls):
+    results = [None] * len(calls)
+    barrier = threading.Barrier(len(calls))
+
+    def call(index, model, booking):
+        barrier.wait()
+        results[index] = batcher.predict(model, booking)
+
+    threads = [threading.Thread(target=call, args=(i, model, booking)) for i, (model, booking) in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_requests_share_forward_passes():
+    model = RecordingModel("a")
+    batcher = MicroBatcher(max_latency_ms=50, max_batch_size=8)
+    results = run_concurrently(batcher, [(model, {"id": i}) for i in range(20)])
+
+    assert [result["id"] for result in results] == list(range(20))
+    assert sum(model.batch_sizes) == 20
+    assert max(model.batch_sizes) <= 8
+    assert len(model.batch_sizes) < 20
+
+    stats = batcher.stats()
+    assert stats["requests"] == 20
+    assert sum(stats["batchSizeHistogram"].values()) == stats["batches"]
+
+
+def test_requests_are_grouped_by_model():
+    old, new = RecordingModel("old"), RecordingModel("new")
+    batcher = MicroBatcher(max_latency_ms=50, max_batch_size=16)
+    calls = [(old if i % 2 else new, {"id": i}) for i in range(10)]
+    results = run_concurrently(batcher, calls)
+
+    for (model, booking), result in zip(calls, results):
+        assert result == {"model": model.name, "id": booking["id"]}
+
+
+def test_disabled_batcher_calls_predict_directly():
+    model = RecordingModel("a")
+    batcher = MicroBatcher(max_latency_ms=0)
+    assert batcher.predict(model, {"id": 1}) == {"model": "a", "id": 1}
+    assert model.batch_sizes == []
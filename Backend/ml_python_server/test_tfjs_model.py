@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import os
+import json
+import numpy as np
+from tfjs_model import TfjsFraudModel, TFJS_FEATURE_NAMES, load_tfjs_layers_model
+
+SHIPPED_MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'models', 'fraud_detection_model')
+
+
+def write_tfjs_model(model_dir, layers, means, std_devs):
+    """Write a layers-model in the format produced by tfjs model.save()"""
+    topology_layers = []
+    manifest = []
+    buffer = b''
+    for i, (kernel, bias, activation) in enumerate(layers):
+        name = f"dense_{i + 1}"
+        topology_layers.append({"class_name": "Dense", "config": {
+            "units": kernel.shape[1], "activation": activation, "use_bias": True, "name": name}})
+        if i == 0:
+            topology_layers.append({"class_name": "Dropout", "config": {"rate": 0.2, "name": "dropout_1"}})
+        for kind, value in (("kernel", kernel), ("bias", bias)):
+            manifest.append({"name": f"{name}/{kind}", "shape": list(value.shape), "dtype": "float32"})
+            buffer += value.astype('<f4').tobytes()
+
+    model_json = {
+        "modelTopology": {"class_name": "Sequential", "config": {"name": "sequential_1", "layers": topology_layers}},
+        "weightsManifest": [{"paths": ["weights.bin"], "weights": manifest}],
+        "format": "layers-model"
+    }
+    with open(os.path.join(model_dir, 'model.json'), 'w') as f:
+        json.dump(model_json, f)
+    with open(os.path.join(model_dir, 'weights.bin'), 'wb') as f:
+        f.write(buffer)
+    with open(os.path.join(model_dir, 'feature_stats.json'), 'w') as f:
+        json.dump({"means": means, "stdDevs": std_devs}, f)
+
+
+def test_tfjs_model_matches_reference(tmp_path):
+    rng = np.random.default_rng(4)
+    k1, b1 = rng.normal(size=(13, 32)).astype(np.float32), rng.normal(size=32).astype(np.float32)
+    k2, b2 = rng.normal(size=(32, 1)).astype(np.float32), rng.normal(size=1).astype(np.float32)
+    means = rng.uniform(0, 20, 13).tolist()
+    std_devs = rng.uniform(0.5, 10, 13).tolist()
+    write_tfjs_model(str(tmp_path), [(k1, b1, 'relu'), (k2, b2, 'sigmoid')], means, std_devs)
+
+    network = load_tfjs_layers_model(str(tmp_path))
+    x = rng.normal(size=(4, 13))
+    expected = 1 / (1 + np.exp(-(np.maximum(x @ k1 + b1, 0) @ k2 + b2)))
+    np.testing.assert_allclose(network.predict(x), expected, rtol=1e-5)
+
+    model = TfjsFraudModel(model_dir=str(tmp_path))
+    assert model.is_loaded
+
+    booking = {name: float(i + 1) for i, name in enumerate(TFJS_FEATURE_NAMES)}
+    normalized = (np.arange(1, 14) - np.array(means)) / np.array(std_devs)
+    expected = 1 / (1 + np.exp(-(np.maximum(normalized @ k1 + b1, 0) @ k2 + b2)))
+
+    result = model.predict(booking)
+    assert result['rule_based'] is False
+    assert abs(result['fraud_probability'] - float(expected[0])) < 1e-5
+
+    batch = model.predict_batch([booking, {'lead_time': 1, 'no_of_adults': 2}])
+    assert abs(batch[0]['fraud_probability'] - result['fraud_probability']) < 1e-6
+    assert batch[1] is not None
+
+
+def test_placeholder_model_is_not_loaded():
+    # The checked-in model.json has an empty weights manifest
+    model = TfjsFraudModel(model_dir=SHIPPED_MODEL_DIR)
+    assert not model.is_loaded
+    assert model.predict({'lead_time': 1, 'no_of_adults': 2}) is None
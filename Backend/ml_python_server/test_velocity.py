@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+from velocity import VelocityCounter, LONGEST_WINDOW
+
+HOUR = 3600
+
+
+def test_counts_slide_out_of_each_window():
+    counter = VelocityCounter()
+    start = 1_000_000 * HOUR
+    counter.record('booking', {"userId": "u1", "boatId": "b1", "phone": "555"}, now=start)
+    counter.record('booking', {"userId": "u1", "boatId": "b2"}, now=start + 0.5 * HOUR)
+
+    assert counter.counts('user', 'u1', now=start + 0.5 * HOUR)['booking'] == {'1h': 2, '24h': 2, '7d': 2}
+    assert counter.counts('user', 'u1', now=start + 2 * HOUR)['booking'] == {'1h': 0, '24h': 2, '7d': 2}
+    assert counter.counts('user', 'u1', now=start + 30 * HOUR)['booking'] == {'1h': 0, '24h': 0, '7d': 2}
+    assert counter.count('booking', 'boat', 'b1', '24h', now=start) == 1
+    assert counter.count('booking', 'phone', '555', '24h', now=start) == 1
+    assert counter.count('cancellation', 'user', 'u1', '24h', now=start) == 0
+
+
+def test_fill_features_uses_user_and_phone_counts():
+    counter = VelocityCounter()
+    now = 1_000_000 * HOUR
+    counter.record('booking', {"userId": "u1"}, now=now)
+    counter.record('cancellation', {"userId": "u2", "phone": "555"}, now=now)
+    counter.record('cancellation', {"userId": "u3", "phone": "555"}, now=now)
+
+    # One earlier booking today: this one makes two
+    assert counter.fill_features({"userId": "u1"}, now=now)['multiple_bookings_same_day'] == 2
+    # Another account with the same phone number
+    booking = counter.fill_features({"userId": "u4", "phone": "555"}, now=now)
+    assert booking['multiple_bookings_same_day'] == 0
+    assert booking['cancellationsLast24Hours'] == 2
+    # Caller-supplied values win; anonymous bookings are left alone
+    assert counter.fill_features({"userId": "u1", "multiple_bookings_same_day": 0}, now=now)['multiple_bookings_same_day'] == 0
+    assert counter.fill_features({"lead_time": 3}, now=now) == {"lead_time": 3}
+
+
+def test_memory_is_bounded():
+    counter = VelocityCounter(max_keys=3, sweep_interval=60)
+    now = 1_000_000 * HOUR
+    for i in range(5):
+        counter.record('booking', {"userId": f"u{i}"}, now=now)
+    assert counter.stats()["keys"] == 3 and counter.stats()["evictions"] == 2
+
+    # Keys idle for longer than the longest window are swept
+    counter.record('booking', {"userId": "late"}, now=now + LONGEST_WINDOW + 61)
+    assert counter.stats()["keys"] == 1 and counter.stats()["expirations"] == 2
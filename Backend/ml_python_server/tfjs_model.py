@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+import numpy as np
+import os
+import json
+import logging
+from ml_model import FraudDetectionModel
+from feature_schema import TFJS_SCHEMA
+from numpy_inference import NumpyDenseModel, PASSTHROUGH_LAYERS
+
+logger = logging.getLogger("fraud_detection_ml")
+
+# Directory written by Backend/scripts/trainFraudModel.js
+DEFAULT_TFJS_MODEL_DIR = os.environ.get(
+    "TFJS_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'fraud_detection_model')
+)
+
+# Input order used by trainFraudModel.js (and feature_stats.json)
+TFJS_FEATURE_NAMES = list(TFJS_SCHEMA.names)
+
+# Booking fields accepted as fallbacks for the Node feature names
+FEATURE_ALIASES = TFJS_SCHEMA.aliases
+
+# numpy dtypes for the tfjs weight manifest
+MANIFEST_DTYPES = {
+    'float32': np.float32,
+    'int32': np.int32,
+    'uint8': np.uint8,
+    'uint16': np.uint16,
+    'float16': np.float16,
+    'bool': np.bool_
+}
+
+
+class FeatureStatsScaler:
+    """Standardizes features with the means/stdDevs from feature_stats.json"""
+
+    def __init__(self, means, std_devs):
+        self.mean_ = np.asarray(means, dtype=np.float64)
+        std_devs = np.asarray(std_devs, dtype=np.float64)
+        # Constant features would divide by zero; leave them centred only
+        self.scale_ = np.where(std_devs > 0, std_devs, 1.0)
+
+    def transform(self, x):
+        return (np.asarray(x, dtype=np.float64) - self.mean_) / self.scale_
+
+
+def _topology_layers(topology):
+    """Return the layer list from a tfjs modelTopology (keras 2.x/3.x variants)"""
+    if 'model_config' in topology:
+        topology = topology['model_config']
+    if topology.get('class_name') != 'Sequential':
+        raise ValueError(f"Unsupported model class: {topology.get('class_name')}")
+    config = topology['config']
+    # Older keras versions store the layer list directly as the config
+    return config if isinstance(config, list) else config['layers']
+
+
+def _read_weights(model_dir, manifest):
+    """Read every weight in the manifest into a dict of name -> array"""
+    weights = {}
+    for group in manifest:
+        buffer = b''
+        for path in group['paths']:
+            with open(os.path.join(model_dir, path), 'rb') as f:
+                buffer += f.read()
+
+        offset = 0
+        for spec in group['weights']:
+            shape = spec['shape']
+            quantization = spec.get('quantization')
+            dtype = np.dtype(MANIFEST_DTYPES[quantization['dtype'] if quantization else spec['dtype']])
+            count = int(np.prod(shape)) if shape else 1
+            size = count * dtype.itemsize
+            if offset + size > len(buffer):
+                raise ValueError(f"Weight file is too short for {spec['name']}")
+
+            values = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += size
+
+            # Undo tfjs weight quantization
+            if quantization and quantization['dtype'] in ('uint8', 'uint16'):
+                values = values.astype(np.float32) * quantization['scale'] + quantization['min']
+            weights[spec['name']] = values.astype(np.float32).reshape(shape)
+    return weights
+
+
+def _find_weight(weights, layer_name, kind):
+    """Locate a layer weight; names may carry a model-name prefix"""
+    for name, value in weights.items():
+        if name == f"{layer_name}/{kind}" or name.endswith(f"/{layer_name}/{kind}"):
+            return value
+    raise ValueError(f"Weight {layer_name}/{kind} not found in weights manifest")
+
+
+def load_tfjs_layers_model(model_dir):
+    """
+    Parse a TF.js layers model (model.json + binary weight shards) into a
+    NumpyDenseModel without importing TensorFlow.
+    """
+    with open(os.path.join(model_dir, 'model.json'), 'r') as f:
+        model_json = json.load(f)
+
+    if model_json.get('format', 'layers-model') != 'layers-model':
+        raise ValueError(f"Unsupported TF.js model format: {model_json.get('format')}")
+
+    weights = _read_weights(model_dir, model_json.get('weightsManifest', []))
+
+    layers = []
+    for layer in _topology_layers(model_json['modelTopology']):
+        layer_type = layer['class_name']
+        config = layer['config']
+        if layer_type in PASSTHROUGH_LAYERS:
+            continue
+        if layer_type != 'Dense':
+            raise ValueError(f"Unsupported layer type for NumPy inference: {layer_type}")
+
+        kernel = _find_weight(weights, config['name'], 'kernel')
+        if config.get('use_bias', True):
+            bias = _find_weight(weights, config['name'], 'bias')
+        else:
+            bias = np.zeros(kernel.shape[1], dtype=np.float32)
+        layers.append((kernel, bias, config.get('activation', 'linear')))
+
+    if not layers:
+        raise ValueError("TF.js model contains no Dense layers")
+
+    return NumpyDenseModel(layers)
+
+
+def load_feature_stats(model_dir):
+    """Load the normalization statistics saved next to the TF.js model"""
+    with open(os.path.join(model_dir, 'feature_stats.json'), 'r') as f:
+        stats = json.load(f)
+    return FeatureStatsScaler(stats['means'], stats['stdDevs'])
+
+
+class TfjsFraudModel(FraudDetectionModel):
+    """
+    Serves the TF.js model trained by the Node backend through the
+    FraudDetectionModel interface, using NumPy for inference.
+    """
+
+    schema = TFJS_SCHEMA
+
+    def __init__(self, model_dir=None):
+        self.model_dir = model_dir or DEFAULT_TFJS_MODEL_DIR
+        super().__init__(backend='tfjs')
+
+    def artifact_paths(self):
+        """Files the loaded model was built from (used to derive its version)"""
+        return [os.path.join(self.model_dir, name) for name in os.listdir(self.model_dir)
+                if name.endswith(('.json', '.bin'))]
+
+    def load_model(self):
+        """Load the TF.js topology, weights and feature statistics"""
+        try:
+            logger.info(f"Loading TF.js model from {self.model_dir}")
+            self.model = load_tfjs_layers_model(self.model_dir)
+            self.scaler = load_feature_stats(self.model_dir)
+            self.feature_names = list(TFJS_FEATURE_NAMES)
+
+            if len(self.scaler.mean_) != len(self.feature_names):
+                raise ValueError(f"feature_stats.json has {len(self.scaler.mean_)} features, "
+                                 f"expected {len(self.feature_names)}")
+            if self.model.input_dim != len(self.feature_names):
+                raise ValueError(f"Model expects {self.model.input_dim} inputs, "
+                                 f"expected {len(self.feature_names)}")
+
+            self.is_loaded = True
+            logger.info("TF.js model and feature statistics loaded successfully")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading TF.js model: {str(e)}")
+            self.is_loaded = False
+            return False
+
+    def _explain_prediction(self, features, probability):
+        """Generate human-readable explanations for the prediction"""
+        indicators = []
+
+        if features['leadTime'] < 2 and features['cancellationRatio'] > 0.3:
+            indicators.append("Very short lead time with history of cancellations")
+
+        if features['cancellationRatio'] > 0.5:
+            indicators.append(f"High cancellation ratio ({features['cancellationRatio']:.2f})")
+
+        if features['cancellationsLast24Hours'] > 1:
+            indicators.append(f"Multiple cancellations in last 24 hours ({int(features['cancellationsLast24Hours'])})")
+
+        if 0 < features['timeSinceBooking'] < 60 and features['leadTime'] > 14:
+            indicators.append("Very quick cancellation after booking for a trip far in the future")
+
+        if features['distinctBoatsCancelled'] > 2:
+            indicators.append(f"Cancelled bookings on {int(features['distinctBoatsCancelled'])} different boats")
+
+        return indicators
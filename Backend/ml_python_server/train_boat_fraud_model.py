@@ -8,6 +8,9 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 from imblearn.over_sampling import SMOTE
 import pickle
 import os
+from numpy_inference import NumpyDenseModel
+from synthetic_bookings import generate_synthetic_bookings
+from feature_schema import MODEL_SCHEMA
 
 print("Starting boat fraud detection model training...")
 
@@ -25,31 +28,7 @@ except Exception as e:
     print("Attempting to use sample data for demonstration...")
     
     # Create synthetic data if file not found
-    np.random.seed(42)
-    n_samples = 1000
-    
-    # Create synthetic data that mimics hotel booking data
-    df = pd.DataFrame({
-        'booking_id': range(1, n_samples + 1),
-        'no_of_adults': np.random.randint(1, 5, n_samples),
-        'no_of_children': np.random.randint(0, 4, n_samples),
-        'no_of_weekend_nights': np.random.randint(0, 3, n_samples),
-        'no_of_week_nights': np.random.randint(0, 5, n_samples),
-        'type_of_meal_plan': np.random.choice(['Meal Plan 1', 'Meal Plan 2', 'Meal Plan 3'], n_samples),
-        'required_car_parking_space': np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
-        'room_type_reserved': np.random.choice(['Room_Type 1', 'Room_Type 2', 'Room_Type 3', 'Room_Type 4'], n_samples),
-        'lead_time': np.random.gamma(5, 5, n_samples).astype(int) + 1,  # Skewed toward shorter lead times
-        'market_segment_type': np.random.choice(['Online', 'Offline', 'Corporate', 'Complementary', 'Aviation'], n_samples),
-        'repeated_guest': np.random.choice(['No', 'Yes'], n_samples, p=[0.9, 0.1]),
-        'no_of_previous_cancellations': np.random.choice([0, 1, 2, 3, 4], n_samples, p=[0.8, 0.1, 0.05, 0.03, 0.02]),
-        'no_of_previous_bookings_not_canceled': np.random.choice([0, 1, 2, 3, 4, 5], n_samples, p=[0.7, 0.1, 0.1, 0.05, 0.03, 0.02]),
-        'avg_price_per_room': np.random.normal(120, 30, n_samples).clip(min=50),
-        'no_of_special_requests': np.random.choice([0, 1, 2, 3, 4], n_samples, p=[0.4, 0.3, 0.2, 0.05, 0.05]),
-        'booking_status': np.random.choice(['Canceled', 'Not_Canceled'], n_samples, p=[0.3, 0.7])
-    })
-    
-    # Add multiple bookings feature (simulate a user booking multiple boats)
-    df['multiple_bookings_same_day'] = np.random.choice([0, 1, 2, 3], n_samples, p=[0.8, 0.1, 0.07, 0.03])
+    df = generate_synthetic_bookings(n_samples=1000, seed=42)
     
     print(f"Created synthetic dataset with {len(df)} records for demonstration")
 
@@ -82,10 +61,8 @@ df.dropna(inplace=True)
 print(f"Dataset after dropping NA values: {len(df)} records")
 
 # Add derived features specifically for fraud detection in boat bookings
-df['cancellation_ratio'] = df['no_of_previous_cancellations'] / (df['no_of_previous_cancellations'] + df['no_of_previous_bookings_not_canceled'] + 0.1)
-df['adult_child_ratio'] = df['no_of_adults'] / (df['no_of_children'] + 0.1)
-df['very_short_lead'] = (df['lead_time'] < 2).astype(int)
-df['suspicious_price'] = ((df['avg_price_per_room'] / (df['no_of_adults'] + df['no_of_children'] + 0.1)) < 25).astype(int)
+# (computed by the same schema code the server uses at prediction time)
+MODEL_SCHEMA.derive(df)
 
 # If dataset doesn't have multiple bookings feature, create a synthetic one
 if 'multiple_bookings_same_day' not in df.columns:
@@ -107,13 +84,8 @@ else:
     df['is_canceled'] = df[target_column]  # Assume it's already binary
 
 # Define features and target
-features = [
-    'no_of_adults', 'no_of_children', 'lead_time', 
-    'no_of_previous_cancellations', 'no_of_previous_bookings_not_canceled',
-    'repeated_guest', 'avg_price_per_room', 'no_of_special_requests',
-    'cancellation_ratio', 'adult_child_ratio', 'very_short_lead', 
-    'suspicious_price', 'multiple_bookings_same_day'
-]
+features = list(MODEL_SCHEMA.names)
+print(f"Feature schema: {MODEL_SCHEMA.key}")
 
 X = df[features]
 y = df['is_canceled']
@@ -189,6 +161,11 @@ model_path = os.path.join(model_dir, 'boat_fraud_detection_model')
 model.save(model_path)
 print(f"Model saved to {model_path}")
 
+# Export the Dense weights for the TensorFlow-free NumPy inference backend
+numpy_weights_path = os.path.join(model_dir, 'boat_fraud_detection_weights.npz')
+NumpyDenseModel.from_keras(model).save(numpy_weights_path)
+print(f"NumPy inference weights saved to {numpy_weights_path}")
+
 # Save the scaler
 scaler_path = os.path.join(model_dir, 'scaler.pkl')
 with open(scaler_path, 'wb') as f:
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Sliding-window velocity counters for bookings and cancellations.
+
+Counts are kept per user, per boat and per phone number over the last hour,
+day and week, so /predict can fill in `multiple_bookings_same_day` and
+`cancellationsLast24Hours` itself instead of expecting the caller to send
+them. Each window is a short ring of time buckets: recording an event and
+reading a count touch a few buckets, old buckets fall off as time passes,
+and keys idle for longer than the longest window are dropped. The number of
+tracked keys is capped (least recently updated keys are evicted first).
+
+Counters live in process memory, so with several server workers each one
+counts the events it received.
+"""
+import os
+import time
+import threading
+from collections import deque, OrderedDict
+
+# Defaults (override with environment variables VELOCITY_MAX_KEYS and VELOCITY_SWEEP_INTERVAL)
+VELOCITY_MAX_KEYS = int(os.environ.get("VELOCITY_MAX_KEYS", 200000))
+VELOCITY_SWEEP_INTERVAL = float(os.environ.get("VELOCITY_SWEEP_INTERVAL", 60))
+
+# name -> (bucket width in seconds, number of buckets)
+WINDOWS = {
+    '1h': (300, 12),
+    '24h': (3600, 24),
+    '7d': (6 * 3600, 28)
+}
+LONGEST_WINDOW = max(width * buckets for width, buckets in WINDOWS.values())
+
+EVENT_KINDS = ('booking', 'cancellation')
+
+# Event field holding the id of each tracked dimension
+DIMENSIONS = {
+    'user': 'userId',
+    'boat': 'boatId',
+    'phone': 'phone'
+}
+
+
+class SlidingWindow:
+    """Event count over the last `buckets` buckets of `width` seconds"""
+
+    __slots__ = ('width', 'buckets', 'counts', 'total')
+
+    def __init__(self, width, buckets):
+        self.width = width
+        self.buckets = buckets
+        self.counts = deque()  # [bucket number, count], oldest first
+        self.total = 0
+
+    def _expire(self, bucket):
+        counts = self.counts
+        oldest = bucket - self.buckets
+        while counts and counts[0][0] <= oldest:
+            self.total -= counts.popleft()[1]
+
+    def add(self, now, amount=1):
+        bucket = int(now // self.width)
+        self._expire(bucket)
+        if self.counts and self.counts[-1][0] == bucket:
+            self.counts[-1][1] += amount
+        else:
+            self.counts.append([bucket, amount])
+        self.total += amount
+
+    def count(self, now):
+        self._expire(int(now // self.width))
+        return self.total
+
+
+class VelocityCounter:
+    """Thread-safe sliding-window event counts per (event kind, dimension, id)"""
+
+    def __init__(self, max_keys=VELOCITY_MAX_KEYS, sweep_interval=VELOCITY_SWEEP_INTERVAL, clock=time.time):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        # key -> [last update time, {window name: SlidingWindow}], least recently updated first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + sweep_interval
+
+    def record(self, kind, event, now=None):
+        """Count an event for every dimension whose id is present in `event`"""
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind {kind!r}")
+        now = self.clock() if now is None else now
+        with self._lock:
+            for dimension, field in DIMENSIONS.items():
+                identifier = event.get(field)
+                if identifier is None or identifier == '':
+                    continue
+                key = (kind, dimension, str(identifier))
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = [now, {name: SlidingWindow(width, buckets)
+                                                        for name, (width, buckets) in WINDOWS.items()}]
+                    if len(self._entries) > self.max_keys:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+                else:
+                    entry[0] = now
+                    self._entries.move_to_end(key)
+                for window in entry[1].values():
+                    window.add(now)
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+    def _sweep(self, now):
+        # Entries are ordered by last update, so idle ones are at the front
+        entries = self._entries
+        while entries:
+            key, (updated, _) = next(iter(entries.items()))
+            if now - updated < LONGEST_WINDOW:
+                break
+            del entries[key]
+            self.expirations += 1
+        self._next_sweep = now + self.sweep_interval
+
+    def count(self, kind, dimension, identifier, window='24h', now=None):
+        """Events of `kind` for one id within `window` (0 when never seen)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            entry = self._entries.get((kind, dimension, str(identifier)))
+            return entry[1][window].count(now) if entry is not None else 0
+
+    def counts(self, dimension, identifier, now=None):
+        """{kind: {window: count}} for one id"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            result = {}
+            for kind in EVENT_KINDS:
+                entry = self._entries.get((kind, dimension, str(identifier)))
+                result[kind] = {name: entry[1][name].count(now) if entry is not None else 0
+                                for name in WINDOWS}
+            return result
+
+    def fill_features(self, booking, now=None):
+        """
+        Set `multiple_bookings_same_day` and `cancellationsLast24Hours` on a
+        /predict body from the last 24 hours of events of its user and phone
+        number. Values sent by the caller are kept.
+
+        The booking being scored is counted as one of the same-day bookings,
+        so a user with one earlier booking today gets 2; a first booking gets 0.
+        """
+        ids = [(dimension, booking.get(field)) for dimension, field in DIMENSIONS.items()
+               if dimension != 'boat' and booking.get(field) not in (None, '')]
+        if not ids:
+            return booking
+        now = self.clock() if now is None else now
+
+        if 'multiple_bookings_same_day' not in booking:
+            earlier = max(self.count('booking', dimension, identifier, '24h', now) for dimension, identifier in ids)
+            booking['multiple_bookings_same_day'] = earlier + 1 if earlier else 0
+        if 'cancellationsLast24Hours' not in booking:
+            booking['cancellationsLast24Hours'] = max(
+                self.count('cancellation', dimension, identifier, '24h', now) for dimension, identifier in ids)
+        return booking
+
+    def stats(self):
+        with self._lock:
+            return {
+                "keys": len(self._entries),
+                "maxKeys": self.max_keys,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
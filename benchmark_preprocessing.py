@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for booking preprocessing: the original pandas
+implementation of fraud_detection_server.preprocess_booking_data against
+booking_features (single booking and batch).
+
+    python benchmark_preprocessing.py --bookings 2000 --max-nights 60
+"""
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from booking_features import EXPECTED_COLUMNS, extract_booking_features, extract_booking_features_batch
+
+
+def legacy_preprocess_booking_data(booking_data):
+    """The original pandas implementation, kept as the reference"""
+    start_date = pd.to_datetime(booking_data.get('startDate'))
+    end_date = pd.to_datetime(booking_data.get('endDate'))
+
+    total_nights = (end_date - start_date).days
+    weekend_nights = sum(1 for d in range(total_nights) if (start_date + pd.Timedelta(days=d)).weekday() >= 5)
+    week_nights = total_nights - weekend_nights
+
+    cancellation_history = booking_data.get('cancellationHistory', {})
+    previous_cancellations = cancellation_history.get('count', 0)
+    previous_bookings = cancellation_history.get('totalBookings', 0)
+
+    processed_data = {
+        'no_of_adults': booking_data.get('passengers', {}).get('adults', 1),
+        'no_of_children': booking_data.get('passengers', {}).get('children', 0),
+        'no_of_weekend_nights': weekend_nights,
+        'no_of_week_nights': week_nights,
+        'type_of_meal_plan': 0,
+        'required_car_parking_space': 0,
+        'room_type_reserved': 0,
+        'lead_time': (start_date - pd.Timestamp.now()).days,
+        'arrival_year': start_date.year,
+        'arrival_month': start_date.month,
+        'arrival_date': start_date.day,
+        'market_segment_type': 0,
+        'repeated_guest': 1 if previous_bookings > 0 else 0,
+        'no_of_previous_cancellations': previous_cancellations,
+        'no_of_previous_bookings_not_canceled': max(0, previous_bookings - previous_cancellations),
+        'avg_price_per_room': booking_data.get('totalAmount', 0) / max(1, total_nights),
+        'no_of_special_requests': 1 if booking_data.get('specialRequests') else 0
+    }
+
+    df = pd.DataFrame([processed_data])
+    for col in EXPECTED_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0
+    return df[EXPECTED_COLUMNS]
+
+
+def random_bookings(count, max_nights, seed=42):
+    rng = random.Random(seed)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    bookings = []
+    for i in range(count):
+        start = today + timedelta(days=rng.randint(-30, 400))
+        end = start + timedelta(days=rng.randint(0, max_nights))
+        total_bookings = rng.randint(0, 10)
+        bookings.append({
+            'bookingId': f"BID{i}",
+            'startDate': start.strftime('%Y-%m-%d'),
+            'endDate': end.strftime('%Y-%m-%d'),
+            'passengers': {'adults': rng.randint(1, 6), 'children': rng.randint(0, 4)},
+            'totalAmount': rng.randint(1000, 100000),
+            'specialRequests': rng.random() < 0.3,
+            'cancellationHistory': {'count': rng.randint(0, total_bookings), 'totalBookings': total_bookings}
+        })
+    return bookings
+
+
+def time_call(function, repeat):
+    """Best of `repeat` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark booking preprocessing')
+    parser.add_argument('--bookings', type=int, default=2000)
+    parser.add_argument('--max-nights', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bookings = random_bookings(args.bookings, args.max_nights)
+
+    legacy = np.vstack([legacy_preprocess_booking_data(b).to_numpy(dtype=np.float64) for b in bookings])
+    single = np.vstack([extract_booking_features(b) for b in bookings])
+    batch = extract_booking_features_batch(bookings)
+    for name, result in (('single', single), ('batch', batch)):
+        if not np.allclose(legacy, result):
+            raise SystemExit(f"{name} features differ from the pandas reference")
+
+    legacy_seconds = time_call(lambda: [legacy_preprocess_booking_data(b) for b in bookings], args.repeat)
+    single_seconds = time_call(lambda: [extract_booking_features(b) for b in bookings], args.repeat)
+    batch_seconds = time_call(lambda: extract_booking_features_batch(bookings), args.repeat)
+
+    print(json.dumps({
+        'bookings': args.bookings,
+        'maxNights': args.max_nights,
+        'pandasUsPerBooking': round(legacy_seconds / args.bookings * 1e6, 2),
+        'singleUsPerBooking': round(single_seconds / args.bookings * 1e6, 2),
+        'batchUsPerBooking': round(batch_seconds / args.bookings * 1e6, 2),
+        'singleSpeedup': round(legacy_seconds / single_seconds, 1),
+        'batchSpeedup': round(legacy_seconds / batch_seconds, 1)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import numpy as np
+from datetime import datetime
+
+# The feature schemas live with the ML service
+ML_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'ml_python_server')
+if ML_SERVER_DIR not in sys.path:
+    sys.path.append(ML_SERVER_DIR)
+from feature_schema import RESERVATION_SCHEMA
+
+# Model input columns, in the order the scaler and model were trained on
+EXPECTED_COLUMNS = list(RESERVATION_SCHEMA.names)
+
+COLUMN_INDEX = RESERVATION_SCHEMA.index
+
+
+def parse_date(value):
+    """Parse an ISO date or datetime string (as sent by the booking frontend)"""
+    if isinstance(value, datetime):
+        return value
+    value = str(value).strip()
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(value)
+    # Compare everything as naive local-clock times, like pd.Timestamp.now()
+    return parsed.replace(tzinfo=None)
+
+
+def _weekend_days_before(day_numbers):
+    """Number of Saturdays and Sundays among days 0..n-1 counted from a Monday"""
+    return 2 * (day_numbers // 7) + np.maximum(day_numbers % 7 - 5, 0)
+
+
+def count_weekend_nights(start_weekday, nights):
+    """
+    Nights starting on a Saturday or Sunday, for stays of `nights` nights
+    beginning on `start_weekday` (0 = Monday). Works on scalars and arrays.
+    """
+    start_weekday = np.asarray(start_weekday)
+    nights = np.maximum(np.asarray(nights), 0)
+    return _weekend_days_before(start_weekday + nights) - _weekend_days_before(start_weekday)
+
+
+def _booking_values(booking_data):
+    passengers = booking_data.get('passengers', {})
+    cancellation_history = booking_data.get('cancellationHistory', {})
+    return (
+        passengers.get('adults', 1),
+        passengers.get('children', 0),
+        cancellation_history.get('count', 0),
+        cancellation_history.get('totalBookings', 0),
+        booking_data.get('totalAmount', 0),
+        1 if booking_data.get('specialRequests') else 0
+    )
+
+
+def extract_booking_features(booking_data, now=None):
+    """
+    Build the model input row for one booking as a (1, len(EXPECTED_COLUMNS))
+    float array. Columns the booking does not provide default to 0.
+    """
+    now = now or datetime.now()
+    start_date = parse_date(booking_data.get('startDate'))
+    end_date = parse_date(booking_data.get('endDate'))
+    adults, children, previous_cancellations, previous_bookings, amount, special_requests = \
+        _booking_values(booking_data)
+
+    total_nights = (end_date - start_date).days
+    weekend_nights = int(count_weekend_nights(start_date.weekday(), total_nights))
+
+    row = np.zeros((1, len(EXPECTED_COLUMNS)))
+    values = row[0]
+    values[COLUMN_INDEX['no_of_adults']] = adults
+    values[COLUMN_INDEX['no_of_children']] = children
+    values[COLUMN_INDEX['no_of_weekend_nights']] = weekend_nights
+    values[COLUMN_INDEX['no_of_week_nights']] = total_nights - weekend_nights
+    values[COLUMN_INDEX['lead_time']] = (start_date - now).days
+    values[COLUMN_INDEX['arrival_year']] = start_date.year
+    values[COLUMN_INDEX['arrival_month']] = start_date.month
+    values[COLUMN_INDEX['arrival_date']] = start_date.day
+    values[COLUMN_INDEX['repeated_guest']] = 1 if previous_bookings > 0 else 0
+    values[COLUMN_INDEX['no_of_previous_cancellations']] = previous_cancellations
+    values[COLUMN_INDEX['no_of_previous_bookings_not_canceled']] = max(0, previous_bookings - previous_cancellations)
+    values[COLUMN_INDEX['avg_price_per_room']] = amount / max(1, total_nights)
+    values[COLUMN_INDEX['no_of_special_requests']] = special_requests
+    return row
+
+
+def extract_booking_features_batch(bookings, now=None):
+    """
+    Build model input rows for many bookings at once; returns an
+    (n, len(EXPECTED_COLUMNS)) float array in input order. Dates are parsed
+    per booking, everything else is computed column-wise.
+    """
+    now = np.datetime64(now or datetime.now(), 'us')
+    count = len(bookings)
+    start_dates = np.array([parse_date(b.get('startDate')) for b in bookings], dtype='datetime64[us]').reshape(count)
+    end_dates = np.array([parse_date(b.get('endDate')) for b in bookings], dtype='datetime64[us]').reshape(count)
+    values = np.array([_booking_values(b) for b in bookings], dtype=np.float64).reshape(count, 6)
+    adults, children, previous_cancellations, previous_bookings, amount, special_requests = values.T
+
+    # Whole days, rounded towards minus infinity like timedelta.days
+    day = np.timedelta64(1, 'D')
+    total_nights = (end_dates - start_dates) // day
+    start_days = start_dates.astype('datetime64[D]')
+    # 1970-01-01 was a Thursday (weekday 3)
+    start_weekdays = (start_days.astype(np.int64) + 3) % 7
+    weekend_nights = count_weekend_nights(start_weekdays, total_nights)
+
+    years = start_days.astype('datetime64[Y]')
+    months = start_days.astype('datetime64[M]')
+
+    rows = np.zeros((count, len(EXPECTED_COLUMNS)))
+    rows[:, COLUMN_INDEX['no_of_adults']] = adults
+    rows[:, COLUMN_INDEX['no_of_children']] = children
+    rows[:, COLUMN_INDEX['no_of_weekend_nights']] = weekend_nights
+    rows[:, COLUMN_INDEX['no_of_week_nights']] = total_nights - weekend_nights
+    rows[:, COLUMN_INDEX['lead_time']] = (start_dates - now) // day
+    rows[:, COLUMN_INDEX['arrival_year']] = years.astype(np.int64) + 1970
+    rows[:, COLUMN_INDEX['arrival_month']] = months.astype(np.int64) % 12 + 1
+    rows[:, COLUMN_INDEX['arrival_date']] = (start_days - months).astype(np.int64) + 1
+    rows[:, COLUMN_INDEX['repeated_guest']] = previous_bookings > 0
+    rows[:, COLUMN_INDEX['no_of_previous_cancellations']] = previous_cancellations
+    rows[:, COLUMN_INDEX['no_of_previous_bookings_not_canceled']] = \
+        np.maximum(0, previous_bookings - previous_cancellations)
+    rows[:, COLUMN_INDEX['avg_price_per_room']] = amount / np.maximum(1, total_nights)
+    rows[:, COLUMN_INDEX['no_of_special_requests']] = special_requests
+    return rows
@@ -1,5 +1,5 @@
-import requests
-from fraud_notification import process_new_booking
+from fraud_pipeline import get_default_pipeline
+from fraud_api_client import get_fraud_api_client
 
 def confirm_booking(booking_data):
     """
@@ -11,8 +11,9 @@ def confirm_booking(booking_data):
     # 2. Get boat owner's email from your database
     owner_email = get_boat_owner_email(booking_data.get('boatId'))
     
-    # 3. Process the booking for fraud detection
-    process_new_booking(booking_data, owner_email)
+    # 3. Queue the booking for fraud detection; scoring and owner
+    #    notification happen on the pipeline's worker threads
+    fraud_check_queued = get_default_pipeline().submit(booking_data, owner_email)
     
     # 4. Continue with your normal confirmation process
     # ... Rest of your existing booking confirmation code ...
@@ -20,7 +21,8 @@ def confirm_booking(booking_data):
     return {
         'status': 'success',
         'booking_id': booking_data.get('bookingId'),
-        'message': 'Booking confirmed successfully'
+        'message': 'Booking confirmed successfully',
+        'fraud_check': 'queued' if fraud_check_queued else 'rejected'
     }
 
 def get_boat_owner_email(boat_id):
@@ -29,4 +31,16 @@ def get_boat_owner_email(boat_id):
     """
     # In a real system, you'd query your database
     # For now, return a mock email
-    return "boat_owner@example.com" 
\ No newline at end of file
+    return "boat_owner@example.com"
+
+def get_fraud_pipeline_metrics():
+    """
+    Queue depth, lag and retry counters for the fraud scoring pipeline
+    """
+    return get_default_pipeline().metrics()
+
+def get_fraud_api_status():
+    """
+    Circuit breaker state and call counters for the fraud detection API client
+    """
+    return get_fraud_api_client().status()
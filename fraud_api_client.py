@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import threading
+import logging
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+
+# predict_rules lives with the ML service; it is used as the local fallback
+ML_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'ml_python_server')
+if ML_SERVER_DIR not in sys.path:
+    sys.path.append(ML_SERVER_DIR)
+from predict_rules import predict_fraud
+
+logger = logging.getLogger('fraud_api_client')
+
+# Client configuration (override with environment variables)
+FRAUD_API_URL = os.environ.get('FRAUD_API_URL', 'http://localhost:5000/api/detect-fraud')
+CONNECT_TIMEOUT = float(os.environ.get('FRAUD_API_CONNECT_TIMEOUT', 2.0))
+READ_TIMEOUT = float(os.environ.get('FRAUD_API_READ_TIMEOUT', 5.0))
+POOL_SIZE = int(os.environ.get('FRAUD_API_POOL_SIZE', 10))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('FRAUD_API_BREAKER_FAILURES', 5))
+BREAKER_RESET_SECONDS = float(os.environ.get('FRAUD_API_BREAKER_RESET_SECONDS', 30.0))
+
+# Circuit breaker states
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class FraudAPIError(Exception):
+    """Raised when the fraud detection API could not score a booking"""
+
+
+class CircuitBreaker:
+    """
+    Stops calling the fraud API after failure_threshold consecutive
+    failures. After reset_seconds a single trial call is let through
+    (half-open); it closes the breaker on success and re-opens it on failure.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = STATE_HALF_OPEN
+            if self.state == STATE_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                logger.info("Fraud API recovered - closing circuit breaker")
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    logger.warning(f"Fraud API failed {self.failures} times - opening circuit breaker "
+                                   f"for {self.reset_seconds}s")
+                self.state = STATE_OPEN
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            return {'state': self.state, 'consecutiveFailures': self.failures}
+
+
+def booking_to_rule_features(booking_data):
+    """Map a boat booking payload onto the predict_rules feature names"""
+    passengers = booking_data.get('passengers', {})
+    history = booking_data.get('cancellationHistory', {})
+    cancellations = history.get('count', 0)
+    total_bookings = history.get('totalBookings', 0)
+
+    lead_time = 0
+    nights = 1
+    try:
+        start_date = datetime.strptime(booking_data.get('startDate', '')[:10], '%Y-%m-%d')
+        lead_time = max((start_date - datetime.now()).days, 0)
+        end_date = datetime.strptime(booking_data.get('endDate', '')[:10], '%Y-%m-%d')
+        nights = max((end_date - start_date).days, 1)
+    except (TypeError, ValueError):
+        pass
+
+    return {
+        'lead_time': lead_time,
+        'no_of_adults': passengers.get('adults', 0),
+        'no_of_children': passengers.get('children', 0),
+        'no_of_week_nights': nights,
+        'avg_price_per_room': booking_data.get('totalAmount', 0) / nights,
+        'no_of_special_requests': 1 if booking_data.get('specialRequests') else 0,
+        'no_of_previous_cancellations': cancellations,
+        'no_of_previous_bookings_not_canceled': max(total_bookings - cancellations, 0),
+        'repeated_guest': 'Yes' if total_bookings > 0 else 'No'
+    }
+
+
+class FraudAPIClient:
+    """
+    Calls the fraud detection API over a pooled keep-alive session with
+    connect/read timeouts. While the circuit breaker is open, bookings are
+    scored locally with the rule-based engine instead.
+    """
+
+    def __init__(self, url=FRAUD_API_URL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 pool_size=POOL_SIZE, breaker=None):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._stats_lock = threading.Lock()
+        self._stats = {'api_calls': 0, 'api_failures': 0, 'rule_fallbacks': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def detect_fraud(self, booking_data):
+        """
+        Score a booking. Returns the API response (fraud_probability in 0-1)
+        with 'source' set to 'api', or the rule-based result with 'source'
+        set to 'rules' while the breaker is open. Raises FraudAPIError when
+        the API call fails and the breaker is still closed.
+        """
+        if not self.breaker.allow_request():
+            return self.score_with_rules(booking_data)
+
+        self._count('api_calls')
+        try:
+            response = self.session.post(self.url, json=booking_data, timeout=self.timeout)
+            if response.status_code != 200:
+                raise FraudAPIError(f"Fraud API returned {response.status_code}: {response.text}")
+            result = response.json()
+        except (requests.RequestException, ValueError, FraudAPIError) as e:
+            self._count('api_failures')
+            self.breaker.record_failure()
+            if isinstance(e, FraudAPIError):
+                raise
+            raise FraudAPIError(f"Error calling fraud detection API: {str(e)}") from e
+
+        self.breaker.record_success()
+        result['source'] = 'api'
+        return result
+
+    def score_with_rules(self, booking_data):
+        """Score a booking locally with predict_rules.predict_fraud"""
+        self._count('rule_fallbacks')
+        result = predict_fraud(booking_to_rule_features(booking_data))
+        result['source'] = 'rules'
+        return result
+
+    def status(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['url'] = self.url
+        stats['breaker'] = self.breaker.status()
+        return stats
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_fraud_api_client():
+    """Shared client configured from the environment"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = FraudAPIClient()
+        return _default_client
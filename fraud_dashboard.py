@@ -1,9 +1,21 @@
+import os
+import sys
 import pandas as pd
 import streamlit as st
-import requests
 import json
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from fraud_api_client import get_fraud_api_client
+
+# The decision log lives with the ML service, which writes it
+ML_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'ml_python_server')
+if ML_SERVER_DIR not in sys.path:
+    sys.path.append(ML_SERVER_DIR)
+from decision_log import DecisionLog, DECISION_LOG_PATH, HISTOGRAM_BUCKETS, page_cursor
+
+# Seconds cached query results are reused across reruns
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))
+
+TIME_PERIODS = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90, "All time": None}
 
 # Set page title
 st.set_page_config(page_title="Boat Booking Fraud Detection Dashboard", layout="wide")
@@ -15,7 +27,7 @@ st.title("Boat Booking Fraud Detection Dashboard")
 st.sidebar.header("Filters")
 date_range = st.sidebar.selectbox(
     "Time Period",
-    ["Last 7 days", "Last 30 days", "Last 90 days", "All time"]
+    list(TIME_PERIODS)
 )
 
 risk_level = st.sidebar.slider(
@@ -26,66 +38,97 @@ risk_level = st.sidebar.slider(
     step=0.05
 )
 
-# Function to load recent fraud detection data
-# In a real application, this would connect to your database
-def load_fraud_data():
-    # This is mock data - replace with actual database query
-    fraud_data = []
-    for i in range(20):
-        days_ago = i % 30
-        date = (datetime.now() - timedelta(days=days_ago)).strftime("%Y-%m-%d")
-        fraud_data.append({
-            "booking_id": f"BID{10000+i}",
-            "user_id": f"UID{5000+i}",
-            "date": date,
-            "amount": round(1000 + (i * 500 * (i % 3)), 2),
-            "fraud_probability": round(0.1 + (i % 10) * 0.09, 2),
-            "status": "Flagged" if (i % 10) * 0.09 > 0.5 else "Approved"
-        })
-    return pd.DataFrame(fraud_data)
-
-# Load data
-df = load_fraud_data()
-
-# Apply filters
-if date_range == "Last 7 days":
-    cutoff_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-    df = df[df['date'] >= cutoff_date]
-elif date_range == "Last 30 days":
-    cutoff_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-    df = df[df['date'] >= cutoff_date]
-elif date_range == "Last 90 days":
-    cutoff_date = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-    df = df[df['date'] >= cutoff_date]
-
-# Filter by risk level
-df_filtered = df[df['fraud_probability'] >= risk_level]
-
-# Dashboard metrics
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric(label="Total Bookings", value=len(df))
-with col2:
-    st.metric(label="Flagged as Fraudulent", value=len(df[df['status'] == 'Flagged']))
-with col3:
-    st.metric(label="High Risk (>0.7)", value=len(df[df['fraud_probability'] > 0.7]))
-with col4:
-    st.metric(label="Total Amount", value=f"₹{df['amount'].sum():,.2f}")
-
-# Charts
-st.subheader("Fraud Risk Distribution")
-fig, ax = plt.subplots(figsize=(10, 6))
-ax.hist(df['fraud_probability'], bins=10, alpha=0.7)
-ax.set_xlabel('Fraud Probability')
-ax.set_ylabel('Number of Bookings')
-st.pyplot(fig)
-
-# Flagged transactions table
-st.subheader(f"Bookings with Risk Level ≥ {risk_level}")
-if len(df_filtered) > 0:
-    st.dataframe(df_filtered.sort_values(by='fraud_probability', ascending=False))
+@st.cache_resource
+def get_decision_log():
+    """Read-only connection to the decision log written by the scoring servers"""
+    return DecisionLog(DECISION_LOG_PATH, read_only=True)
+
+# Query results are cached per filter value, so reruns that do not change
+# the filters (or happen within the TTL) do not touch the database.
+# Totals and the histogram come from the daily rollups.
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def load_summary(since_day):
+    return get_decision_log().summary(since_day)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def load_daily(since_day):
+    rows = get_decision_log().daily(since_day)
+    return pd.DataFrame(rows, columns=["date", "bookings", "flagged", "high_risk", "amount"]).set_index("date")
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def count_flagged(min_probability, since):
+    return get_decision_log().count_at_least(min_probability, since)
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def load_flagged_page(min_probability, since, after, page_size):
+    """One page after the cursor `after` (None for the first page), and the cursor of its last row"""
+    rows = get_decision_log().page_at_least(min_probability, since, limit=page_size, after=after)
+    df = pd.DataFrame(rows, columns=["id", "booking_id", "user_id", "decided_at", "amount", "fraud_probability",
+                                     "is_fraud", "risk_level", "source", "model_version"]).drop(columns="id")
+    df["decided_at"] = pd.to_datetime(df["decided_at"], unit="s")
+    df["status"] = df.pop("is_fraud").map({1: "Flagged", 0: "Approved"})
+    return df, page_cursor(rows[-1]) if rows else None
+
+if not DECISION_LOG_PATH or not os.path.exists(DECISION_LOG_PATH):
+    st.info("No decision log found. Set DECISION_LOG_PATH for the scoring servers and for this dashboard "
+            "to see scored bookings here.")
 else:
-    st.info("No bookings match the current filters")
+    # Filter on whole days, the granularity of the rollups
+    days = TIME_PERIODS[date_range]
+    since_date = (datetime.now() - timedelta(days=days)).date() if days else None
+    since_day = since_date.isoformat() if since_date else None
+    since = datetime.combine(since_date, datetime.min.time()).timestamp() if since_date else None
+
+    summary = load_summary(since_day)
+
+    # Dashboard metrics
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(label="Total Bookings", value=summary["decisions"])
+    with col2:
+        st.metric(label="Flagged as Fraudulent", value=summary["flagged"])
+    with col3:
+        st.metric(label="High Risk (>0.7)", value=summary["highRisk"])
+    with col4:
+        st.metric(label="Total Amount", value=f"₹{summary['amount']:,.2f}")
+
+    # Charts
+    st.subheader("Fraud Risk Distribution")
+    width = 1 / HISTOGRAM_BUCKETS
+    st.bar_chart(pd.DataFrame(
+        {"Number of Bookings": summary["histogram"]},
+        index=[f"{i * width:.2f}-{(i + 1) * width:.2f}" for i in range(HISTOGRAM_BUCKETS)]
+    ))
+
+    st.subheader("Daily Decisions")
+    st.line_chart(load_daily(since_day)[["bookings", "flagged"]])
+
+    # Flagged transactions table, one page at a time. Each page continues after
+    # the last row of the previous one, so the cursors of the pages seen so far
+    # are kept in the session; changing a filter starts again from page 1.
+    st.subheader(f"Bookings with Risk Level ≥ {risk_level}")
+    total = count_flagged(risk_level, since)
+    if total > 0:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+        pages = (total + page_size - 1) // page_size
+        filters = (risk_level, since, page_size)
+        if st.session_state.get("flagged_filters") != filters:
+            st.session_state.flagged_filters = filters
+            st.session_state.flagged_cursors = [None]
+        cursors = st.session_state.flagged_cursors
+
+        frame, next_cursor = load_flagged_page(risk_level, since, cursors[-1], page_size)
+        # Callbacks run before the rerun, so the buttons are drawn for the new page
+        col1, col2, col3 = st.columns([1, 1, 4])
+        with col1:
+            st.button("Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+        with col2:
+            st.button("Next", disabled=len(cursors) >= pages, on_click=cursors.append, args=(next_cursor,))
+        with col3:
+            st.caption(f"Page {len(cursors)} of {pages} ({total:,} bookings)")
+        st.dataframe(frame)
+    else:
+        st.info("No bookings match the current filters")
 
 # Test fraud detection
 st.subheader("Test Fraud Detection for Boat Booking")
@@ -126,12 +169,13 @@ with st.form("fraud_test_form"):
                 }
             }
             
-            # Make request to fraud detection API
-            response = requests.post("http://localhost:5000/api/detect-fraud", json=test_data)
+            # Make request to fraud detection API (local rules while it is unavailable)
+            result = get_fraud_api_client().detect_fraud(test_data)
             
-            if response.status_code == 200:
-                result = response.json()
+            if result:
                 fraud_probability = result.get('fraud_probability', 0) * 100
+                if result.get('source') == 'rules':
+                    st.caption("Fraud detection API unavailable - scored with the rule-based engine")
                 
                 # Display result with appropriate color coding
                 if fraud_probability > 75:
@@ -171,6 +215,6 @@ with st.form("fraud_test_form"):
                         st.write(f"• {factor}")
                 
             else:
-                st.error(f"Error: {response.text}")
+                st.error("Error: fraud detection returned no result")
         except Exception as e:
             st.error(f"Error: {str(e)}") 
\ No newline at end of file
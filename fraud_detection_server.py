@@ -1,11 +1,11 @@
 import os
 import pickle
 import numpy as np
-import pandas as pd
 import tensorflow as tf
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
+from booking_features import EXPECTED_COLUMNS, extract_booking_features, extract_booking_features_batch
 
 # Configure logging
 logging.basicConfig(
@@ -48,14 +48,7 @@ def load_model_components():
         logger.info("Label encoders loaded successfully")
         
         # Expected model input columns based on your training data
-        expected_columns = [
-            'no_of_adults', 'no_of_children', 'no_of_weekend_nights', 'no_of_week_nights',
-            'type_of_meal_plan', 'required_car_parking_space', 'room_type_reserved',
-            'lead_time', 'arrival_year', 'arrival_month', 'arrival_date',
-            'market_segment_type', 'repeated_guest', 'no_of_previous_cancellations',
-            'no_of_previous_bookings_not_canceled', 'avg_price_per_room',
-            'no_of_special_requests'
-        ]
+        expected_columns = EXPECTED_COLUMNS
         logger.info(f"Expected columns: {expected_columns}")
         
     except Exception as e:
@@ -101,63 +94,70 @@ def detect_fraud():
             'status': 'error'
         }), 500
 
+@app.route('/api/detect-fraud/batch', methods=['POST'])
+def detect_fraud_batch():
+    try:
+        # Ensure model components are loaded
+        global model, scaler, label_encoders, expected_columns
+        if model is None or scaler is None or label_encoders is None:
+            load_model_components()
+        
+        # Accept a list of bookings or {"bookings": [...]}
+        bookings = request.json
+        if isinstance(bookings, dict):
+            bookings = bookings.get('bookings', [])
+        logger.info(f"Received batch of {len(bookings)} bookings")
+        
+        if not bookings:
+            return jsonify({'results': [], 'status': 'success'})
+        
+        # Preprocess, scale and predict the whole batch at once
+        processed_data = preprocess_booking_batch(bookings)
+        scaled_data = scaler.transform(processed_data)
+        probabilities = model.predict(scaled_data)[:, 0]
+        
+        return jsonify({
+            'results': [
+                {
+                    'bookingId': booking.get('bookingId'),
+                    'fraud_probability': float(probability),
+                    'is_fraud': bool(probability > 0.5)
+                }
+                for booking, probability in zip(bookings, probabilities)
+            ],
+            'status': 'success'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in batch fraud detection: {str(e)}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
 def preprocess_booking_data(booking_data):
     """
     Transform booking data into the format expected by the model
+    (a 1 x len(EXPECTED_COLUMNS) array in EXPECTED_COLUMNS order)
     """
     try:
-        # Extract start and end dates
-        start_date = pd.to_datetime(booking_data.get('startDate'))
-        end_date = pd.to_datetime(booking_data.get('endDate'))
-        
-        # Calculate night counts
-        total_nights = (end_date - start_date).days
-        # Assuming weekends are Saturday and Sunday
-        weekend_nights = sum(1 for d in range(total_nights) if (start_date + pd.Timedelta(days=d)).weekday() >= 5)
-        week_nights = total_nights - weekend_nights
-        
-        # Get customer history info (if available)
-        customer_id = booking_data.get('userId', '')
-        cancellation_history = booking_data.get('cancellationHistory', {})
-        previous_cancellations = cancellation_history.get('count', 0)
-        previous_bookings = cancellation_history.get('totalBookings', 0)
-        
-        # Create a DataFrame with expected columns
-        processed_data = {
-            'no_of_adults': booking_data.get('passengers', {}).get('adults', 1),
-            'no_of_children': booking_data.get('passengers', {}).get('children', 0),
-            'no_of_weekend_nights': weekend_nights,
-            'no_of_week_nights': week_nights,
-            'type_of_meal_plan': 0,  # Default value
-            'required_car_parking_space': 0,  # Default value
-            'room_type_reserved': 0,  # Default for boat booking context
-            'lead_time': (start_date - pd.Timestamp.now()).days,
-            'arrival_year': start_date.year,
-            'arrival_month': start_date.month,
-            'arrival_date': start_date.day,
-            'market_segment_type': 0,  # Default value
-            'repeated_guest': 1 if previous_bookings > 0 else 0,
-            'no_of_previous_cancellations': previous_cancellations,
-            'no_of_previous_bookings_not_canceled': max(0, previous_bookings - previous_cancellations),
-            'avg_price_per_room': booking_data.get('totalAmount', 0) / max(1, total_nights),
-            'no_of_special_requests': 1 if booking_data.get('specialRequests') else 0
-        }
-        
-        # Create a DataFrame and ensure column order matches what the model expects
-        df = pd.DataFrame([processed_data])
-        
-        # Ensure all expected columns are present
-        for col in expected_columns:
-            if col not in df.columns:
-                df[col] = 0  # Default value for missing columns
-        
-        # Return DataFrame with columns in the expected order
-        return df[expected_columns]
+        return extract_booking_features(booking_data)
         
     except Exception as e:
         logger.error(f"Error preprocessing booking data: {str(e)}")
         raise
 
+def preprocess_booking_batch(bookings):
+    """
+    Transform many bookings at once into an n x len(EXPECTED_COLUMNS) array
+    """
+    try:
+        return extract_booking_features_batch(bookings)
+        
+    except Exception as e:
+        logger.error(f"Error preprocessing booking batch: {str(e)}")
+        raise
+
 @app.route('/api/healthcheck', methods=['GET'])
 def healthcheck():
     """
@@ -1,12 +1,13 @@
 import pandas as pd
 import numpy as np
-import requests
 import json
 from datetime import datetime, timedelta
 import logging
-import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from notification_dispatcher import SMTPConnectionPool, NotificationDispatcher
+from fraud_api_client import get_fraud_api_client
 
 # Configure logging
 logging.basicConfig(
@@ -22,20 +23,20 @@ SMTP_PORT = 587
 SMTP_USERNAME = 'your_email@example.com'
 SMTP_PASSWORD = 'your_password'
 FROM_EMAIL = 'your_email@example.com'
+SMTP_USE_TLS = True
+SMTP_POOL_SIZE = 2
 
-def send_fraud_notification(owner_email, booking_data, fraud_score, risk_factors):
+# Alerts for the same owner within this many seconds are sent as one digest email (0 disables)
+DIGEST_WINDOW_SECONDS = 0
+
+# Fraud probability (in percent) above which the boat owner is notified
+NOTIFICATION_THRESHOLD = 30
+
+def _email_header(title, summary):
     """
-    Send an email notification to boat owner when a potential fraudulent booking is detected
+    Opening HTML (styles and alert header) shared by all fraud emails
     """
-    try:
-        # Create email message
-        msg = MIMEMultipart()
-        msg['From'] = FROM_EMAIL
-        msg['To'] = owner_email
-        msg['Subject'] = f"ALERT: Potential Fraudulent Booking (Risk: {fraud_score:.1f}%)"
-        
-        # Format the email body
-        email_body = f"""
+    return f"""
         <html>
         <head>
             <style>
@@ -51,10 +52,16 @@ def send_fraud_notification(owner_email, booking_data, fraud_score, risk_factors
         <body>
             <div class="container">
                 <div class="header">
-                    <h2>Potential Fraudulent Booking Detected</h2>
-                    <p>Our system has flagged a recent booking as potentially fraudulent with a risk score of <strong>{fraud_score:.1f}%</strong></p>
+                    <h2>{title}</h2>
+                    <p>{summary}</p>
                 </div>
-                
+        """
+
+def _booking_section(booking_data, fraud_score, risk_factors):
+    """
+    Booking details, risk factors and recommended actions for one flagged booking
+    """
+    email_body = f"""
                 <div class="booking-details">
                     <h3>Booking Details:</h3>
                     <p><strong>Booking ID:</strong> {booking_data.get('bookingId', 'N/A')}</p>
@@ -70,22 +77,22 @@ def send_fraud_notification(owner_email, booking_data, fraud_score, risk_factors
                     <h3>Risk Factors:</h3>
                     <ul>
         """
-        
-        # Add risk factors
-        for factor in risk_factors:
-            email_body += f'<li class="risk-factor">{factor}</li>\n'
-        
-        email_body += """
+    
+    # Add risk factors
+    for factor in risk_factors:
+        email_body += f'<li class="risk-factor">{factor}</li>\n'
+    
+    email_body += """
                     </ul>
                 </div>
                 
                 <div>
                     <h3>Recommended Actions:</h3>
         """
-        
-        # Add recommendations based on fraud score
-        if fraud_score > 75:
-            email_body += """
+    
+    # Add recommendations based on fraud score
+    if fraud_score > 75:
+        email_body += """
                     <ul>
                         <li>Consider rejecting this booking</li>
                         <li>Request full payment in advance</li>
@@ -93,25 +100,28 @@ def send_fraud_notification(owner_email, booking_data, fraud_score, risk_factors
                         <li>Contact customer via phone to verify details</li>
                     </ul>
             """
-        elif fraud_score > 50:
-            email_body += """
+    elif fraud_score > 50:
+        email_body += """
                     <ul>
                         <li>Request additional customer verification</li>
                         <li>Increase the required security deposit</li>
                         <li>Request payment via more secure methods</li>
                     </ul>
             """
-        else:
-            email_body += """
+    else:
+        email_body += """
                     <ul>
                         <li>Proceed with normal verification procedures</li>
                         <li>Keep an eye on any unusual communication patterns</li>
                     </ul>
             """
-            
-        email_body += """
+        
+    email_body += """
                 </div>
-                
+        """
+    return email_body
+
+EMAIL_FOOTER = """
                 <div class="footer">
                     <p>This is an automated notification from your Boat Booking Fraud Protection System.</p>
                     <p>Please do not reply to this email. For questions or assistance, contact support.</p>
@@ -120,15 +130,64 @@ def send_fraud_notification(owner_email, booking_data, fraud_score, risk_factors
         </body>
         </html>
         """
+
+def build_fraud_email(owner_email, booking_data, fraud_score, risk_factors):
+    """
+    Build the alert email for a single potentially fraudulent booking
+    """
+    msg = MIMEMultipart()
+    msg['From'] = FROM_EMAIL
+    msg['To'] = owner_email
+    msg['Subject'] = f"ALERT: Potential Fraudulent Booking (Risk: {fraud_score:.1f}%)"
+    
+    email_body = _email_header(
+        "Potential Fraudulent Booking Detected",
+        f"Our system has flagged a recent booking as potentially fraudulent with a risk score of <strong>{fraud_score:.1f}%</strong>"
+    )
+    email_body += _booking_section(booking_data, fraud_score, risk_factors)
+    email_body += EMAIL_FOOTER
+    
+    # Attach the HTML email body
+    msg.attach(MIMEText(email_body, 'html'))
+    return msg
+
+def build_fraud_digest_email(owner_email, alerts):
+    """
+    Build one email covering several flagged bookings for the same owner.
+    alerts is a list of (booking_data, fraud_score, risk_factors) tuples.
+    """
+    if len(alerts) == 1:
+        return build_fraud_email(owner_email, *alerts[0])
+    
+    highest_score = max(fraud_score for _, fraud_score, _ in alerts)
+    
+    msg = MIMEMultipart()
+    msg['From'] = FROM_EMAIL
+    msg['To'] = owner_email
+    msg['Subject'] = f"ALERT: {len(alerts)} Potential Fraudulent Bookings (Highest Risk: {highest_score:.1f}%)"
+    
+    email_body = _email_header(
+        f"{len(alerts)} Potential Fraudulent Bookings Detected",
+        f"Our system has flagged {len(alerts)} recent bookings as potentially fraudulent. "
+        f"The highest risk score is <strong>{highest_score:.1f}%</strong>"
+    )
+    # Most suspicious bookings first
+    for booking_data, fraud_score, risk_factors in sorted(alerts, key=lambda alert: alert[1], reverse=True):
+        email_body += _booking_section(booking_data, fraud_score, risk_factors)
+    email_body += EMAIL_FOOTER
+    
+    msg.attach(MIMEText(email_body, 'html'))
+    return msg
+
+def send_fraud_notification(owner_email, booking_data, fraud_score, risk_factors):
+    """
+    Send an email notification to boat owner when a potential fraudulent booking is detected
+    """
+    try:
+        msg = build_fraud_email(owner_email, booking_data, fraud_score, risk_factors)
         
-        # Attach the HTML email body
-        msg.attach(MIMEText(email_body, 'html'))
-        
-        # Send the email
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
+        # Send the email over a pooled connection (no new handshake per alert)
+        get_smtp_pool().send_message(msg)
             
         logger.info(f"Fraud notification sent to {owner_email} for booking {booking_data.get('bookingId', 'N/A')}")
         return True
@@ -137,16 +196,63 @@ def send_fraud_notification(owner_email, booking_data, fraud_score, risk_factors
         logger.error(f"Error sending fraud notification: {str(e)}")
         return False
 
+def queue_fraud_notification(owner_email, booking_data, fraud_score, risk_factors):
+    """
+    Hand a fraud alert to the background dispatcher. Alerts for the same owner
+    within DIGEST_WINDOW_SECONDS are combined into a single email.
+    """
+    return get_dispatcher().enqueue(owner_email, booking_data, fraud_score, risk_factors)
+
+_smtp_pool = None
+_smtp_pool_lock = threading.Lock()
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_smtp_pool():
+    """
+    Shared SMTP connection pool built from the module settings
+    """
+    global _smtp_pool
+    # Double-checked so concurrent first callers share one pool
+    if _smtp_pool is None:
+        with _smtp_pool_lock:
+            if _smtp_pool is None:
+                _smtp_pool = SMTPConnectionPool(
+                    SMTP_SERVER, SMTP_PORT,
+                    username=SMTP_USERNAME,
+                    password=SMTP_PASSWORD,
+                    use_tls=SMTP_USE_TLS,
+                    size=SMTP_POOL_SIZE
+                )
+    return _smtp_pool
+
+def get_dispatcher():
+    """
+    Shared notification dispatcher, started on first use
+    """
+    global _dispatcher
+    # Only one dispatcher thread may run, or digests for an owner get split
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                dispatcher = NotificationDispatcher(
+                    get_smtp_pool(),
+                    digest_window=DIGEST_WINDOW_SECONDS,
+                    build_message=build_fraud_digest_email
+                )
+                dispatcher.start()
+                _dispatcher = dispatcher
+    return _dispatcher
+
 def analyze_booking_for_fraud(booking_data):
     """
     Analyze a booking for potential fraud and identify risk factors
     """
     try:
-        # Call the fraud detection API
-        response = requests.post("http://localhost:5000/api/detect-fraud", json=booking_data)
+        # Call the fraud detection API (falls back to local rules while it is unavailable)
+        result = get_fraud_api_client().detect_fraud(booking_data)
         
-        if response.status_code == 200:
-            result = response.json()
+        if result:
             fraud_probability = result.get('fraud_probability', 0) * 100
             
             # Identify risk factors
@@ -181,10 +287,11 @@ def analyze_booking_for_fraud(booking_data):
             return {
                 'fraud_probability': fraud_probability,
                 'is_fraud': fraud_probability > 50,
-                'risk_factors': risk_factors
+                'risk_factors': risk_factors,
+                'source': result.get('source', 'api')
             }
         else:
-            logger.error(f"Error calling fraud detection API: {response.text}")
+            logger.error("Fraud detection API returned an empty result")
             return None
             
     except Exception as e:
@@ -198,7 +305,7 @@ def process_new_booking(booking_data, owner_email):
     # Analyze the booking
     fraud_analysis = analyze_booking_for_fraud(booking_data)
     
-    if fraud_analysis and fraud_analysis['fraud_probability'] > 30:  # Only notify for significant risk
+    if fraud_analysis and fraud_analysis['fraud_probability'] > NOTIFICATION_THRESHOLD:  # Only notify for significant risk
         # Send notification
         send_fraud_notification(
             owner_email, 
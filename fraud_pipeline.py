@@ -0,0 +1,456 @@
+import os
+import json
+import time
+import heapq
+import random
+import sqlite3
+import itertools
+import threading
+import logging
+from datetime import datetime
+from collections import deque
+
+logger = logging.getLogger('fraud_pipeline')
+
+# Pipeline configuration (override with environment variables)
+QUEUE_PATH = os.environ.get('FRAUD_QUEUE_PATH')  # SQLite file for a durable queue; in-memory when unset
+QUEUE_MAX_SIZE = int(os.environ.get('FRAUD_QUEUE_MAX_SIZE', 1000))
+WORKER_COUNT = int(os.environ.get('FRAUD_WORKERS', 4))
+MAX_ATTEMPTS = int(os.environ.get('FRAUD_MAX_ATTEMPTS', 5))
+RETRY_BASE_DELAY = float(os.environ.get('FRAUD_RETRY_BASE_DELAY', 1.0))
+RETRY_MAX_DELAY = float(os.environ.get('FRAUD_RETRY_MAX_DELAY', 60.0))
+# Seconds a claimed job stays reserved for its worker before another process may take it over
+JOB_LEASE_SECONDS = float(os.environ.get('FRAUD_JOB_LEASE_SECONDS', 300.0))
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class FraudScoringError(Exception):
+    """Raised by job handlers when a job should be retried"""
+
+
+# Handler errors that may succeed on a later attempt (SMTP and network errors
+# are OSErrors, a busy SQLite database is an OperationalError). Any other
+# error, such as a ValueError from a malformed booking, fails the job at once.
+RETRYABLE_ERRORS = (FraudScoringError, OSError, sqlite3.OperationalError)
+
+
+class InMemoryJobQueue:
+    """
+    Bounded in-process job queue. Jobs become available at their
+    'available_at' time, which is how retries are delayed.
+    """
+
+    def __init__(self, max_size=QUEUE_MAX_SIZE):
+        self.max_size = max_size
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self.dead_letters = deque(maxlen=1000)
+
+    def put(self, payload):
+        now = time.time()
+        with self._condition:
+            if len(self._heap) >= self.max_size:
+                raise QueueFullError(f"Fraud job queue is full ({self.max_size} jobs)")
+            job = {
+                'id': next(self._counter),
+                'payload': payload,
+                'attempts': 0,
+                'enqueued_at': now,
+                'available_at': now
+            }
+            heapq.heappush(self._heap, (job['available_at'], job['id'], job))
+            self._condition.notify()
+            return job
+
+    def get(self, timeout=None):
+        """Return the next available job, or None if none became available in time"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    return heapq.heappop(self._heap)[2]
+
+                wait = self._heap[0][0] - now if self._heap else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+    def ack(self, job):
+        pass
+
+    def retry(self, job, delay):
+        # Retries are always accepted so capacity limits never drop a started job
+        with self._condition:
+            job['attempts'] += 1
+            job['available_at'] = time.time() + delay
+            heapq.heappush(self._heap, (job['available_at'], job['id'], job))
+            self._condition.notify()
+
+    def fail(self, job, error):
+        job['error'] = error
+        self.dead_letters.append(job)
+
+    def depth(self):
+        with self._condition:
+            return len(self._heap)
+
+    def oldest_enqueued_at(self):
+        with self._condition:
+            return min((entry[2]['enqueued_at'] for entry in self._heap), default=None)
+
+
+class SQLiteJobQueue:
+    """
+    Durable job queue stored in a local SQLite file, which several processes
+    may share. A claimed job is leased to the claiming process for
+    lease_seconds; jobs whose lease expired (their process stopped or hung)
+    are claimed again, while jobs another live process is working on are
+    left alone.
+    """
+
+    def __init__(self, path, max_size=QUEUE_MAX_SIZE, lease_seconds=JOB_LEASE_SECONDS):
+        self.path = path
+        self.max_size = max_size
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS fraud_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                enqueued_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                error TEXT,
+                claimed_by INTEGER,
+                lease_until REAL
+            )
+        ''')
+        # Queue files created before leases were added
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(fraud_jobs)')}
+        for column, column_type in (('claimed_by', 'INTEGER'), ('lease_until', 'REAL')):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE fraud_jobs ADD COLUMN {column} {column_type}')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS fraud_jobs_pending ON fraud_jobs (status, available_at)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS fraud_jobs_leases ON fraud_jobs (status, lease_until)')
+        expired = self._conn.execute(
+            "SELECT COUNT(*) FROM fraud_jobs WHERE status = 'in_progress' AND IFNULL(lease_until, 0) <= ?",
+            (time.time(),)).fetchone()[0]
+        if expired:
+            logger.info(f"Recovering {expired} in-progress fraud jobs with expired leases from {path}")
+
+    def put(self, payload):
+        now = time.time()
+        with self._lock:
+            if self._depth() >= self.max_size:
+                raise QueueFullError(f"Fraud job queue is full ({self.max_size} jobs)")
+            cursor = self._conn.execute(
+                'INSERT INTO fraud_jobs (payload, enqueued_at, available_at) VALUES (?, ?, ?)',
+                (json.dumps(payload), now, now))
+            self._available.notify()
+            return {
+                'id': cursor.lastrowid,
+                'payload': payload,
+                'attempts': 0,
+                'enqueued_at': now,
+                'available_at': now
+            }
+
+    def get(self, timeout=None):
+        """
+        Claim the next available job (a pending one that is due, or one whose
+        lease expired), or return None if none became available in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.time()
+                lease_until = now + self.lease_seconds
+                # Another process holding the file can make any of these raise
+                # "database is locked"; roll back so the connection stays usable
+                self._conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = self._conn.execute(
+                        "SELECT id, payload, attempts, enqueued_at, available_at FROM fraud_jobs "
+                        "WHERE status = 'pending' AND available_at <= ? ORDER BY available_at, id LIMIT 1",
+                        (now,)).fetchone()
+                    if row is None:
+                        row = self._conn.execute(
+                            "SELECT id, payload, attempts, enqueued_at, available_at FROM fraud_jobs "
+                            "WHERE status = 'in_progress' AND IFNULL(lease_until, 0) <= ? ORDER BY id LIMIT 1",
+                            (now,)).fetchone()
+                    if row is not None:
+                        self._conn.execute(
+                            "UPDATE fraud_jobs SET status = 'in_progress', claimed_by = ?, lease_until = ? "
+                            "WHERE id = ?",
+                            (os.getpid(), lease_until, row[0]))
+                    self._conn.execute('COMMIT')
+                except Exception:
+                    self._conn.execute('ROLLBACK')
+                    raise
+
+                if row is not None:
+                    return {
+                        'id': row[0],
+                        'payload': json.loads(row[1]),
+                        'attempts': row[2],
+                        'enqueued_at': row[3],
+                        'available_at': row[4],
+                        'claimed_by': os.getpid(),
+                        'lease_until': lease_until
+                    }
+
+                # Sleep until a job is added, the next delayed retry is due or a lease expires
+                next_due = self._conn.execute(
+                    "SELECT MIN(CASE WHEN status = 'pending' THEN available_at ELSE IFNULL(lease_until, 0) END) "
+                    "FROM fraud_jobs WHERE status IN ('pending', 'in_progress')").fetchone()[0]
+                wait = max(next_due - time.time(), 0.01) if next_due is not None else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._available.wait(wait)
+
+    # ack, retry and fail only touch the job while this claim still holds it. Once
+    # the lease expired and another worker claimed the job again, the update
+    # matches no row and the new claim is left alone.
+    CLAIMED = "id = ? AND status = 'in_progress' AND claimed_by = ? AND lease_until = ?"
+
+    def _claim(self, job):
+        return job['id'], job['claimed_by'], job['lease_until']
+
+    def _claimed(self, job, cursor, action):
+        if cursor.rowcount == 1:
+            return True
+        logger.warning(f"Fraud job {job['id']} was not {action}: its lease expired and it was claimed again")
+        return False
+
+    def ack(self, job):
+        with self._lock:
+            cursor = self._conn.execute(f'DELETE FROM fraud_jobs WHERE {self.CLAIMED}', self._claim(job))
+            return self._claimed(job, cursor, 'acknowledged')
+
+    def retry(self, job, delay):
+        job['attempts'] += 1
+        job['available_at'] = time.time() + delay
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE fraud_jobs SET status = 'pending', attempts = ?, available_at = ?, claimed_by = NULL, "
+                f"lease_until = NULL WHERE {self.CLAIMED}",
+                (job['attempts'], job['available_at']) + self._claim(job))
+            self._available.notify()
+            return self._claimed(job, cursor, 'retried')
+
+    def fail(self, job, error):
+        with self._lock:
+            cursor = self._conn.execute(f"UPDATE fraud_jobs SET status = 'failed', error = ? WHERE {self.CLAIMED}",
+                                        (error,) + self._claim(job))
+            return self._claimed(job, cursor, 'failed')
+
+    def _depth(self):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM fraud_jobs WHERE status IN ('pending', 'in_progress')").fetchone()[0]
+
+    def depth(self):
+        with self._lock:
+            return self._depth()
+
+    def oldest_enqueued_at(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MIN(enqueued_at) FROM fraud_jobs WHERE status IN ('pending', 'in_progress')").fetchone()[0]
+
+
+def score_and_notify(payload):
+    """
+    Default job handler: score the booking and notify the boat owner if it
+    looks fraudulent. Raises FraudScoringError so failed calls are retried.
+    """
+    from fraud_notification import (analyze_booking_for_fraud, send_fraud_notification, queue_fraud_notification,
+                                    NOTIFICATION_THRESHOLD, DIGEST_WINDOW_SECONDS)
+
+    booking_data = payload['booking']
+    owner_email = payload['owner_email']
+
+    # A malformed booking fails the same way on every attempt, so reject it
+    # with a ValueError (not retried) before calling the scoring service
+    start_date = booking_data.get('startDate')
+    try:
+        datetime.strptime(start_date or '', '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError(f"Booking {booking_data.get('bookingId', 'N/A')} has an invalid startDate {start_date!r}")
+
+    fraud_analysis = analyze_booking_for_fraud(booking_data)
+    if fraud_analysis is None:
+        raise FraudScoringError(f"Fraud analysis failed for booking {booking_data.get('bookingId', 'N/A')}")
+
+    if fraud_analysis['fraud_probability'] > NOTIFICATION_THRESHOLD:
+        # With digests enabled the dispatcher batches and retries delivery itself
+        notify = queue_fraud_notification if DIGEST_WINDOW_SECONDS > 0 else send_fraud_notification
+        sent = notify(
+            owner_email,
+            booking_data,
+            fraud_analysis['fraud_probability'],
+            fraud_analysis['risk_factors']
+        )
+        if not sent:
+            raise FraudScoringError(f"Could not notify {owner_email} for booking {booking_data.get('bookingId', 'N/A')}")
+        logger.info(f"Fraud notification triggered for booking {booking_data.get('bookingId', 'N/A')}")
+
+    return fraud_analysis
+
+
+class FraudScoringPipeline:
+    """
+    Scores bookings for fraud off the request path. submit() enqueues a job
+    and returns immediately; a pool of worker threads runs the handler,
+    retrying failures with exponential backoff and jitter.
+    """
+
+    def __init__(self, job_queue=None, handler=None, workers=WORKER_COUNT, max_attempts=MAX_ATTEMPTS,
+                 retry_base_delay=RETRY_BASE_DELAY, retry_max_delay=RETRY_MAX_DELAY):
+        self.queue = job_queue or InMemoryJobQueue()
+        self.handler = handler or score_and_notify
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._threads = []
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'processed': 0,
+            'retried': 0,
+            'failed': 0,
+            'in_flight': 0,
+            'processing_seconds': 0.0,
+            'max_lag_seconds': 0.0
+        }
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self._work, name=f"fraud-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started fraud scoring pipeline with {self.worker_count} workers")
+
+    def stop(self, timeout=10.0):
+        """Stop the workers after their current job"""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, booking_data, owner_email):
+        """Queue a booking for fraud scoring; returns False if the queue is full"""
+        try:
+            self.queue.put({'booking': booking_data, 'owner_email': owner_email})
+        except QueueFullError as e:
+            self._count('rejected')
+            logger.error(f"{str(e)} - fraud check for booking {booking_data.get('bookingId', 'N/A')} was not queued")
+            return False
+        self._count('submitted')
+        return True
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _retry_delay(self, attempts):
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempts))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.get(timeout=0.5)
+            except Exception:
+                # A transient queue error (e.g. a locked SQLite file) must not end the worker
+                logger.exception(f"{threading.current_thread().name} could not read the fraud job queue")
+                self._stopping.wait(1.0)
+                continue
+            if job is None:
+                continue
+
+            lag = time.time() - job['available_at']
+            with self._stats_lock:
+                self._stats['in_flight'] += 1
+                self._stats['max_lag_seconds'] = max(self._stats['max_lag_seconds'], lag)
+
+            start = time.perf_counter()
+            try:
+                self.handler(job['payload'])
+                self.queue.ack(job)
+                self._count('processed')
+            except Exception as e:
+                if not isinstance(e, RETRYABLE_ERRORS):
+                    logger.error(f"Fraud job {job['id']} failed with a non-retryable error: {str(e)}")
+                    self.queue.fail(job, str(e))
+                    self._count('failed')
+                elif job['attempts'] + 1 < self.max_attempts:
+                    delay = self._retry_delay(job['attempts'])
+                    logger.warning(f"Fraud job {job['id']} failed (attempt {job['attempts'] + 1}), "
+                                   f"retrying in {delay:.1f}s: {str(e)}")
+                    self.queue.retry(job, delay)
+                    self._count('retried')
+                else:
+                    logger.error(f"Fraud job {job['id']} failed after {self.max_attempts} attempts: {str(e)}")
+                    self.queue.fail(job, str(e))
+                    self._count('failed')
+            finally:
+                with self._stats_lock:
+                    self._stats['in_flight'] -= 1
+                    self._stats['processing_seconds'] += time.perf_counter() - start
+
+    def metrics(self):
+        """Queue depth, lag and throughput counters"""
+        oldest = self.queue.oldest_enqueued_at()
+        with self._stats_lock:
+            stats = dict(self._stats)
+        completed = stats['processed'] + stats['failed']
+        return {
+            'queueDepth': self.queue.depth(),
+            'queueCapacity': self.queue.max_size,
+            'lagSeconds': round(time.time() - oldest, 3) if oldest is not None else 0.0,
+            'maxLagSeconds': round(stats['max_lag_seconds'], 3),
+            'inFlight': stats['in_flight'],
+            'submitted': stats['submitted'],
+            'rejected': stats['rejected'],
+            'processed': stats['processed'],
+            'retried': stats['retried'],
+            'failed': stats['failed'],
+            'avgProcessingSeconds': round(stats['processing_seconds'] / completed, 4) if completed else 0.0,
+            'workers': len(self._threads)
+        }
+
+
+_default_pipeline = None
+_default_pipeline_lock = threading.Lock()
+
+
+def get_default_pipeline():
+    """Shared pipeline configured from the environment, started on first use"""
+    global _default_pipeline
+    with _default_pipeline_lock:
+        if _default_pipeline is None:
+            job_queue = SQLiteJobQueue(QUEUE_PATH) if QUEUE_PATH else InMemoryJobQueue()
+            _default_pipeline = FraudScoringPipeline(job_queue=job_queue)
+            _default_pipeline.start()
+        return _default_pipeline
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Streaming fraud scoring of booking and cancellation events.
+
+Tails a newline-delimited JSON event log, scores booking events in
+micro-batches with the ML model (falling back to predict_rules), writes one
+JSON decision per booking to the output stream (and to the decision log
+when DECISION_LOG_PATH is set) and queues fraud_notification alerts for
+risky bookings. The byte offset of the last scored event is
+checkpointed after every batch, so a restarted consumer resumes where it
+stopped instead of rescoring the whole log.
+
+    python fraud_stream.py events.ndjson --output decisions.ndjson
+    python fraud_stream.py events.ndjson --socket /tmp/fraud-events.sock
+
+With --socket, producers write events to a Unix socket and the consumer
+appends them to the event log before scoring, so socket events are
+checkpointed (and survive restarts) the same way.
+
+Events look like {"type": "booking", "bookingId": ..., "userId": ...,
+"ownerEmail": ..., <booking fields>}. Booking fields are either the
+/predict names (lead_time, no_of_adults, ...) or a booking document from
+the Node backend (startDate, endDate, passengers, totalAmount, ...).
+Cancellation events ({"type": "cancellation", "userId": ...}) are not
+scored; they feed the velocity counters used for later bookings.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+import socketserver
+
+# The scorers live with the ML service
+ML_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'ml_python_server')
+if ML_SERVER_DIR not in sys.path:
+    sys.path.append(ML_SERVER_DIR)
+from predict_rules import predict_fraud
+from model_manager import RULES_VERSION, model_version
+from velocity import VelocityCounter
+from decision_log import DECISION_LOG
+from fraud_api_client import booking_to_rule_features
+
+logger = logging.getLogger('fraud_stream')
+
+# Stream configuration (override with environment variables or command-line flags)
+STREAM_BATCH_SIZE = int(os.environ.get('FRAUD_STREAM_BATCH_SIZE', 256))
+STREAM_BATCH_WAIT = float(os.environ.get('FRAUD_STREAM_BATCH_WAIT', 0.2))  # seconds to fill a batch
+STREAM_POLL_INTERVAL = float(os.environ.get('FRAUD_STREAM_POLL_INTERVAL', 0.5))
+
+# Fields copied from each event into its decision
+DECISION_ID_FIELDS = ('eventId', 'bookingId', 'userId', 'boatId')
+
+
+class Checkpoint:
+    """Offset of the next unread event, kept in a small JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'offset': 0, 'inode': None}
+
+    def save(self, offset, inode):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'offset': offset, 'inode': inode, 'updated_at': time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+
+class EventLogReader:
+    """
+    Reads complete lines from a growing file, starting at a byte offset. A
+    line without its trailing newline is left for the next read. When the
+    file is replaced (rotated) the reader finishes the old file and then
+    continues at the start of the new one; a truncated file is reread.
+    """
+
+    def __init__(self, path, offset=0, inode=None):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.inode = os.fstat(self._file.fileno()).st_ino
+        if inode is not None and inode != self.inode:
+            # The checkpoint belongs to a file that has since been rotated away
+            logger.warning(f"{path} was replaced since the last checkpoint, reading it from the start")
+            offset = 0
+        self.offset = offset
+        self._file.seek(offset)
+
+    def read(self, max_lines):
+        """Up to max_lines (end offset, line) pairs; an empty list at the end of the file"""
+        lines = []
+        while len(lines) < max_lines:
+            line = self._file.readline()
+            if not line.endswith(b'\n'):
+                # End of file, possibly in the middle of a line being written
+                self._file.seek(self.offset)
+                if not lines and self._reopen_if_replaced():
+                    continue
+                break
+            self.offset += len(line)
+            lines.append((self.offset, line))
+        return lines
+
+    def _reopen_if_replaced(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if stat.st_ino != self.inode:
+            logger.info(f"{self.path} was rotated, continuing with the new file")
+        elif stat.st_size < self.offset:
+            logger.warning(f"{self.path} was truncated, reading it from the start")
+        else:
+            return False
+        self._file.close()
+        self._file = open(self.path, 'rb')
+        self.inode = os.fstat(self._file.fileno()).st_ino
+        self.offset = 0
+        return True
+
+    def lag_bytes(self):
+        try:
+            return max(os.stat(self.path).st_size - self.offset, 0)
+        except FileNotFoundError:
+            return 0
+
+    def close(self):
+        self._file.close()
+
+
+class StreamScorer:
+    """
+    Scores micro-batches of events. Bookings are scored together with one
+    predict_batch call when a model is given; anything the model cannot
+    score goes through predict_fraud. Velocity features are filled in from
+    the events seen so far (in this process).
+    """
+
+    def __init__(self, model=None, velocity=None):
+        self.model = model
+        self.velocity = velocity or VelocityCounter()
+
+    def _features(self, event):
+        if 'lead_time' in event:
+            features = dict(event)
+        else:
+            features = booking_to_rule_features(event)
+            for field in ('userId', 'phone', 'boatId'):
+                if field in event:
+                    features[field] = event[field]
+        return self.velocity.fill_features(features)
+
+    def score(self, events):
+        """
+        Decisions for the booking events, in order; returns (positions of
+        the bookings in `events`, decisions)
+        """
+        positions = []
+        features = []
+        for position, event in enumerate(events):
+            if event.get('type', 'booking') == 'cancellation':
+                self.velocity.record('cancellation', event)
+                continue
+            # Earlier bookings of the batch count towards the later ones
+            features.append(self._features(event))
+            self.velocity.record('booking', event)
+            positions.append(position)
+
+        ml_results = [None] * len(features)
+        if self.model is not None and features:
+            ml_results = self.model.predict_batch(features)
+
+        decisions = []
+        scored_at = time.time()
+        for position, booking_features, ml_result in zip(positions, features, ml_results):
+            event = events[position]
+            if ml_result is None:
+                result = predict_fraud(booking_features)
+                source, version = 'rules', RULES_VERSION
+            else:
+                result = ml_result
+                source, version = 'ml', self.model.version
+            decision = {field: event[field] for field in DECISION_ID_FIELDS if field in event}
+            decision.update({
+                'fraud_probability': result['fraud_probability'],
+                'is_fraud': result['is_fraud'],
+                'risk_level': result['risk_level'],
+                'indicators': result['indicators'],
+                'source': source,
+                'modelVersion': version,
+                'scoredAt': scored_at
+            })
+            decisions.append(decision)
+        return positions, decisions
+
+
+def queue_alert(event, decision):
+    """Queue a fraud_notification alert if the booking is risky; returns True when queued"""
+    from fraud_notification import queue_fraud_notification, NOTIFICATION_THRESHOLD
+
+    owner_email = event.get('ownerEmail')
+    fraud_score = decision['fraud_probability'] * 100
+    if not owner_email or fraud_score <= NOTIFICATION_THRESHOLD:
+        return False
+    return queue_fraud_notification(owner_email, event, fraud_score, decision['indicators'])
+
+
+class StreamConsumer:
+    """
+    Tails an event log and scores it batch by batch. Each batch's decisions
+    are written and flushed, alerts are queued and only then is the offset
+    checkpointed, so after a crash a batch may be scored again but no event
+    is skipped.
+    """
+
+    def __init__(self, events_path, output, checkpoint_path=None, scorer=None, alert=queue_alert,
+                 batch_size=STREAM_BATCH_SIZE, batch_wait=STREAM_BATCH_WAIT, poll_interval=STREAM_POLL_INTERVAL):
+        self.events_path = events_path
+        self.output = output
+        self.checkpoint = Checkpoint(checkpoint_path or f"{events_path}.checkpoint")
+        self.scorer = scorer or StreamScorer()
+        self.alert = alert
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.poll_interval = poll_interval
+        self._stopping = threading.Event()
+        self.reader = None
+        self.stats = {
+            'batches': 0,
+            'events': 0,
+            'bookings': 0,
+            'cancellations': 0,
+            'invalid': 0,
+            'alerts': 0,
+            'lag_bytes': 0
+        }
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self, follow=True):
+        """Score events until stop() (or, without follow, until the end of the log)"""
+        state = self.checkpoint.load()
+        self.reader = EventLogReader(self.events_path, state['offset'], state.get('inode'))
+        if self.reader.offset:
+            logger.info(f"Resuming {self.events_path} at byte {self.reader.offset}")
+        try:
+            while not self._stopping.is_set():
+                batch = self._next_batch(follow)
+                if batch:
+                    self._process(batch)
+                elif not follow:
+                    break
+        finally:
+            self.reader.close()
+        return dict(self.stats)
+
+    def _next_batch(self, follow):
+        batch = self.reader.read(self.batch_size)
+        if not follow or len(batch) >= self.batch_size:
+            return batch
+        # Wait briefly for more events so quiet periods still use small batches
+        deadline = time.monotonic() + (self.batch_wait if batch else self.poll_interval)
+        while len(batch) < self.batch_size and not self._stopping.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = self.reader.read(self.batch_size - len(batch))
+            if more:
+                batch.extend(more)
+            else:
+                time.sleep(min(remaining, 0.05))
+        return batch
+
+    def _process(self, batch):
+        offsets = []
+        events = []
+        errors = []
+        for offset, line in batch:
+            try:
+                event = json.loads(line)
+                if not isinstance(event, dict):
+                    raise ValueError("Expected a JSON object")
+            except ValueError as e:
+                errors.append({'offset': offset, 'error': 'Invalid event', 'details': str(e)})
+                continue
+            offsets.append(offset)
+            events.append(event)
+
+        positions, decisions = self.scorer.score(events)
+        bookings = [events[position] for position in positions]
+        for position, decision in zip(positions, decisions):
+            # Byte offset just past the event: unique and increasing within a log
+            decision['offset'] = offsets[position]
+
+        self.output.write(''.join(json.dumps(record) + '\n' for record in errors + decisions))
+        self.output.flush()
+        for event, decision in zip(bookings, decisions):
+            DECISION_LOG.record(event, decision, decided_at=decision['scoredAt'])
+
+        if self.alert is not None:
+            for event, decision in zip(bookings, decisions):
+                if self.alert(event, decision):
+                    self.stats['alerts'] += 1
+
+        self.checkpoint.save(self.reader.offset, self.reader.inode)
+
+        self.stats['batches'] += 1
+        self.stats['events'] += len(batch)
+        self.stats['bookings'] += len(bookings)
+        self.stats['cancellations'] += len(events) - len(bookings)
+        self.stats['invalid'] += len(errors)
+        self.stats['lag_bytes'] = self.reader.lag_bytes()
+        logger.debug(f"Scored {len(bookings)} bookings up to byte {self.reader.offset}")
+
+
+class EventSpoolHandler(socketserver.StreamRequestHandler):
+    """One producer connection: each JSON line is appended to the event log"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            offset = self.server.append(line.rstrip(b'\r\n') + b'\n')
+            self.wfile.write(json.dumps({'accepted': True, 'offset': offset}).encode() + b'\n')
+
+
+class EventSpoolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, events_path):
+        if os.path.exists(socket_path):
+            # Left behind by a consumer that did not shut down cleanly
+            os.unlink(socket_path)
+        super().__init__(socket_path, EventSpoolHandler)
+        self.events_path = events_path
+        self._lock = threading.Lock()
+        self._log = open(events_path, 'ab')
+
+    def append(self, line):
+        """Append one event line; returns the log offset after it"""
+        with self._lock:
+            self._log.write(line)
+            self._log.flush()
+            return self._log.tell()
+
+    def server_close(self):
+        super().server_close()
+        self._log.close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a stream of booking events for fraud')
+    parser.add_argument('events', help='newline-delimited JSON event log to tail')
+    parser.add_argument('--output', '-o', default='-', help="decision stream (appended; default: stdout)")
+    parser.add_argument('--checkpoint', help='checkpoint file (default: <events>.checkpoint)')
+    parser.add_argument('--socket', help='also accept events on this Unix socket (appended to the log)')
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE)
+    parser.add_argument('--batch-wait', type=float, default=STREAM_BATCH_WAIT,
+                        help='seconds to wait for a batch to fill')
+    parser.add_argument('--once', action='store_true', help='stop at the end of the log instead of tailing it')
+    parser.add_argument('--rules-only', action='store_true', help='score with predict_rules only')
+    parser.add_argument('--backend', default=None, help='ML backend (default: FRAUD_MODEL_BACKEND)')
+    parser.add_argument('--no-alerts', action='store_true', help='do not send owner notifications')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    model = None
+    if not args.rules_only:
+        from ml_model import create_fraud_model
+        model = create_fraud_model(args.backend)
+        if model.is_loaded:
+            model.version = model_version(model)
+        else:
+            logger.warning("ML model could not be loaded, scoring with predict_rules")
+            model = None
+
+    # Create the log so the consumer can open it before the first event arrives
+    open(args.events, 'ab').close()
+    spool = None
+    if args.socket:
+        spool = EventSpoolServer(args.socket, args.events)
+        threading.Thread(target=spool.serve_forever, name='event-spool', daemon=True).start()
+        logger.info(f"Accepting events on {args.socket}")
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'a')
+    consumer = StreamConsumer(args.events, output, checkpoint_path=args.checkpoint,
+                              scorer=StreamScorer(model), alert=None if args.no_alerts else queue_alert,
+                              batch_size=args.batch_size, batch_wait=args.batch_wait)
+
+    def stop(signum, frame):
+        consumer.stop()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        stats = consumer.run(follow=not args.once)
+    finally:
+        if spool is not None:
+            spool.shutdown()
+            spool.server_close()
+        if output is not sys.stdout:
+            output.close()
+        if consumer.stats['alerts']:
+            # Deliver the queued alerts before exiting
+            from fraud_notification import get_dispatcher
+            get_dispatcher().stop()
+
+    print(json.dumps(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import time
+import heapq
+import smtplib
+import itertools
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger('notification_dispatcher')
+
+
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP connections open between sends so STARTTLS and
+    login run once per connection instead of once per email. Idle
+    connections are checked with NOOP before reuse and replaced when they
+    are too old, have been idle too long or the server dropped them.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True, size=2,
+                 max_idle=60.0, max_age=300.0, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.timeout = timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._stats = {'opened': 0, 'reused': 0, 'discarded': 0, 'sent': 0}
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self._count('opened')
+        return {'server': server, 'created_at': time.monotonic(), 'last_used': time.monotonic()}
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _discard(self, conn):
+        self._count('discarded')
+        self._close(conn['server'])
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _healthy(self, conn):
+        now = time.monotonic()
+        if now - conn['created_at'] > self.max_age or now - conn['last_used'] > self.max_idle:
+            return False
+        try:
+            return conn['server'].noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self):
+        """Return a healthy idle connection, or a new one"""
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._open()
+            if self._healthy(conn):
+                self._count('reused')
+                return conn
+            self._discard(conn)
+
+    def _release(self, conn):
+        conn['last_used'] = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    def send_message(self, msg):
+        """
+        Send an email.message.Message over a pooled connection. A connection
+        the server closed mid-send is replaced and the send retried once.
+        """
+        with self._slots:
+            for attempt in range(2):
+                conn = self._acquire()
+                try:
+                    conn['server'].send_message(msg)
+                except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                    self._discard(conn)
+                    if attempt:
+                        raise
+                    logger.warning(f"SMTP connection lost while sending, reconnecting: {str(e)}")
+                    continue
+                except Exception:
+                    # Recipient/data errors leave the connection in an unknown state
+                    self._discard(conn)
+                    raise
+                self._release(conn)
+                self._count('sent')
+                return
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._close(conn['server'])
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        return stats
+
+
+class NotificationDispatcher:
+    """
+    Sends fraud alerts from background threads. With a digest window, alerts
+    for the same owner that arrive within digest_window seconds of the first
+    one are delivered as a single email built by
+    build_message(owner_email, alerts), where alerts is a list of
+    (booking_data, fraud_score, risk_factors). Failed sends are retried with
+    a growing delay.
+    """
+
+    def __init__(self, pool, build_message, digest_window=0, senders=1, max_pending=1000,
+                 max_attempts=3, retry_delay=5.0):
+        self.pool = pool
+        self.build_message = build_message
+        self.digest_window = digest_window
+        self.sender_count = senders
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._scheduled = []
+        self._open_batches = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._pending_alerts = 0
+        self._sending = 0
+        self._threads = []
+        self._stopping = False
+        self._stats = {'queued': 0, 'rejected': 0, 'emails_sent': 0, 'alerts_sent': 0, 'retried': 0, 'failed': 0}
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping = False
+        for i in range(self.sender_count):
+            thread = threading.Thread(target=self._send_loop, name=f"notification-sender-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started notification dispatcher with {self.sender_count} senders "
+                    f"(digest window {self.digest_window}s)")
+
+    def stop(self, timeout=10.0):
+        """Send everything still queued (ignoring digest windows), then stop"""
+        self.flush(timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.pool.close()
+
+    def enqueue(self, owner_email, booking_data, fraud_score, risk_factors):
+        """Queue an alert; returns False if too many alerts are already waiting"""
+        alert = (booking_data, fraud_score, risk_factors)
+        with self._condition:
+            if self._pending_alerts >= self.max_pending:
+                self._stats['rejected'] += 1
+                logger.error(f"Notification queue is full - alert for booking "
+                             f"{booking_data.get('bookingId', 'N/A')} was not queued")
+                return False
+
+            self._pending_alerts += 1
+            self._stats['queued'] += 1
+            batch = self._open_batches.get(owner_email) if self.digest_window > 0 else None
+            if batch is not None:
+                batch['alerts'].append(alert)
+                return True
+
+            batch = {'owner_email': owner_email, 'alerts': [alert], 'attempts': 0}
+            if self.digest_window > 0:
+                self._open_batches[owner_email] = batch
+            self._schedule(batch, time.monotonic() + self.digest_window)
+            return True
+
+    def _schedule(self, batch, due):
+        heapq.heappush(self._scheduled, (due, next(self._counter), batch))
+        self._condition.notify()
+
+    def _next_batch(self):
+        """Wait for the next due batch; returns None when stopping"""
+        with self._condition:
+            while not self._stopping:
+                now = time.monotonic()
+                if self._scheduled and self._scheduled[0][0] <= now:
+                    batch = heapq.heappop(self._scheduled)[2]
+                    # Alerts arriving from now on start a new digest
+                    if self._open_batches.get(batch['owner_email']) is batch:
+                        del self._open_batches[batch['owner_email']]
+                    self._sending += 1
+                    return batch
+                wait = self._scheduled[0][0] - now if self._scheduled else None
+                self._condition.wait(wait)
+            return None
+
+    def _send_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            alerts = batch['alerts']
+            try:
+                self.pool.send_message(self.build_message(batch['owner_email'], alerts))
+                logger.info(f"Fraud notification sent to {batch['owner_email']} covering {len(alerts)} booking(s)")
+                self._finish(batch, 'emails_sent')
+            except Exception as e:
+                batch['attempts'] += 1
+                if batch['attempts'] < self.max_attempts:
+                    delay = self.retry_delay * (2 ** (batch['attempts'] - 1))
+                    logger.warning(f"Could not notify {batch['owner_email']} (attempt {batch['attempts']}), "
+                                   f"retrying in {delay:.1f}s: {str(e)}")
+                    with self._condition:
+                        self._sending -= 1
+                        self._stats['retried'] += 1
+                        self._schedule(batch, time.monotonic() + delay)
+                else:
+                    logger.error(f"Giving up on notifying {batch['owner_email']} after "
+                                 f"{batch['attempts']} attempts: {str(e)}")
+                    self._finish(batch, 'failed')
+
+    def _finish(self, batch, outcome):
+        with self._condition:
+            self._sending -= 1
+            self._pending_alerts -= len(batch['alerts'])
+            self._stats[outcome] += 1
+            if outcome == 'emails_sent':
+                self._stats['alerts_sent'] += len(batch['alerts'])
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Send open digests now and wait until every queued alert has been
+        delivered or given up on. Returns True if the queue drained in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            now = time.monotonic()
+            self._scheduled = [(min(due, now), seq, batch) for due, seq, batch in self._scheduled]
+            heapq.heapify(self._scheduled)
+            self._open_batches.clear()
+            self._condition.notify_all()
+            while self._pending_alerts:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def metrics(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending_alerts
+            stats['sending'] = self._sending
+        stats['smtp'] = self.pool.stats()
+        return stats
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from booking_features import (EXPECTED_COLUMNS, COLUMN_INDEX, count_weekend_nights,
+                              extract_booking_features, extract_booking_features_batch)
+from benchmark_preprocessing import legacy_preprocess_booking_data, random_bookings
+
+
+def test_weekend_nights_match_day_by_day_count():
+    for start_weekday in range(7):
+        for nights in range(-2, 30):
+            expected = sum(1 for d in range(nights) if (start_weekday + d) % 7 >= 5)
+            assert count_weekend_nights(start_weekday, nights) == expected
+
+
+def test_features_match_pandas_reference():
+    bookings = random_bookings(300, max_nights=45)
+    bookings.append({'startDate': '2031-03-01T10:30:00', 'endDate': '2031-03-04T08:00:00'})
+    bookings.append({'startDate': '2031-03-07', 'endDate': '2031-03-05', 'totalAmount': 100})
+
+    legacy = np.vstack([legacy_preprocess_booking_data(b).to_numpy(dtype=np.float64) for b in bookings])
+    single = np.vstack([extract_booking_features(b) for b in bookings])
+    batch = extract_booking_features_batch(bookings)
+
+    assert single.shape == (len(bookings), len(EXPECTED_COLUMNS))
+    np.testing.assert_allclose(single, legacy)
+    np.testing.assert_allclose(batch, legacy)
+
+
+def test_weekend_nights_for_a_charter():
+    # Friday 2031-03-07 to Friday 2031-03-21: two weekends
+    row = extract_booking_features({'startDate': '2031-03-07', 'endDate': '2031-03-21'})[0]
+    assert row[COLUMN_INDEX['no_of_weekend_nights']] == 4
+    assert row[COLUMN_INDEX['no_of_week_nights']] == 10
+    assert row[COLUMN_INDEX['arrival_month']] == 3
+
+
+def test_invalid_date_raises():
+    with pytest.raises(ValueError):
+        extract_booking_features({'startDate': 'soon', 'endDate': '2031-03-21'})
@@ -0,0 +1,71 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+
+from fraud_api_client import FraudAPIClient, CircuitBreaker, FraudAPIError, STATE_OPEN, STATE_CLOSED
+
+BOOKING = {'bookingId': 'B1', 'startDate': '2030-01-10', 'endDate': '2030-01-12',
+           'passengers': {'adults': 2, 'children': 0}, 'totalAmount': 5000,
+           'cancellationHistory': {'count': 0, 'totalBookings': 3}}
+
+
+class FraudAPIHandler(BaseHTTPRequestHandler):
+    connections = set()
+
+    def do_POST(self):
+        FraudAPIHandler.connections.add(self.client_address)
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps({'fraud_probability': 0.25, 'is_fraud': False, 'status': 'success'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_url():
+    FraudAPIHandler.protocol_version = 'HTTP/1.1'
+    server = HTTPServer(('127.0.0.1', 0), FraudAPIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api/detect-fraud"
+    server.shutdown()
+    server.server_close()
+
+
+def test_reuses_connection(api_url):
+    FraudAPIHandler.connections.clear()
+    client = FraudAPIClient(url=api_url)
+    results = [client.detect_fraud(BOOKING) for _ in range(3)]
+    client.close()
+
+    assert all(result['source'] == 'api' and result['fraud_probability'] == 0.25 for result in results)
+    assert len(FraudAPIHandler.connections) == 1
+
+
+def test_breaker_opens_and_falls_back_to_rules():
+    client = FraudAPIClient(url='http://127.0.0.1:1/api/detect-fraud',
+                            breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    for _ in range(2):
+        with pytest.raises(FraudAPIError):
+            client.detect_fraud(BOOKING)
+
+    assert client.breaker.state == STATE_OPEN
+    result = client.detect_fraud(BOOKING)
+    assert result['source'] == 'rules'
+    assert 0.0 <= result['fraud_probability'] <= 1.0
+    assert client.status()['api_calls'] == 2
+
+
+def test_half_open_trial_closes_breaker(api_url):
+    client = FraudAPIClient(url=api_url, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=0))
+    client.breaker.record_failure()
+    assert client.breaker.state == STATE_OPEN
+
+    assert client.detect_fraud(BOOKING)['source'] == 'api'
+    assert client.breaker.state == STATE_CLOSED
@@ -0,0 +1,201 @@
+import time
+import sqlite3
+import threading
+
+import pytest
+
+from fraud_pipeline import (InMemoryJobQueue, SQLiteJobQueue, FraudScoringPipeline, QueueFullError,
+                            FraudScoringError, score_and_notify)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the pipeline")
+        time.sleep(0.01)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_queue(request, tmp_path):
+    def make(**kwargs):
+        if request.param == 'memory':
+            return InMemoryJobQueue(**kwargs)
+        return SQLiteJobQueue(str(tmp_path / 'jobs.db'), **kwargs)
+    return make
+
+
+def test_put_raises_when_the_queue_is_full(make_queue):
+    job_queue = make_queue(max_size=2)
+    job_queue.put({'n': 1})
+    job_queue.put({'n': 2})
+    with pytest.raises(QueueFullError):
+        job_queue.put({'n': 3})
+    assert job_queue.depth() == 2
+
+    job_queue.ack(job_queue.get(timeout=1))
+    job_queue.put({'n': 3})
+    assert job_queue.depth() == 2
+
+
+def test_failing_jobs_back_off_then_fail(make_queue):
+    job_queue = make_queue()
+    calls = []
+
+    def handler(payload):
+        calls.append(time.monotonic())
+        raise FraudScoringError("scoring service unavailable")
+
+    pipeline = FraudScoringPipeline(job_queue=job_queue, handler=handler, workers=1, max_attempts=3,
+                                    retry_base_delay=0.05, retry_max_delay=1.0)
+    pipeline.start()
+    try:
+        assert pipeline.submit({'bookingId': 'b1'}, 'owner@example.com')
+        wait_for(lambda: pipeline.metrics()['failed'] == 1)
+    finally:
+        pipeline.stop()
+
+    assert len(calls) == 3
+    # Delays are base * 2 ** attempt with jitter in [0.5, 1.0]
+    assert calls[1] - calls[0] >= 0.05 * 0.5
+    assert calls[2] - calls[1] >= 0.1 * 0.5
+    metrics = pipeline.metrics()
+    assert metrics['retried'] == 2 and metrics['processed'] == 0
+    assert metrics['queueDepth'] == 0
+
+
+def test_retry_delay_is_capped():
+    pipeline = FraudScoringPipeline(job_queue=InMemoryJobQueue(), retry_base_delay=1.0, retry_max_delay=5.0)
+    assert all(0.5 <= pipeline._retry_delay(0) <= 1.0 for _ in range(20))
+    assert all(2.5 <= pipeline._retry_delay(10) <= 5.0 for _ in range(20))
+
+
+def test_expired_leases_are_recovered_on_reopen(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    first = SQLiteJobQueue(path, lease_seconds=0.2)
+    first.put({'bookingId': 'b1'})
+    claimed = first.get(timeout=1)
+
+    # Another process opening the queue leaves the live lease alone
+    second = SQLiteJobQueue(path, lease_seconds=0.2)
+    assert second.get(timeout=0.05) is None
+
+    # Once the lease runs out (the first process died), the job is claimed again
+    time.sleep(0.25)
+    third = SQLiteJobQueue(path)
+    recovered = third.get(timeout=1)
+    assert recovered['id'] == claimed['id']
+    assert recovered['payload'] == {'bookingId': 'b1'}
+    third.ack(recovered)
+    assert third.depth() == 0
+
+
+def test_a_stale_claim_cannot_ack_retry_or_fail_a_reclaimed_job(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    slow = SQLiteJobQueue(path, lease_seconds=0.05)
+    slow.put({'bookingId': 'b1'})
+    stale = slow.get(timeout=1)
+    time.sleep(0.1)
+
+    other = SQLiteJobQueue(path)
+    reclaimed = other.get(timeout=1)
+    assert reclaimed['id'] == stale['id']
+
+    assert slow.ack(stale) is False
+    assert slow.retry(stale, 0) is False
+    assert slow.fail(stale, 'too slow') is False
+    assert other.depth() == 1 and other.get(timeout=0.05) is None
+
+    assert other.ack(reclaimed) is True
+    assert other.depth() == 0
+
+
+class LockedOnce:
+    """Connection wrapper whose first claim UPDATE fails as if another process held the file"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.failed = False
+
+    def execute(self, sql, *args):
+        if sql.startswith('UPDATE') and not self.failed:
+            self.failed = True
+            raise sqlite3.OperationalError('database is locked')
+        return self.conn.execute(sql, *args)
+
+
+def test_a_failed_claim_is_rolled_back(tmp_path):
+    job_queue = SQLiteJobQueue(str(tmp_path / 'jobs.db'))
+    job_queue.put({'bookingId': 'b1'})
+    conn = job_queue._conn
+    job_queue._conn = LockedOnce(conn)
+
+    with pytest.raises(sqlite3.OperationalError):
+        job_queue.get(timeout=1)
+    assert not conn.in_transaction
+
+    job = job_queue.get(timeout=1)
+    assert job['payload'] == {'bookingId': 'b1'}
+
+
+def test_workers_survive_queue_errors(tmp_path):
+    job_queue = SQLiteJobQueue(str(tmp_path / 'jobs.db'))
+    job_queue._conn = LockedOnce(job_queue._conn)
+    handled = []
+    pipeline = FraudScoringPipeline(job_queue=job_queue, handler=handled.append, workers=1)
+    assert pipeline.submit({'bookingId': 'b1'}, 'owner@example.com')
+    pipeline.start()
+    try:
+        wait_for(lambda: pipeline.metrics()['processed'] == 1)
+    finally:
+        pipeline.stop()
+    assert job_queue._conn.failed and len(handled) == 1
+
+
+def test_invalid_bookings_fail_without_retries(make_queue):
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        raise ValueError("invalid startDate")
+
+    pipeline = FraudScoringPipeline(job_queue=make_queue(), handler=handler, workers=1, max_attempts=3,
+                                    retry_base_delay=0.01)
+    pipeline.start()
+    try:
+        assert pipeline.submit({'bookingId': 'b1'}, 'owner@example.com')
+        wait_for(lambda: pipeline.metrics()['failed'] == 1)
+    finally:
+        pipeline.stop()
+    assert len(calls) == 1 and pipeline.metrics()['retried'] == 0
+
+
+def test_default_handler_rejects_an_unparseable_start_date():
+    with pytest.raises(ValueError, match='startDate'):
+        score_and_notify({'booking': {'bookingId': 'b1', 'startDate': 'next week'}, 'owner_email': 'o@example.com'})
+
+
+def test_metrics_count_submitted_rejected_and_processed():
+    release = threading.Event()
+    pipeline = FraudScoringPipeline(job_queue=InMemoryJobQueue(max_size=2), handler=lambda payload: release.wait(5),
+                                    workers=1)
+    assert pipeline.submit({'bookingId': 'b1'}, 'owner@example.com')
+    assert pipeline.submit({'bookingId': 'b2'}, 'owner@example.com')
+    assert not pipeline.submit({'bookingId': 'b3'}, 'owner@example.com')
+
+    metrics = pipeline.metrics()
+    assert (metrics['submitted'], metrics['rejected'], metrics['queueDepth']) == (2, 1, 2)
+    assert metrics['queueCapacity'] == 2 and metrics['workers'] == 0
+
+    pipeline.start()
+    try:
+        wait_for(lambda: pipeline.metrics()['inFlight'] == 1)
+        time.sleep(0.05)
+        release.set()
+        wait_for(lambda: pipeline.metrics()['processed'] == 2)
+    finally:
+        pipeline.stop()
+
+    metrics = pipeline.metrics()
+    assert metrics['inFlight'] == 0 and metrics['queueDepth'] == 0 and metrics['lagSeconds'] == 0.0
+    assert metrics['failed'] == 0 and metrics['avgProcessingSeconds'] >= 0.02
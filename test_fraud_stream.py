@@ -0,0 +1,97 @@
+import io
+import json
+import os
+import socket
+import threading
+
+from fraud_stream import StreamConsumer, EventLogReader, EventSpoolServer
+
+
+def booking(booking_id, **fields):
+    event = {'type': 'booking', 'bookingId': booking_id, 'userId': 'u1', 'lead_time': 30, 'no_of_adults': 2,
+             'avg_price_per_room': 150}
+    event.update(fields)
+    return event
+
+
+def write_events(path, events, mode='a'):
+    with open(path, mode) as f:
+        for event in events:
+            f.write((event if isinstance(event, str) else json.dumps(event)) + '\n')
+
+
+def consume(path, alerts=None):
+    output = io.StringIO()
+    alert = (lambda event, decision: alerts.append((event['bookingId'], decision)) or True) \
+        if alerts is not None else None
+    stats = StreamConsumer(str(path), output, scorer=None, alert=alert, batch_size=2).run(follow=False)
+    return [json.loads(line) for line in output.getvalue().splitlines()], stats
+
+
+def test_resumes_from_the_checkpoint(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    write_events(path, [booking('b1'), {'type': 'cancellation', 'userId': 'u1'}, '{broken', booking('b2')])
+
+    decisions, stats = consume(path)
+    assert [d.get('bookingId') for d in decisions] == ['b1', None, 'b2']
+    assert decisions[1]['error'] == 'Invalid event'
+    assert stats['bookings'] == 2 and stats['cancellations'] == 1 and stats['invalid'] == 1
+    assert all(d['source'] == 'rules' for d in decisions if 'error' not in d)
+
+    # Only events appended since the last run are scored after a restart
+    write_events(path, [booking('b3', lead_time=0, no_of_previous_cancellations=4)])
+    decisions, stats = consume(path)
+    assert [d['bookingId'] for d in decisions] == ['b3']
+    assert stats['events'] == 1
+
+
+def test_velocity_features_and_alerts(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    risky = dict(lead_time=0, no_of_previous_cancellations=4, avg_price_per_room=10, ownerEmail='owner@example.com')
+    write_events(path, [booking('b1', **risky), booking('b2', **risky), booking('b3')])
+
+    alerts = []
+    decisions, _ = consume(path, alerts)
+    # The second same-day booking of u1 is flagged by the velocity counters
+    assert not any('same day' in indicator for indicator in decisions[0]['indicators'])
+    assert any('bookings on the same day' in indicator for indicator in decisions[1]['indicators'])
+    # The alert hook sees every decision after it has been written
+    assert [booking_id for booking_id, _ in alerts] == ['b1', 'b2', 'b3']
+    assert alerts[1][1] == decisions[1]
+
+
+def test_reader_waits_for_complete_lines_and_follows_rotation(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    path.write_bytes(b'{"a": 1}\n{"b": ')
+    reader = EventLogReader(str(path))
+    assert [line for _, line in reader.read(10)] == [b'{"a": 1}\n']
+    assert reader.read(10) == []
+
+    with open(path, 'ab') as f:
+        f.write(b'2}\n')
+    assert [line for _, line in reader.read(10)] == [b'{"b": 2}\n']
+
+    os.rename(path, tmp_path / 'events.ndjson.1')
+    path.write_bytes(b'{"c": 3}\n')
+    assert [line for _, line in reader.read(10)] == [b'{"c": 3}\n']
+    assert reader.offset == len(b'{"c": 3}\n')
+    reader.close()
+
+
+def test_socket_events_are_appended_to_the_log(tmp_path):
+    path = tmp_path / 'events.ndjson'
+    socket_path = str(tmp_path / 'events.sock')
+    server = EventSpoolServer(socket_path, str(path))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall((json.dumps(booking('b1')) + '\n').encode())
+            reply = json.loads(client.makefile().readline())
+        assert reply['accepted'] and reply['offset'] == path.stat().st_size
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    decisions, _ = consume(path)
+    assert [d['bookingId'] for d in decisions] == ['b1']
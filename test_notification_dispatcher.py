@@ -0,0 +1,126 @@
+import email
+import socket
+import threading
+import time
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+from notification_dispatcher import SMTPConnectionPool, NotificationDispatcher
+from fraud_notification import build_fraud_digest_email
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append(email.message_from_bytes(envelope.content))
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+def booking(booking_id, amount=5000):
+    return {'bookingId': booking_id, 'startDate': '2024-01-10', 'endDate': '2024-01-12',
+            'passengers': {'adults': 2, 'children': 0}, 'totalAmount': amount}
+
+
+def test_pool_reuses_connection(smtp_server):
+    handler, port = smtp_server
+    pool = SMTPConnectionPool('127.0.0.1', port, use_tls=False, size=1)
+    for i in range(3):
+        pool.send_message(build_fraud_digest_email('owner@example.com', [(booking(f"B{i}"), 60.0, ['Risk'])]))
+    pool.close()
+
+    assert len(handler.messages) == 3
+    assert len(handler.sessions) == 1
+    assert pool.stats()['opened'] == 1
+    assert pool.stats()['reused'] == 2
+
+
+def test_dispatcher_digests_alerts_per_owner(smtp_server):
+    handler, port = smtp_server
+    pool = SMTPConnectionPool('127.0.0.1', port, use_tls=False)
+    dispatcher = NotificationDispatcher(pool, build_fraud_digest_email, digest_window=60)
+    dispatcher.start()
+
+    dispatcher.enqueue('a@example.com', booking('B1'), 40.0, ['Short lead time'])
+    dispatcher.enqueue('a@example.com', booking('B2'), 80.0, ['High cancellation history'])
+    dispatcher.enqueue('b@example.com', booking('B3'), 55.0, [])
+    assert dispatcher.flush(timeout=10)
+    dispatcher.stop()
+
+    subjects = {message['To']: message['Subject'] for message in handler.messages}
+    assert len(handler.messages) == 2
+    assert subjects['a@example.com'].startswith('ALERT: 2 Potential Fraudulent Bookings (Highest Risk: 80.0%)')
+    assert subjects['b@example.com'] == 'ALERT: Potential Fraudulent Booking (Risk: 55.0%)'
+    assert dispatcher.metrics()['alerts_sent'] == 3
+
+
+def test_dispatcher_gives_up_after_max_attempts():
+    pool = SMTPConnectionPool('127.0.0.1', 1, use_tls=False, timeout=1)
+    dispatcher = NotificationDispatcher(pool, build_fraud_digest_email, max_attempts=2, retry_delay=0.01)
+    dispatcher.start()
+
+    dispatcher.enqueue('a@example.com', booking('B1'), 40.0, [])
+    assert dispatcher.flush(timeout=10)
+    dispatcher.stop()
+
+    metrics = dispatcher.metrics()
+    assert metrics['retried'] == 1
+    assert metrics['failed'] == 1
+    assert metrics['pending'] == 0
+
+
+def test_concurrent_first_use_creates_one_dispatcher(monkeypatch):
+    import fraud_notification
+
+    created = []
+
+    class SlowDispatcher:
+        def __init__(self, pool, **kwargs):
+            time.sleep(0.05)
+            created.append(self)
+            self.pool = pool
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(fraud_notification, 'NotificationDispatcher', SlowDispatcher)
+    monkeypatch.setattr(fraud_notification, '_dispatcher', None)
+    monkeypatch.setattr(fraud_notification, '_smtp_pool', None)
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def first_use():
+        barrier.wait()
+        results.append(fraud_notification.get_dispatcher())
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(dispatcher is created[0] for dispatcher in results)
+    assert created[0].pool is fraud_notification.get_smtp_pool()